@@ -3,7 +3,7 @@ Cave Leclerc Blagnac — Comparateur Vivino
 Scrape les vins disponibles chez Leclerc Blagnac et compare avec les notes Vivino
 """
 
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template
 from playwright.sync_api import sync_playwright
 import requests
 import json
@@ -11,8 +11,13 @@ import re
 import time
 import logging
 import os
+import threading
+import uuid
+import concurrent.futures
 from requests.exceptions import RequestException
 
+from rate_governor import RateGovernor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -258,19 +263,22 @@ VIVINO_HEADERS = {
 VIVINO_MAX_RETRIES = 3
 VIVINO_RETRY_BACKOFF_S = 0.6
 VIVINO_COOLDOWN_S = 180
-_vivino_state = {
-    'blocked_until': 0.0,
-    'reason': '',
-}
+VIVINO_RATE_PER_S = 3.0      # débit initial (ajusté ensuite par AIMD)
+VIVINO_RATE_BURST = 3        # rafale autorisée au démarrage
+VIVINO_ENRICH_WORKERS = 4    # requêtes Vivino simultanées pendant l'enrichissement
+# Régulateur partagé (seau à jetons AIMD + Retry-After + disjoncteur),
+# même implémentation que streamlit_app.py.
+_vivino_gov = RateGovernor(rate=VIVINO_RATE_PER_S, burst=VIVINO_RATE_BURST,
+                           min_rate=0.3, max_rate=2 * VIVINO_RATE_PER_S,
+                           breaker_threshold=VIVINO_MAX_RETRIES, cooldown=VIVINO_COOLDOWN_S)
 
 
 def _is_vivino_blocked() -> bool:
-    return time.time() < _vivino_state['blocked_until']
+    return _vivino_gov.is_open()
 
 
 def _mark_vivino_blocked(reason: str, cooldown_s: int = VIVINO_COOLDOWN_S) -> None:
-    _vivino_state['blocked_until'] = time.time() + cooldown_s
-    _vivino_state['reason'] = reason
+    _vivino_gov.trip(reason, cooldown_s)
     logger.warning(f"Vivino temporairement indisponible ({reason}) pendant {cooldown_s}s")
 
 
@@ -296,6 +304,8 @@ def search_vivino(wine_name: str) -> dict | None:
     search_query = ' '.join(words[:5]) if len(words) > 5 else clean_name
 
     for attempt in range(1, VIVINO_MAX_RETRIES + 1):
+        if not _vivino_gov.acquire():
+            return None
         try:
             resp = requests.get(
                 'https://www.vivino.com/api/explore/explore',
@@ -313,6 +323,7 @@ def search_vivino(wine_name: str) -> dict | None:
             )
 
             if resp.status_code == 200:
+                _vivino_gov.on_success()
                 data = resp.json()
                 records = data.get('explore_vintage', {}).get('records', [])
                 if not records:
@@ -332,22 +343,31 @@ def search_vivino(wine_name: str) -> dict | None:
                 }
 
             if resp.status_code == 429:
-                _mark_vivino_blocked('rate-limit (429)')
+                delay = _vivino_gov.on_throttle(resp.headers.get('Retry-After'))
+                logger.warning(f"Vivino rate-limit (429) — pause {delay:.0f}s, "
+                               f"débit {_vivino_gov.snapshot()['rate']} req/s")
+                continue
+
+            if resp.status_code == 403:
+                _vivino_gov.on_error('forbidden')
                 return None
 
             if resp.status_code in {500, 502, 503, 504}:
+                _vivino_gov.on_error()
                 logger.warning(f"Vivino erreur HTTP {resp.status_code} (tentative {attempt}/{VIVINO_MAX_RETRIES})")
             else:
+                # Toujours rendre compte au régulateur : sinon une sonde semi-ouverte reste en vol
+                _vivino_gov.on_error()
                 logger.warning(f"Vivino réponse inattendue HTTP {resp.status_code} pour '{wine_name}'")
                 return None
 
         except RequestException as e:
+            _vivino_gov.on_error()
             logger.warning(f"Erreur réseau Vivino pour '{wine_name}' (tentative {attempt}/{VIVINO_MAX_RETRIES}): {e}")
 
         if attempt < VIVINO_MAX_RETRIES:
             time.sleep(VIVINO_RETRY_BACKOFF_S * attempt)
 
-    _mark_vivino_blocked('pannes réseau/HTTP répétées', cooldown_s=90)
     return None
 
 
@@ -429,6 +449,167 @@ def apply_price_history(wines: list[dict]) -> list[dict]:
 
 _cache = {}
 
+# ─────────────────────────────────────────────────────────────────────────────
+# JOBS D'ENRICHISSEMENT (arrière-plan)
+# ─────────────────────────────────────────────────────────────────────────────
+# /api/wines ne bloque plus le worker HTTP pendant le scraping : il démarre
+# (ou rejoint) un job en arrière-plan et renvoie immédiatement la liste
+# partielle des vins (toujours une liste), l'id du job en en-tête X-Job-Id.
+# Le client suit la progression via /api/jobs/<id> (polling) ou
+# /api/jobs/<id>/stream (Server-Sent Events).
+
+# Jobs terminés conservés JOB_TTL_S secondes (résultat consultable via
+# /api/jobs/<id>), JOB_MAX_FINISHED au plus : _jobs ne grossit plus sans fin.
+JOB_TTL_S = 3600
+JOB_MAX_FINISHED = 20
+
+_jobs = {}
+_jobs_cond = threading.Condition()
+_current_job = {'id': None}
+
+
+def _job_wines(job: dict) -> list:
+    """Copie des vins partiels triés par ratio (appelé sous _jobs_cond : les
+    workers d'enrichissement modifient les dicts en place)."""
+    return sorted((dict(w) for w in job['wines']),
+                  key=lambda x: x.get('ratio') or 0, reverse=True)
+
+
+def _job_snapshot(job: dict, with_wines: bool = True) -> dict:
+    """Vue JSON d'un job, copiée sous _jobs_cond puis sérialisée hors verrou."""
+    snapshot = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': job['message'],
+        'done': job['done'],
+        'total': job['total'],
+        'error': job['error'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'vivino': _vivino_gov.snapshot(),
+    }
+    if with_wines:
+        snapshot['wines'] = _job_wines(job)
+    return snapshot
+
+
+def _update_job(job: dict, **fields) -> None:
+    with _jobs_cond:
+        job.update(fields)
+        job['version'] += 1
+        _jobs_cond.notify_all()
+
+
+def _apply_vivino(wine: dict, vivino_data: dict | None, vivino_unavailable: bool) -> None:
+    if vivino_data and vivino_data['rating'] > 0:
+        wine.update(vivino_data)
+        wine['ratio'] = round((vivino_data['rating'] / wine['price']) * 10, 3) if wine['price'] > 0 else 0
+        wine['vivino_unavailable'] = False
+    else:
+        wine.update(_empty_vivino_payload(unavailable=vivino_unavailable))
+
+
+def _search_vivino_unless_blocked(wine_name: str) -> dict | None:
+    """search_vivino, sauté tant que Vivino nous bloque (le débit est réglé par _vivino_gov)."""
+    if _is_vivino_blocked():
+        return None
+    return search_vivino(wine_name)
+
+
+def _run_wines_job(job: dict) -> None:
+    try:
+        # 1. Scraper Leclerc
+        _update_job(job, status='scraping', message='Scraping Leclerc Blagnac…')
+        logger.info("🔍 Scraping Leclerc Blagnac...")
+        wines = scrape_leclerc_wines()
+
+        if not wines:
+            # Mode démo si scraping échoue
+            logger.warning("Scraping échoué - données de démonstration")
+            wines = get_demo_wines()
+
+        wines = deduplicate_wines(wines)
+        wines = apply_price_history(wines)
+        for wine in wines:
+            wine.update(_empty_vivino_payload(unavailable=False))
+
+        # Les vins sont publiés tout de suite, sans note : le client peut
+        # afficher le catalogue pendant l'enrichissement.
+        _update_job(job, status='enriching', wines=wines, total=len(wines),
+                    message=f'Enrichissement Vivino ({len(wines)} vins)…')
+
+        # 2. Enrichir avec Vivino — une requête par nom normalisé, en parallèle
+        logger.info(f"🍷 Enrichissement Vivino pour {len(wines)} vins...")
+        by_key = {}
+        for wine in wines:
+            by_key.setdefault(normalize_wine_name(wine.get('name', '')), []).append(wine)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=VIVINO_ENRICH_WORKERS) as pool:
+            futures = {
+                pool.submit(_search_vivino_unless_blocked, group[0]['name']): key
+                for key, group in by_key.items()
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                group = by_key[futures[fut]]
+                try:
+                    vivino_data = fut.result()
+                except Exception as e:
+                    logger.warning(f"Erreur Vivino pour '{group[0]['name']}': {e}")
+                    vivino_data = None
+                vivino_unavailable = _is_vivino_blocked()
+                with _jobs_cond:
+                    for wine in group:
+                        _apply_vivino(wine, vivino_data, vivino_unavailable)
+                    job['done'] += len(group)
+                    job['version'] += 1
+                    _jobs_cond.notify_all()
+
+        wines.sort(key=lambda x: x['ratio'] or 0, reverse=True)
+        _cache['wines'] = wines
+        _update_job(job, status='done', message=f'✅ {len(wines)} vins',
+                    finished_at=time.time())
+    except Exception as e:
+        logger.exception("Job d'enrichissement en échec")
+        _update_job(job, status='error', error=str(e), message=f'❌ {e}',
+                    finished_at=time.time())
+
+
+def _prune_jobs() -> None:
+    """Évince les jobs terminés expirés ou en surnombre (appelé sous _jobs_cond)."""
+    now = time.time()
+    finished = sorted((j for j in _jobs.values() if j['status'] in {'done', 'error'}),
+                      key=lambda j: j['finished_at'] or 0)
+    for i, job in enumerate(finished):
+        expired = now - (job['finished_at'] or now) > JOB_TTL_S
+        if expired or len(finished) - i > JOB_MAX_FINISHED:
+            del _jobs[job['id']]
+
+
+def start_wines_job() -> dict:
+    """Démarre un job d'enrichissement, ou retourne celui déjà en cours."""
+    with _jobs_cond:
+        current = _jobs.get(_current_job['id'])
+        if current and current['status'] not in {'done', 'error'}:
+            return current
+        _prune_jobs()
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'message': 'Mise en file…',
+            'done': 0,
+            'total': 0,
+            'error': '',
+            'started_at': time.time(),
+            'finished_at': None,
+            'wines': [],
+            'version': 0,
+        }
+        _jobs[job['id']] = job
+        _current_job['id'] = job['id']
+    threading.Thread(target=_run_wines_job, args=(job,), daemon=True).start()
+    return job
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -436,65 +617,63 @@ def index():
 
 @app.route('/api/wines')
 def get_wines():
-    """Retourne tous les vins avec leur note Vivino et ratio qualité/prix"""
-    
+    """Retourne tous les vins avec leur note Vivino et ratio qualité/prix.
+
+    Cache vide : démarre (ou rejoint) le job d'enrichissement et renvoie la
+    liste partielle disponible (vide pendant le scraping). L'id et l'état du
+    job sont en en-têtes X-Job-Id / X-Job-Status (détail : /api/jobs/<id>).
+    """
     if 'wines' in _cache:
         logger.info("Cache hit ✅")
         return jsonify(_cache['wines'])
-    
-    # 1. Scraper Leclerc
-    logger.info("🔍 Scraping Leclerc Blagnac...")
-    wines = scrape_leclerc_wines()
-    
-    if not wines:
-        # Mode démo si scraping échoue
-        logger.warning("Scraping échoué - données de démonstration")
-        wines = get_demo_wines()
-
-    wines = deduplicate_wines(wines)
-    wines = apply_price_history(wines)
-    
-    # 2. Enrichir avec Vivino
-    logger.info(f"🍷 Enrichissement Vivino pour {len(wines)} vins...")
-    enriched = []
-    
-    vivino_cache = {}
 
-    vivino_unavailable = _is_vivino_blocked()
-    unavailable_payload = _empty_vivino_payload(unavailable=True)
-    empty_payload = _empty_vivino_payload(unavailable=False)
-
-    for i, wine in enumerate(wines):
-        logger.info(f"[{i+1}/{len(wines)}] {wine['name'][:50]}")
-
-        if vivino_unavailable:
-            wine.update(unavailable_payload)
-            enriched.append(wine)
-            continue
-
-        cache_key = normalize_wine_name(wine.get('name', ''))
-        vivino_data = vivino_cache.get(cache_key)
-        if vivino_data is None:
-            vivino_data = search_vivino(wine['name'])
-            vivino_cache[cache_key] = vivino_data
-            vivino_unavailable = _is_vivino_blocked()
-
-        if vivino_data and vivino_data['rating'] > 0:
-            wine.update(vivino_data)
-            wine['ratio'] = round((vivino_data['rating'] / wine['price']) * 10, 3) if wine['price'] > 0 else 0
-            wine['vivino_unavailable'] = False
-        else:
-            wine.update(unavailable_payload if vivino_unavailable else empty_payload)
+    job = start_wines_job()
+    with _jobs_cond:
+        wines, status = _job_wines(job), job['status']
+    resp = jsonify(wines)
+    resp.headers['X-Job-Id'] = job['id']
+    resp.headers['X-Job-Status'] = status
+    return resp
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Progression d'un job d'enrichissement (polling)."""
+    with _jobs_cond:
+        job = _jobs.get(job_id)
+        snapshot = _job_snapshot(job) if job is not None else None
+    if snapshot is None:
+        return jsonify({'error': 'job inconnu'}), 404
+    return jsonify(snapshot)
+
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Progression d'un job en Server-Sent Events (un évènement par mise à jour)."""
+    with _jobs_cond:
+        job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job inconnu'}), 404
+
+    def _events():
+        seen = -1
+        while True:
+            with _jobs_cond:
+                _jobs_cond.wait_for(lambda: job['version'] != seen, timeout=15)
+                if job['version'] == seen:
+                    payload = None   # keep-alive
+                else:
+                    seen = job['version']
+                    payload = _job_snapshot(job, with_wines=False)
+            if payload is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            if payload['status'] in {'done', 'error'}:
+                return
 
-        enriched.append(wine)
-        if i < len(wines) - 1 and not vivino_unavailable:
-            time.sleep(0.3)
-    
-    # Trier par ratio décroissant
-    enriched.sort(key=lambda x: x['ratio'] or 0, reverse=True)
-    
-    _cache['wines'] = enriched
-    return jsonify(enriched)
+    return Response(_events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/refresh')
@@ -504,6 +683,12 @@ def refresh():
     return jsonify({'status': 'cache cleared'})
 
 
+@app.route('/api/vivino/governor')
+def vivino_governor():
+    """État du régulateur Vivino (débit courant, pause, disjoncteur)."""
+    return jsonify(_vivino_gov.snapshot())
+
+
 @app.route('/api/vivino/<path:wine_name>')
 def vivino_search(wine_name):
     """Recherche manuelle d'un vin sur Vivino"""
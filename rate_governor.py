@@ -0,0 +1,166 @@
+"""
+Régulateur de débit adaptatif partagé pour le trafic Vivino
+(streamlit_app.py et app.py).
+
+- Seau à jetons : débit soutenu `rate` req/s, rafale `burst`
+- AIMD : +`increase` req/s à chaque succès, ×`decrease` à chaque 429
+- Retry-After : pause globale honorée par tous les appelants
+- Disjoncteur : ouvert après `breaker_threshold` échecs consécutifs,
+  semi-ouvert après `cooldown` s (une requête sonde), cooldown doublé
+  à chaque rechute (plafonné à `max_cooldown`)
+- Sonde bornée : une sonde semi-ouverte sans retour (exception, tâche
+  annulée) est libérée après `probe_timeout` s ; `release()` rend un
+  jeton acquis mais inutilisé
+"""
+
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class RateGovernor:
+    """Seau à jetons AIMD + disjoncteur, thread-safe."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 3,
+                 min_rate: float = 0.2, max_rate: float = 4.0,
+                 increase: float = 0.05, decrease: float = 0.5,
+                 breaker_threshold: int = 5, cooldown: float = 120.0,
+                 max_cooldown: float = 1800.0, probe_timeout: float = 60.0):
+        self.rate = float(rate)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_threshold = breaker_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.reason = ""
+        self.throttle_events = 0      # compteur monotone 429/403 (ordonnanceurs)
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._pause_until = 0.0       # Retry-After / backoff en cours
+        self._failures = 0            # échecs consécutifs
+        self._probe = False           # sonde semi-ouverte en vol
+        self._probe_until = 0.0       # échéance de la sonde (appelant muet)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    # ── Acquisition ──────────────────────────────────────────────────────
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Bloque jusqu'à obtenir un jeton. Retourne False sans attendre si le
+        disjoncteur est ouvert (l'appelant saute la requête), ou si `timeout`
+        est dépassé.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                now = time.time()
+                if self.state == OPEN:
+                    if now < self._open_until:
+                        return False
+                    self.state, self._probe = HALF_OPEN, False
+                if self.state == HALF_OPEN:
+                    if self._probe and now < self._probe_until:
+                        return False      # une seule sonde à la fois
+                    if now >= self._pause_until:
+                        # Sonde libre, ou sonde précédente jamais rapportée
+                        # (exception avalée, tâche annulée) : on la remplace.
+                        self._probe, self._probe_until = True, now + self.probe_timeout
+                        return True
+                wait = self._pause_until - now
+                if wait <= 0:
+                    mono = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (mono - self._last) * self.rate)
+                    self._last = mono
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+            if deadline is not None and time.time() + wait > deadline:
+                return False
+            time.sleep(min(wait, 5.0))
+
+    def release(self) -> None:
+        """Rend un jeton acquis mais non consommé (requête non émise, tâche annulée)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probe:
+                self._probe = False
+            elif self.state == CLOSED:
+                self._tokens = min(float(self.burst), self._tokens + 1)
+
+    # ── Retours d'expérience ─────────────────────────────────────────────
+    def on_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.state == HALF_OPEN:
+                self.state, self._probe, self.reason = CLOSED, False, ""
+                self._cooldown = self.base_cooldown
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None) -> float:
+        """429 : débit divisé, pause globale (Retry-After ou backoff). Retourne la pause en s."""
+        try:
+            delay = float(retry_after) if retry_after not in (None, "") else 0.0
+        except (TypeError, ValueError):
+            delay = 0.0
+        with self._lock:
+            now = time.time()
+            self.throttle_events += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            if delay <= 0:
+                current = max(0.0, self._pause_until - now)
+                delay = max(2.0, min(current * 2 + 2.0, 60.0))
+            self._pause_until = max(self._pause_until, now + delay)
+            self._fail("rate-limit (429)")
+        return delay
+
+    def on_error(self, kind: str = "error") -> None:
+        """403 ("forbidden") ou erreur réseau/5xx ("error") : compte pour le disjoncteur."""
+        with self._lock:
+            if kind == "forbidden":
+                self.throttle_events += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._fail("accès refusé (403)" if kind == "forbidden" else "erreurs réseau/HTTP")
+
+    def trip(self, reason: str, cooldown: float | None = None) -> None:
+        """Ouvre le disjoncteur immédiatement (blocage avéré)."""
+        with self._lock:
+            self._open(reason, cooldown)
+
+    def _fail(self, reason: str) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN:
+            self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+            self._open(reason)
+        elif self._failures >= self.breaker_threshold:
+            self._open(reason)
+
+    def _open(self, reason: str, cooldown: float | None = None) -> None:
+        self.state, self.reason, self._probe = OPEN, reason, False
+        self._open_until = time.time() + (cooldown if cooldown is not None else self._cooldown)
+
+    # ── Lecture ──────────────────────────────────────────────────────────
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and time.time() < self._open_until
+
+    def snapshot(self) -> dict:
+        """État courant pour affichage : débit, état du disjoncteur, pauses."""
+        with self._lock:
+            now = time.time()
+            return {
+                "rate": round(self.rate, 2),
+                "state": self.state,
+                "reason": self.reason,
+                "paused_for": round(max(0.0, self._pause_until - now), 1),
+                "open_for": round(max(0.0, self._open_until - now), 1) if self.state == OPEN else 0.0,
+                "failures": self._failures,
+                "throttle_events": self.throttle_events,
+            }
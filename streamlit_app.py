@@ -8,7 +8,8 @@ NOUVEAUX AXES v5 :
        N×/s (une écriture par log, soit 200-300 écritures/run).
        Seuls status=done/error forcent un flush immédiat.
      • ckpt_tick() : même approche, flush toutes les 3s au lieu de
-       1 écriture par vin (gain de 30-100× sur 100 vins).
+       1 écriture par vin (gain de 30-100× sur 100 vins) ; le checkpoint
+       est un journal append-only (1 EAN par ligne), compacté en fin de run.
      • _read_json_cached() : cache en mémoire de process (TTL 2s) pour
        load_vivino_cache / load_leclerc_cache / load_job_state — élimine
        les relectures disque répétées à chaque render Streamlit.
@@ -29,32 +30,62 @@ NOUVEAUX AXES v5 :
 CORRECTIFS PRÉCÉDENTS (v3-v4) : voir historique git.
 """
 
-import re, json, time, math, unicodedata, threading, html as _html
+import re, json, time, math, bisect, unicodedata, threading, sqlite3, atexit, sys, html as _html
 import concurrent.futures
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 from functools import lru_cache
+from contextlib import contextmanager
 import streamlit as st
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import pandas as pd
+import numpy as np
 from bs4 import BeautifulSoup
 from pathlib import Path
 from datetime import datetime
+from rate_governor import RateGovernor
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CONFIG
 # ═══════════════════════════════════════════════════════════════════════════
 STORE_CODE            = "1431"
 MAX_PAGES             = 15
-_VIVINO_API_WORKERS    = 4     # conservé pour compatibilité (Phase 1 désactivée)
+_VIVINO_API_WORKERS    = 4     # requêtes API Vivino simultanées (client async, Phase 1)
 _VIVINO_SEL_WORKERS    = 3     # drivers Selenium parallèles pour Vivino
+DRIVER_POOL_SIZE       = 3     # navigateurs Chrome gardés chauds (Leclerc + Vivino)
+DRIVER_BLOCK_RESOURCES = True  # CDP : bloque images, médias, polices, CSS, trackers (cf. _BLOCK_PATTERNS)
+DRIVER_PAGE_LOAD_STRATEGY = "eager"  # get() rend la main au DOMContentLoaded ("normal" = load complet)
+DRIVER_MAX_AGE         = 30 * 60  # recyclage d'un driver après N secondes (fuites mémoire Chrome)
+LECLERC_PAGE_WORKERS   = 3     # drivers en parallèle pour les pages 2..N du catalogue
 LECLERC_CACHE_TTL     = 12 * 3600  # conservé pour compatibilité — plus utilisé (cache permanent)
 LECLERC_PAGE_SIZE     = 96
+# Endpoint JSON du catalogue (celui que le front appelle, cf. interception ccu.e.leclerc
+# dans app.py). Vide → client HTTP désactivé, Selenium uniquement. Désactivé tant
+# qu'aucune réponse réelle n'a été capturée : capture_leclerc_api_sample() enregistre
+# l'appel du front dans tests/fixtures/, y relever l'URL avant de renseigner celle-ci.
+# Toute réponse qui ne concorde pas avec le dernier catalogue Selenium est écartée.
+LECLERC_API_URL       = ""
+LECLERC_API_TIMEOUT   = 15
+LECLERC_API_MIN_MATCH = 0.5    # part minimale des produits API déjà connus (EAN) du catalogue Selenium
+LECLERC_PARSER        = "lxml"   # backend parse_page : "lxml" (rapide) ou "bs4" (référence)
 VIVINO_SIMILARITY_MIN  = 0.45   # relevé : 0.28 acceptait les faux-positifs API non triés
 VIVINO_CANDIDATES_MAX  = 8
+VIVINO_CASCADE_WIDTH   = 3      # requêtes de repli lancées ensemble (onglets / requêtes API)
+VIVINO_CASCADE_ACCEPT  = 0.70   # confiance qui coupe la cascade et annule les requêtes en vol
 VIVINO_API_TIMEOUT     = 12   # augmenté : 8s trop court sur réseau lent
+VIVINO_API_PHASE       = False  # Phase 1 : passe API async avant Selenium (l'API ignore souvent q)
+VIVINO_WINE_BUDGET_S   = 30     # budget API par vin, cascade de repli comprise
+VIVINO_API_PASS_BUDGET_S = 600  # budget total d'une passe API sur le catalogue
 VIVINO_CACHE_TTL_DAYS  = 30    # Entrées Vivino auto-marquées stale après N jours
+VIVINO_SEARCH_TTL_HIT_DAYS  = 14   # mémo de recherche : résultats avec candidats
+VIVINO_SEARCH_TTL_MISS_DAYS = 5    # mémo de recherche : « aucun candidat » (cache négatif)
+VIVINO_SEARCH_MEMO_MAX      = 20000  # entrées max, éviction LRU au-delà
 CARDS_PER_PAGE         = 24    # Nb de cartes affichées par page dans le classement
+RENDER_CACHE_MAX       = 2048  # fragments HTML de cartes mémorisés (LRU, toutes sessions)
+LIVE_REFRESH_S         = 2     # période des fragments live pendant un job (s)
 
 VIVINO_API_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -63,6 +94,12 @@ VIVINO_API_HEADERS = {
     "Accept-Language": "fr-FR,fr;q=0.9",
     "Referer": "https://www.vivino.com/",
 }
+LECLERC_API_HEADERS = {
+    "User-Agent":      VIVINO_API_HEADERS["User-Agent"],
+    "Accept":          "application/json",
+    "Accept-Language": "fr-FR,fr;q=0.9",
+    "Referer":         "https://www.e.leclerc/",
+}
 
 CACHE_DIR = Path(__file__).parent / ".cache"
 CACHE_DIR.mkdir(exist_ok=True)
@@ -86,6 +123,14 @@ SORTS: dict[str, object] = {
     "Prix ↑":  lambda x: ( (x.get("price") or 9999), -(x.get("score") or 0)),
     "Prix ↓":  lambda x: (-(x.get("price") or 0),    -(x.get("score") or 0)),
 }
+# Mêmes ordres en colonnes : (champ, signe, valeur si vide) par critère, pour
+# les permutations précalculées de WineTable.order() (égalités : ordre d'origine).
+_SORT_KEYS: dict[str, tuple] = {
+    "Q/P 💰":  (("score",  -1, 0),    ("rating", -1, 0)),
+    "Note ⭐":  (("rating", -1, 0),    ("score",  -1, 0)),
+    "Prix ↑":  (("price",   1, 9999), ("score",  -1, 0)),
+    "Prix ↓":  (("price",  -1, 0),    ("score",  -1, 0)),
+}
 _SORT_HELP: dict[str, str] = {
     "Q/P 💰":  "Qualité/Prix : note × popularité ÷ prix.",
     "Note ⭐":  "Note Vivino décroissante.",
@@ -102,65 +147,61 @@ VIVINO_TYPE_IDS: dict[str, int] = {
     "vins-mousseux-et-petillants":    3,
 }
 
-def _make_session() -> requests.Session:
+def _make_session(headers: dict = VIVINO_API_HEADERS) -> requests.Session:
     """Session HTTP avec retry automatique et connection pooling."""
     s = requests.Session()
-    # 429 exclu de status_forcelist : le backoff global _vivino_429_until
+    # 429 exclu de status_forcelist : le régulateur global _VIVINO_GOV
     # gère la congestion. Laisser Retry retenter le 429 en parallèle × 8
     # threads aggraverait le throttling (24 requêtes supplémentaires).
     retry = Retry(total=3, backoff_factor=0.5,
                   status_forcelist=[500, 502, 503, 504])
     s.mount("https://", HTTPAdapter(max_retries=retry, pool_connections=8, pool_maxsize=16))
-    s.headers.update(VIVINO_API_HEADERS)
+    s.headers.update(headers)
     return s
 
 _SESSION = _make_session()
+_LECLERC_SESSION = _make_session(LECLERC_API_HEADERS)   # en-têtes e.leclerc (jamais le Referer Vivino)
+
+# ── Régulateur global du trafic Vivino (API + navigations Selenium) ─────────
+# Seau à jetons AIMD + Retry-After + disjoncteur (cf. rate_governor.py).
+# Toute requête Vivino passe par _vivino_wait_if_throttled() / _VIVINO_GOV.acquire().
+# Un seul régulateur par process serveur (st.cache_resource) : chaque rerun
+# ré-exécute ce module, un global recréerait un seau vierge par rerun et les
+# jobs en cours, la barre latérale et les sessions suivantes divergeraient.
+@st.cache_resource
+def _vivino_governor() -> RateGovernor:
+    return RateGovernor(rate=1.0, burst=3, min_rate=0.2, max_rate=4.0,
+                        breaker_threshold=10, cooldown=120.0)
 
-# ── Backoff 429/403 Vivino (partagé entre tous les threads Phase 1) ─────────
-_vivino_429_until: float = 0.0
-_vivino_429_lock  = __import__("threading").Lock()
-_vivino_403_count: int   = 0    # nombre de 403 depuis le début de cette session API
-_vivino_403_lock  = __import__("threading").Lock()
-_VIVINO_403_ABORT = 10          # abandonner Phase 1 si ≥ N 403 consécutifs
+_VIVINO_GOV = _vivino_governor()
 
-def _vivino_inc_403() -> int:
-    """Incrémente le compteur 403. Retourne la nouvelle valeur."""
-    global _vivino_403_count
-    with _vivino_403_lock:
-        _vivino_403_count += 1
-        return _vivino_403_count
+def _vivino_throttle_count() -> int:
+    """Compteur monotone des 429/403 (ordonnanceur des workers Selenium)."""
+    return _VIVINO_GOV.throttle_events
 
-def _vivino_reset_403() -> None:
-    global _vivino_403_count
-    with _vivino_403_lock:
-        _vivino_403_count = 0
+def _vivino_inc_403() -> int:
+    """Signale un 403 au régulateur. Retourne le nombre d'échecs consécutifs."""
+    _VIVINO_GOV.on_error("forbidden")
+    return _VIVINO_GOV.snapshot()["failures"]
 
 def _vivino_is_blocked() -> bool:
-    """True si l'IP est probablement bloquée (trop de 403)."""
-    with _vivino_403_lock:
-        return _vivino_403_count >= _VIVINO_403_ABORT
-
-def _vivino_wait_if_throttled() -> None:
-    """Attend si Vivino a retourné 429 récemment."""
-    global _vivino_429_until
-    with _vivino_429_lock:
-        wait = _vivino_429_until - time.time()
-    if wait > 0:
-        time.sleep(max(0.0, wait))
+    """True si le disjoncteur est ouvert (IP probablement bloquée)."""
+    return _VIVINO_GOV.is_open()
+
+def _vivino_breaker_wait() -> float:
+    """Secondes avant que le régulateur accepte de nouveau des requêtes (0 = disjoncteur fermé)."""
+    snap = _VIVINO_GOV.snapshot()
+    if snap["state"] == "closed":
+        return 0.0
+    return max(snap["open_for"], 1.0)   # semi-ouvert : sonde en vol, réessayer bientôt
+
+def _vivino_wait_if_throttled() -> bool:
+    """Attend un jeton du régulateur. False si le disjoncteur est ouvert (ne pas requêter)."""
+    return _VIVINO_GOV.acquire()
 
 def _vivino_set_backoff(retry_after_hdr: str = "") -> float:
-    """Enregistre un backoff exponentiel après un 429. Retourne le délai en s."""
-    global _vivino_429_until
-    try:
-        delay = float(retry_after_hdr) if retry_after_hdr else 0.0
-    except ValueError:
-        delay = 0.0
-    with _vivino_429_lock:
-        current_wait = max(0.0, _vivino_429_until - time.time())
-        if delay <= 0:
-            delay = max(2.0, min(current_wait * 2 + 2.0, 60.0))
-        _vivino_429_until = time.time() + delay
-    return delay
+    """Signale un 429 (débit divisé, pause Retry-After ou exponentielle). Retourne le délai en s."""
+    return _VIVINO_GOV.on_throttle(retry_after_hdr)
 
 # ── Supprimer les warnings ScriptRunContext des threads background ────────
 # Ces warnings sont émis par Streamlit à chaque appel de log depuis un thread
@@ -690,6 +731,307 @@ div[class*="st-key-bad_viv_"] button:hover{
 # ═══════════════════════════════════════════════════════════════════════════
 # CACHE
 # ═══════════════════════════════════════════════════════════════════════════
+#
+# STOCKAGE SQLITE (.cache/cave.db, mode WAL)
+#   Remplace les gros fichiers vivino_<slug>.json / leclerc_<slug>.json /
+#   price_history.json / vivino_rejections.json réécrits en entier à chaque
+#   sauvegarde. Une ligne par entrée (clé build_query pour Vivino, EAN pour
+#   Leclerc et l'historique prix, query pour les rejets) :
+#     • _store_save() compare chaque ligne (==) à l'instantané mémoire de
+#       la dernière écriture → seules les lignes modifiées sont sérialisées
+#       et upsertées, les lignes disparues supprimées, le tout dans une
+#       transaction. Instantanés et verrou sont communs au process
+#       (st.cache_resource) : une table n'est lue qu'une fois par serveur.
+#     • Les fichiers JSON existants sont importés une seule fois au
+#       démarrage (_store_migrate_json) puis renommés en *.json.migrated.
+#     • Le JSON n'est plus produit que pour le Gist (_store_export_json).
+# ─────────────────────────────────────────────────────────────────────────
+
+_DB_PATH = CACHE_DIR / "cave.db"
+_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    tbl   TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    pos   INTEGER NOT NULL DEFAULT 0,
+    data  TEXT NOT NULL,
+    PRIMARY KEY (tbl, scope, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS search_memo (
+    key       TEXT PRIMARY KEY,
+    n         INTEGER NOT NULL,
+    data      TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_memo_used ON search_memo(used_at);
+"""
+
+_db_local = threading.local()       # une connexion SQLite par thread
+
+
+@st.cache_resource
+def _store_state() -> tuple[dict, dict, dict, threading.RLock]:
+    """
+    Instantanés du store, communs à tout le process serveur (sessions, reruns,
+    thread du job). Streamlit réexécute le script dans un module neuf à chaque
+    rerun : en globales ordinaires, chaque exécution relisait et re-désérialisait
+    les tables entières et avait son propre verrou d'écriture.
+    """
+    return {}, {}, {}, threading.RLock()
+
+
+# _store_snap    (tbl, scope) → {key: (pos, objet)} : état tel qu'écrit en base,
+#                copie privée jamais remise aux appelants (comparée par ==)
+# _store_parsed  (tbl, scope) → {key: objet} : vue partagée rendue par _store_load,
+#                remplacée (jamais modifiée) à chaque écriture
+# _store_version (tbl, scope) → compteur de modifications (catalogue_version)
+_store_snap, _store_parsed, _store_version, _store_lock = _store_state()
+
+
+def _db() -> sqlite3.Connection:
+    """Connexion du thread courant (WAL : lecteurs non bloqués par l'écrivain)."""
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_DB_SCHEMA)
+        _db_local.conn = conn
+    return conn
+
+
+def _store_dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _store_rows(tbl: str, scope: str = "") -> dict[str, tuple[int, object]]:
+    """Instantané {key: (pos, objet)} lu 1× par process, tenu à jour par les écritures."""
+    sk = (tbl, scope)
+    with _store_lock:
+        snap = _store_snap.get(sk)
+        if snap is None:
+            cur = _db().execute(
+                "SELECT key, pos, data FROM rows WHERE tbl=? AND scope=? ORDER BY pos",
+                (tbl, scope))
+            snap, view = {}, {}
+            for k, pos, data in cur:
+                snap[k] = (pos, json.loads(data))
+                view[k] = json.loads(data)
+            _store_snap[sk], _store_parsed[sk] = snap, view
+        return snap
+
+
+def _store_load(tbl: str, scope: str = "") -> dict:
+    """Vue désérialisée {key: objet}, partagée jusqu'à la prochaine écriture (lecture seule)."""
+    with _store_lock:
+        _store_rows(tbl, scope)
+        return _store_parsed[(tbl, scope)]
+
+
+def _store_count(tbl: str, scope: str = "") -> int:
+    return len(_store_rows(tbl, scope))
+
+
+def _store_diff(old: tuple | None, pos: int, value) -> str | None:
+    """JSON à écrire pour `value` en position `pos`, None si la ligne est inchangée."""
+    if old is not None and old[0] == pos and old[1] == value:
+        return None
+    data = _store_dumps(value)
+    if old is not None and old[0] == pos and data == _store_dumps(old[1]):
+        return None     # même JSON (tuple/liste…) malgré == faux
+    return data
+
+
+def _store_bump(sk: tuple) -> None:
+    _store_version[sk] = _store_version.get(sk, 0) + 1
+
+
+def _store_save(tbl: str, scope: str, rows: dict) -> int:
+    """
+    Écrit `rows` ({key: objet}) comme nouveau contenu de (tbl, scope).
+    Chaque objet est comparé (==) à l'instantané : seules les lignes modifiées
+    sont sérialisées et upsertées, les clés absentes de `rows` supprimées.
+    Retourne le nb de lignes touchées.
+    """
+    sk = (tbl, scope)
+    with _store_lock:
+        snap = _store_rows(tbl, scope)
+        upserts, new_snap = [], {}
+        for pos, (k, v) in enumerate(rows.items()):
+            data = _store_diff(snap.get(k), pos, v)
+            if data is None:
+                new_snap[k] = snap[k]
+            else:
+                new_snap[k] = (pos, json.loads(data))
+                upserts.append((tbl, scope, k, pos, data))
+        deletes = [(tbl, scope, k) for k in snap if k not in new_snap]
+        if not upserts and not deletes:
+            return 0
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO rows (tbl, scope, key, pos, data) VALUES (?,?,?,?,?) "
+                    "ON CONFLICT(tbl, scope, key) DO UPDATE SET pos=excluded.pos, data=excluded.data",
+                    upserts)
+            if deletes:
+                conn.executemany("DELETE FROM rows WHERE tbl=? AND scope=? AND key=?", deletes)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        view, fresh = _store_parsed[sk], {u[2]: u[4] for u in upserts}
+        _store_snap[sk] = new_snap
+        _store_parsed[sk] = {k: json.loads(fresh[k]) if k in fresh else view[k] for k in new_snap}
+        _store_bump(sk)
+        return len(upserts) + len(deletes)
+
+
+def _store_upsert(tbl: str, scope: str, key: str, value) -> None:
+    """Upsert d'une seule ligne (position conservée si la clé existe)."""
+    sk = (tbl, scope)
+    with _store_lock:
+        snap = _store_rows(tbl, scope)
+        pos = snap[key][0] if key in snap else len(snap)
+        data = _store_diff(snap.get(key), pos, value)
+        if data is None:
+            return
+        _db().execute(
+            "INSERT INTO rows (tbl, scope, key, pos, data) VALUES (?,?,?,?,?) "
+            "ON CONFLICT(tbl, scope, key) DO UPDATE SET pos=excluded.pos, data=excluded.data",
+            (tbl, scope, key, pos, data))
+        snap[key] = (pos, json.loads(data))
+        _store_parsed[sk] = {**_store_parsed[sk], key: json.loads(data)}
+        _store_bump(sk)
+
+
+def _store_clear(tbl: str, scope: str = "") -> None:
+    sk = (tbl, scope)
+    with _store_lock:
+        _db().execute("DELETE FROM rows WHERE tbl=? AND scope=?", (tbl, scope))
+        _store_snap[sk], _store_parsed[sk] = {}, {}
+        _store_bump(sk)
+
+
+def _meta_get(name: str, default=None):
+    row = _db().execute("SELECT value FROM meta WHERE name=?", (name,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def _meta_set(name: str, value) -> None:
+    _db().execute("INSERT INTO meta (name, value) VALUES (?, ?) "
+                  "ON CONFLICT(name) DO UPDATE SET value=excluded.value",
+                  (name, json.dumps(value)))
+
+
+def _store_target(fname: str) -> tuple[str, str] | None:
+    """Nom de fichier cache historique → (tbl, scope) SQLite."""
+    if fname == "price_history.json":
+        return "price_history", ""
+    if fname == "vivino_rejections.json":
+        return "rejections", ""
+    # vivino_ckpt_<slug>.json : checkpoint de scraping en cours, pas un cache
+    m = re.fullmatch(r"(vivino|leclerc)_(?!ckpt_)(.+)\.json", fname)
+    return (m.group(1), m.group(2)) if m else None
+
+
+def _leclerc_rows(wines: list) -> dict:
+    """Liste de vins Leclerc → {clé EAN/nom: vin}, ordre conservé."""
+    rows = {}
+    for i, w in enumerate(wines):
+        k = w.get("ean") or w.get("name") or str(i)
+        if k in rows:
+            k = f"{k}#{i}"
+        rows[k] = w
+    return rows
+
+
+def _store_import_json(fname: str, content: str) -> bool:
+    """Importe le contenu d'un fichier cache JSON (migration, Gist). True si importé."""
+    target = _store_target(fname)
+    if not target:
+        return False
+    try:
+        parsed = json.loads(content)
+    except Exception:
+        return False
+    if not isinstance(parsed, dict):
+        return False
+    tbl, scope = target
+    if tbl == "leclerc":
+        wines = parsed.get("wines")
+        if not isinstance(wines, list):
+            return False
+        _store_save(tbl, scope, _leclerc_rows(wines))
+        _meta_set(f"leclerc_cached_at:{scope}", parsed.get("cached_at") or time.time())
+    else:
+        if tbl == "vivino":
+            parsed = {k: {f: x for f, x in v.items() if f != "_stale"} if isinstance(v, dict) else v
+                      for k, v in parsed.items()}
+        _store_save(tbl, scope, parsed)
+    return True
+
+
+def _store_export_json(fname: str) -> str | None:
+    """Sérialise (tbl, scope) au format JSON historique compact (pour le Gist). None si vide."""
+    target = _store_target(fname)
+    if not target or not _store_count(*target):
+        return None
+    tbl, scope = target
+    data = _store_load(tbl, scope)
+    if tbl == "leclerc":
+        data = {"cached_at": _meta_get(f"leclerc_cached_at:{scope}", 0),
+                "slug": scope, "wines": list(data.values())}
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+@st.cache_resource
+def _store_migrate_json() -> int:
+    """
+    Migration one-shot des caches JSON vers SQLite (1× par process : le
+    script est réexécuté à chaque rerun, cache_resource ne l'est pas).
+    Importe chaque fichier (ou son .bak si le principal est illisible) dont la
+    table cible est vide, puis le renomme en *.json.migrated.
+    """
+    n = 0
+    # Réparation : les versions précédentes importaient aussi le checkpoint en
+    # cours (vivino_ckpt_<slug>.json) comme scope Vivino « ckpt_<slug> ».
+    try:
+        _db().execute("DELETE FROM rows WHERE tbl='vivino' AND scope LIKE 'ckpt\\_%' ESCAPE '\\'")
+        for p in CACHE_DIR.glob("vivino_ckpt_*.json.migrated"):
+            live = p.with_name(p.name[:-len(".migrated")])
+            if not live.exists() and not live.with_suffix(".jsonl").exists():
+                p.replace(live)
+    except Exception:
+        pass
+    for p in sorted(CACHE_DIR.glob("*.json")):
+        target = _store_target(p.name)
+        if not target:
+            continue
+        if not _store_count(*target):
+            for src in (p, p.with_suffix(".bak")):
+                try:
+                    if src.exists() and _store_import_json(p.name, src.read_text("utf-8")) \
+                            and _store_count(*target):
+                        n += 1
+                        break
+                except Exception:
+                    pass
+        try:
+            p.replace(p.with_name(p.name + ".migrated"))
+            p.with_suffix(".bak").unlink(missing_ok=True)
+        except Exception:
+            pass
+    return n
+
+
+_store_migrate_json()
 
 # ═══════════════════════════════════════════════════════════════════════════
 # PERSISTANCE GIST — sauvegarde sur GitHub Gist (Streamlit Cloud safe)
@@ -716,6 +1058,9 @@ _GIST_API  = "https://api.github.com/gists"
 _GIST_CONF = st.secrets.get("gist", {})
 _GIST_TOKEN   = _GIST_CONF.get("github_token", "")
 _GIST_ID_CFG  = _GIST_CONF.get("gist_id", "")
+# compress = true → contenu gzip+base64 (préfixe _GIST_GZ_PREFIX) au lieu du JSON compact
+_GIST_COMPRESS = bool(_GIST_CONF.get("compress", False))
+_GIST_GZ_PREFIX = "gz64:"
 
 # Fichiers à persister dans le Gist (filenames exacts du CACHE_DIR)
 _GIST_FILES = {
@@ -801,12 +1146,31 @@ def _gist_id() -> str:
         return ""
 
 
-def gist_push(filename: str, content: str) -> bool:
-    """
-    Pousse un fichier vers le Gist (bloquant).
-    Retourne True si succès, False sinon (non bloquant pour l'app).
-    """
-    if not _gist_is_configured():
+def _gist_encode(content: str) -> str:
+    """JSON compact → contenu Gist (gzip+base64 si _GIST_COMPRESS)."""
+    if not _GIST_COMPRESS:
+        return content
+    import gzip, base64
+    return _GIST_GZ_PREFIX + base64.b64encode(
+        gzip.compress(content.encode("utf-8"), mtime=0)).decode("ascii")
+
+
+def _gist_decode(content: str) -> str:
+    """Contenu Gist → JSON (accepte indifféremment gzip+base64 ou JSON brut)."""
+    if content and content.startswith(_GIST_GZ_PREFIX):
+        import gzip, base64
+        return gzip.decompress(base64.b64decode(content[len(_GIST_GZ_PREFIX):])).decode("utf-8")
+    return content
+
+
+def _gist_hash(content: str) -> str:
+    import hashlib
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _gist_patch(files: dict[str, str]) -> bool:
+    """PATCH unique portant plusieurs fichiers {filename: contenu déjà encodé}."""
+    if not files or not _gist_is_configured():
         return False
     gid = _gist_id()
     if not gid:
@@ -815,14 +1179,26 @@ def gist_push(filename: str, content: str) -> bool:
         resp = requests.patch(
             f"{_GIST_API}/{gid}",
             headers=_gist_headers(),
-            json={"files": {filename: {"content": content}}},
-            timeout=20,
+            json={"files": {f: {"content": c} for f, c in files.items()}},
+            timeout=30,
         )
         return resp.status_code in (200, 201)
     except Exception:
         return False
 
 
+def gist_push(filename: str, content: str) -> bool:
+    """
+    Pousse un fichier vers le Gist (bloquant).
+    Retourne True si succès, False sinon (non bloquant pour l'app).
+    """
+    encoded = _gist_encode(content)
+    ok = _gist_patch({filename: encoded})
+    if ok:
+        _gist_mark_synced(filename, encoded)
+    return ok
+
+
 def gist_pull_all() -> dict:
     """
     Récupère tous les fichiers du Gist.
@@ -841,7 +1217,7 @@ def gist_pull_all() -> dict:
         )
         resp.raise_for_status()
         return {
-            fname: fdata.get("content", "")
+            fname: _gist_decode(fdata.get("content", ""))
             for fname, fdata in resp.json().get("files", {}).items()
             if fname in _GIST_FILES and fdata.get("content")
         }
@@ -849,25 +1225,115 @@ def gist_pull_all() -> dict:
         return {}
 
 
-_gist_push_last: dict[str, float] = {}   # filename → last push timestamp
-_gist_push_lock = threading.Lock()       # protection accès concurrent
-_GIST_PUSH_MIN_INTERVAL = 60.0           # 1 push/min max par fichier (throttle scraping)
+# ── Moteur de synchronisation Gist ─────────────────────────────────────────
+# Un seul thread de fond (démarré à la demande) pousse les fichiers marqués
+# « sales ». Les demandes de plusieurs threads sont fusionnées pendant
+# _GIST_PUSH_MIN_INTERVAL puis envoyées en UN seul PATCH. Chaque fichier
+# est haché (sha256 du contenu encodé) : s'il est identique à la dernière
+# version poussée (hash persisté dans la table meta), il n'est pas renvoyé.
+# L'état vit dans un st.cache_resource : chaque rerun ré-exécute ce module,
+# des globals recréeraient un worker et un hook atexit par rerun.
+@st.cache_resource
+def _gist_sync_state() -> tuple[dict, threading.Condition]:
+    state = {
+        "dirty":      {},     # filename → contenu explicite (None = export SQLite)
+        "force":      False,  # push immédiat demandé
+        "last_patch": 0.0,    # timestamp du dernier PATCH
+        "worker":     None,   # threading.Thread du worker
+    }
+    atexit.register(lambda: _gist_flush_at_exit())   # 1× par process
+    return state, threading.Condition()
+
+_GIST_SYNC, _gist_cond = _gist_sync_state()
+_GIST_PUSH_MIN_INTERVAL = 60.0           # 1 PATCH/min max (throttle scraping)
+_GIST_RETRY_DELAY = 30.0                 # après un échec de PATCH
+
+def _gist_mark_synced(filename: str, encoded: str) -> None:
+    """Mémorise le hash de la version présente dans le Gist."""
+    try:
+        _meta_set(f"gist_hash:{filename}", _gist_hash(encoded))
+    except Exception:
+        pass
+
 
-def _gist_push_async(filename: str, content: str, force: bool = False) -> None:
-    """Push non-bloquant throttlé : max 1 push par fichier toutes les 5s.
-    Évite la saturation de threads lors des sauvegardes incrémentielles du scraping.
-    force=True : bypasse le throttle (fin de scraping, correction manuelle).
-    daemon=False : le thread survit un peu plus longtemps si Streamlit recycle."""
+def _gist_sync_once() -> None:
+    """Encode les fichiers sales, écarte les inchangés, pousse le reste en un PATCH."""
+    with _gist_cond:
+        batch = dict(_GIST_SYNC["dirty"])
+        _GIST_SYNC["dirty"].clear()
+        _GIST_SYNC["force"] = False
+    changed: dict[str, str] = {}
+    for fname, content in batch.items():
+        try:
+            data = content if content is not None else _store_export_json(fname)
+        except Exception:
+            data = None
+        if not data:
+            continue
+        encoded = _gist_encode(data)
+        if _meta_get(f"gist_hash:{fname}") == _gist_hash(encoded):
+            continue   # identique au Gist → rien à envoyer
+        changed[fname] = encoded
+    if not changed:
+        return
+    ok = _gist_patch(changed)
+    with _gist_cond:
+        _GIST_SYNC["last_patch"] = time.time()
+        if not ok:
+            # Réessayer plus tard sans écraser une demande plus récente
+            for fname in changed:
+                _GIST_SYNC["dirty"].setdefault(fname, batch[fname])
+    if ok:
+        for fname, encoded in changed.items():
+            _gist_mark_synced(fname, encoded)
+
+
+def _gist_worker_loop() -> None:
+    while True:
+        with _gist_cond:
+            while not _GIST_SYNC["dirty"]:
+                _gist_cond.wait()
+            # Fenêtre de fusion : attendre la fin du throttle sauf si forcé
+            while not _GIST_SYNC["force"]:
+                wait = _GIST_SYNC["last_patch"] + _GIST_PUSH_MIN_INTERVAL - time.time()
+                if wait <= 0:
+                    break
+                _gist_cond.wait(timeout=wait)
+        try:
+            _gist_sync_once()
+        except Exception:
+            pass
+        with _gist_cond:
+            if _GIST_SYNC["dirty"] and not _GIST_SYNC["force"]:
+                # échec de PATCH → petite pause avant la prochaine tentative
+                _gist_cond.wait(timeout=_GIST_RETRY_DELAY)
+
+
+def _gist_push_async(filename: str, content=None, force: bool = False) -> None:
+    """Marque un fichier à pousser vers le Gist (non bloquant).
+    Les demandes sont fusionnées par le thread de synchronisation : un seul
+    PATCH toutes les _GIST_PUSH_MIN_INTERVAL secondes, fichiers inchangés ignorés.
+    force=True : réveille immédiatement le thread (fin de scraping, correction manuelle).
+    content=None : le JSON est exporté depuis SQLite au moment du push."""
     if not _gist_is_configured():
         return
-    now = time.time()
-    with _gist_push_lock:
-        if not force and now - _gist_push_last.get(filename, 0) < _GIST_PUSH_MIN_INTERVAL:
-            return   # trop tôt — skip ce push
-        _gist_push_last[filename] = now
-    threading.Thread(
-        target=gist_push, args=(filename, content), daemon=False
-    ).start()
+    with _gist_cond:
+        _GIST_SYNC["dirty"][filename] = content
+        _GIST_SYNC["force"] = _GIST_SYNC["force"] or force
+        if _GIST_SYNC["worker"] is None or not _GIST_SYNC["worker"].is_alive():
+            _GIST_SYNC["worker"] = threading.Thread(target=_gist_worker_loop, daemon=True,
+                                                    name="gist-sync")
+            _GIST_SYNC["worker"].start()
+        _gist_cond.notify_all()
+
+
+def _gist_flush_at_exit() -> None:
+    """Dernier push synchrone des fichiers en attente à l'arrêt du process."""
+    if _GIST_SYNC["dirty"] and _gist_is_configured():
+        try:
+            _gist_sync_once()
+        except Exception:
+            pass
 
 
 def restore_from_gist() -> int:
@@ -904,23 +1370,21 @@ def restore_from_gist() -> int:
                     pass
         if not file_content:
             continue
+        encoded_content = file_content
+        try:
+            file_content = _gist_decode(file_content)
+        except Exception:
+            continue
 
         # Migration : vivino.json (ancien monolithique) → vivino_vins-rouges.json
         if fname == "vivino.json":
-            target = CACHE_DIR / "vivino_vins-rouges.json"
-            if not target.exists():
-                try:
-                    json.loads(file_content)
-                    target.write_text(file_content, "utf-8")
-                    _invalidate_mem_cache(target)
+            if not _store_count("vivino", "vins-rouges"):
+                if _store_import_json("vivino_vins-rouges.json", file_content):
                     restored += 1
-                except Exception:
-                    pass
             continue
         # Ignorer les fichiers inconnus (sécurité)
         if fname not in _GIST_FILES:
             continue
-        target = CACHE_DIR / fname
         try:
             parsed = json.loads(file_content)
             # Ne pas écraser avec un fichier vide depuis le Gist
@@ -930,9 +1394,9 @@ def restore_from_gist() -> int:
                 continue
             if is_leclerc and (not isinstance(parsed, dict) or len(parsed.get("wines",[])) == 0):
                 continue
-            target.write_text(file_content, "utf-8")
-            _invalidate_mem_cache(target)
-            restored += 1
+            if _store_import_json(fname, file_content):
+                restored += 1
+                _gist_mark_synced(fname, encoded_content)
         except Exception:
             pass   # JSON corrompu dans le Gist → ignorer
     return restored
@@ -941,49 +1405,44 @@ def restore_from_gist() -> int:
 def _lec_path(slug): return CACHE_DIR / f"leclerc_{slug}.json"
 def _viv_path(slug="vins-rouges"): return CACHE_DIR / f"vivino_{slug}.json"
 
+@st.cache_resource
+def _leclerc_views() -> dict:
+    return {}
+
+
+_leclerc_view: dict[str, tuple[int, dict]] = _leclerc_views()   # slug → (version store, payload)
+
 def load_leclerc_cache(slug: str) -> dict | None:
     """Retourne le cache Leclerc sans expiration — conservé jusqu'au prochain scrape manuel."""
-    p = _lec_path(slug)
-    d = _read_json_cached(p, ttl=30.0)
-    if not isinstance(d, dict): return None
-    if "wines" not in d: return None
+    rows = _store_load("leclerc", slug)
+    if not rows: return None
+    ver = _store_version.get(("leclerc", slug), 0)
+    cached = _leclerc_view.get(slug)
+    if cached and cached[0] == ver:
+        return cached[1]
+    d = {"cached_at": _meta_get(f"leclerc_cached_at:{slug}", 0),
+         "slug": slug, "wines": list(rows.values())}
+    _leclerc_view[slug] = (ver, d)
     return d
 
 def save_leclerc_cache(slug: str, wines: list) -> None:
-    p, tmp = _lec_path(slug), _lec_path(slug).with_suffix(".tmp")
-    bak = _lec_path(slug).with_suffix(".bak")
-
     # Guard anti-régression : refus d'écraser avec liste vide ou réduite de > 50%
-    if p.exists():
-        try:
-            _ex = json.loads(p.read_text("utf-8"))
-            n_ex = len(_ex.get("wines", [])) if isinstance(_ex, dict) else 0
-            if n_ex > 0 and len(wines) == 0:
-                import logging
-                logging.warning(f"[ScoreMaster] save_leclerc_cache({slug}): refus d'écraser "
-                                f"avec liste vide ({n_ex} vins existants).")
-                return
-            if n_ex >= 5 and len(wines) < n_ex // 2:
-                import logging
-                logging.warning(f"[ScoreMaster] save_leclerc_cache({slug}): refus d'écraser "
-                                f"({n_ex} vins) avec {len(wines)} vins (< 50%).")
-                return
-        except Exception:
-            pass
+    n_ex = _store_count("leclerc", slug)
+    if n_ex > 0 and len(wines) == 0:
+        import logging
+        logging.warning(f"[ScoreMaster] save_leclerc_cache({slug}): refus d'écraser "
+                        f"avec liste vide ({n_ex} vins existants).")
+        return
+    if n_ex >= 5 and len(wines) < n_ex // 2:
+        import logging
+        logging.warning(f"[ScoreMaster] save_leclerc_cache({slug}): refus d'écraser "
+                        f"({n_ex} vins) avec {len(wines)} vins (< 50%).")
+        return
 
-    try:
-        data_str = json.dumps({"cached_at": time.time(), "slug": slug, "wines": wines},
-                              ensure_ascii=False, indent=2)
-        if p.exists():
-            try:
-                import shutil; shutil.copy2(p, bak)
-            except Exception:
-                pass
-        tmp.write_text(data_str, "utf-8")
-        tmp.replace(p)
-        _invalidate_mem_cache(p)
-        _gist_push_async(p.name, data_str)  # persistance cloud
-    except Exception: tmp.unlink(missing_ok=True); raise
+    _store_save("leclerc", slug, _leclerc_rows(wines))
+    _meta_set(f"leclerc_cached_at:{slug}", time.time())
+    _leclerc_view.pop(slug, None)           # cached_at fait partie de la vue
+    _gist_push_async(_lec_path(slug).name)  # persistance cloud
 
 
 def _normalize_vivino_entry(entry: dict) -> dict:
@@ -1029,59 +1488,31 @@ def _normalize_vivino_entry(entry: dict) -> dict:
 
 
 def load_vivino_cache(slug: str = "vins-rouges") -> dict:
-    """Charge le cache Vivino avec protection contre la corruption.
+    """Charge le cache Vivino depuis SQLite.
 
-    Si le fichier local est absent ou vide, tente de restaurer depuis :
-    1. Le backup .bak local
-    2. Le Gist GitHub (si configuré)
+    Si la table est vide pour ce slug, tente de restaurer depuis le Gist
+    GitHub (si configuré).
     """
-    p   = _viv_path(slug)
-    bak = p.with_suffix(".bak")
+    raw = _store_load("vivino", slug)
 
-    raw = _read_json_cached(p, ttl=_MEM_CACHE_TTL)
-
-    # ── Récupération si fichier local absent ou corrompu ─────────────────
-    if not isinstance(raw, dict) or len(raw) == 0:
-        # Tentative 1 : backup .bak local
-        if bak.exists():
-            try:
-                bak_raw = json.loads(bak.read_text("utf-8"))
-                if isinstance(bak_raw, dict) and len(bak_raw) > 0:
+    # ── Récupération si aucune entrée locale ─────────────────────────────
+    if not raw and _gist_is_configured():
+        try:
+            gid = _gist_id()
+            resp = requests.get(f"{_GIST_API}/{gid}",
+                                headers=_gist_headers(), timeout=15)
+            resp.raise_for_status()
+            fname = _viv_path(slug).name
+            fdata = resp.json().get("files", {}).get(fname, {})
+            content = _gist_decode(fdata.get("content", ""))
+            if content and _store_import_json(fname, content):
+                raw = _store_load("vivino", slug)
+                if raw:
                     import logging
                     logging.warning(f"[ScoreMaster] load_vivino_cache({slug}): "
-                                    f"fichier principal vide/absent, restauration depuis .bak "
-                                    f"({len(bak_raw)} entrées)")
-                    import shutil
-                    shutil.copy2(bak, p)  # copie (conserve .bak) plutôt que déplacer
-                    _invalidate_mem_cache(p)
-                    raw = bak_raw
-            except Exception:
-                pass
-        # Tentative 2 : Gist
-        if not isinstance(raw, dict) or len(raw) == 0:
-            if _gist_is_configured():
-                try:
-                    gid = _gist_id()
-                    resp = requests.get(f"{_GIST_API}/{gid}",
-                                        headers=_gist_headers(), timeout=15)
-                    resp.raise_for_status()
-                    fname = f"vivino_{slug}.json"
-                    fdata = resp.json().get("files", {}).get(fname, {})
-                    content = fdata.get("content", "")
-                    if content:
-                        gist_raw = json.loads(content)
-                        if isinstance(gist_raw, dict) and len(gist_raw) > 0:
-                            import logging
-                            logging.warning(f"[ScoreMaster] load_vivino_cache({slug}): "
-                                            f"restauration depuis Gist ({len(gist_raw)} entrées)")
-                            p.write_text(content, "utf-8")
-                            _invalidate_mem_cache(p)
-                            raw = gist_raw
-                except Exception:
-                    pass
-
-    if not isinstance(raw, dict):
-        return {}
+                                    f"restauration depuis Gist ({len(raw)} entrées)")
+        except Exception:
+            pass
 
     ttl_secs = VIVINO_CACHE_TTL_DAYS * 86400
     now = time.time()
@@ -1099,66 +1530,39 @@ def load_vivino_cache(slug: str = "vins-rouges") -> dict:
 
 def save_vivino_cache(cache: dict, slug: str = "vins-rouges",
                       _force_gist: bool = False) -> None:
-    """Sauvegarde le cache Vivino de façon sécurisée.
+    """Sauvegarde le cache Vivino dans SQLite (upsert des seules entrées modifiées).
 
     Protections :
-    - Écriture atomique via .tmp → rename
-    - Backup .bak du fichier existant avant écrasement
-    - Guard anti-régression : refuse d'écraser si len(cache) < 50% du fichier existant
+    - Transaction unique : tout ou rien
+    - Guard anti-régression : refuse d'écraser si len(cache) < 50% des entrées existantes
       (protège contre l'écrasement accidentel avec un dict vide ou partiel)
-    - _force_gist=True : bypass le throttle 30s pour forcer le push final
+    - _force_gist=True : bypass le throttle pour forcer le push final
     """
-    p   = _viv_path(slug)
-    tmp = p.with_suffix(".tmp")
-    bak = p.with_suffix(".bak")
-
-    # ── Guard anti-régression ─────────────────────────────────────────────
-    if p.exists():
-        try:
-            _existing = json.loads(p.read_text("utf-8"))
-            n_existing = len(_existing) if isinstance(_existing, dict) else 0
-        except Exception:
-            n_existing = 0  # fichier illisible → on laisse l'écrasement
+    n_existing = _store_count("vivino", slug)
 
-        # Refus absolu : ne jamais écraser avec un dict vide
-        if n_existing > 0 and len(cache) == 0:
-            import logging
-            logging.warning(f"[ScoreMaster] save_vivino_cache({slug}): refus d'écraser "
-                            f"{p.name} ({n_existing} entrées) avec un dict vide.")
-            return
+    # Refus absolu : ne jamais écraser avec un dict vide
+    if n_existing > 0 and len(cache) == 0:
+        import logging
+        logging.warning(f"[ScoreMaster] save_vivino_cache({slug}): refus d'écraser "
+                        f"{n_existing} entrées avec un dict vide.")
+        return
 
-        # Refus si régression > 50% (sauf si le cache existant est lui-même très petit)
-        if n_existing >= 3 and len(cache) < n_existing // 2:
-            import logging
-            logging.warning(
-                f"[ScoreMaster] save_vivino_cache({slug}): refus d'écraser "
-                f"{p.name} ({n_existing} entrées) avec {len(cache)} entrées "
-                f"(< 50% — probable corruption). Sauvegarde annulée."
-            )
-            return
+    # Refus si régression > 50% (sauf si le cache existant est lui-même très petit)
+    if n_existing >= 3 and len(cache) < n_existing // 2:
+        import logging
+        logging.warning(
+            f"[ScoreMaster] save_vivino_cache({slug}): refus d'écraser "
+            f"{n_existing} entrées avec {len(cache)} entrées "
+            f"(< 50% — probable corruption). Sauvegarde annulée."
+        )
+        return
 
-    try:
-        data_str = json.dumps(cache, ensure_ascii=False, indent=2)
-        # Backup atomique du fichier existant
-        if p.exists():
-            try:
-                import shutil
-                shutil.copy2(p, bak)
-            except Exception:
-                pass
-        tmp.write_text(data_str, "utf-8")
-        tmp.replace(p)
-        _invalidate_mem_cache(p)
-        if _force_gist:
-            # Push immédiat bypass throttle (fin de scraping)
-            threading.Thread(
-                target=gist_push, args=(p.name, data_str), daemon=True
-            ).start()
-        else:
-            _gist_push_async(p.name, data_str)
-    except Exception:
-        tmp.unlink(missing_ok=True)
-        raise
+    # _stale est recalculé à chaque chargement : ne pas le persister (sinon
+    # toutes les lignes « changent » quand le TTL est franchi)
+    rows = {k: {f: x for f, x in v.items() if f != "_stale"} for k, v in cache.items()}
+    changed = _store_save("vivino", slug, rows)
+    if changed or _force_gist:
+        _gist_push_async(_viv_path(slug).name, force=_force_gist)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1175,19 +1579,20 @@ REJECTION_REASONS = {
 
 def load_vivino_rejections() -> dict:
     """Charge le log des rejets. Structure : {query → {rejected_urls: [...], history: [...]}}"""
-    if not REJECTION_LOG_PATH.exists():
-        return {}
     try:
-        raw = json.loads(REJECTION_LOG_PATH.read_text("utf-8"))
-        return raw if isinstance(raw, dict) else {}
+        return _store_load("rejections")
     except Exception:
         return {}
 
+def clear_vivino_rejections() -> None:
+    _store_clear("rejections")
+    _gist_push_async(REJECTION_LOG_PATH.name, "{}", force=True)
+
 def save_vivino_rejection(wine_name: str, query: str, rejected_url: str,
                           rejected_title: str, reason: str) -> None:
     """Enregistre un rejet et met à jour l'index des URLs rejetées pour ce vin."""
     data = load_vivino_rejections()
-    entry = data.setdefault(query, {"rejected_urls": [], "history": []})
+    entry = json.loads(json.dumps(data.get(query) or {"rejected_urls": [], "history": []}))
     # Ajouter l'URL à la liste noire si pas déjà présente
     if rejected_url and rejected_url not in entry["rejected_urls"]:
         entry["rejected_urls"].append(rejected_url)
@@ -1209,12 +1614,8 @@ def save_vivino_rejection(wine_name: str, query: str, rejected_url: str,
         or len(entry["rejected_urls"]) >= 3
     )
     try:
-        tmp = REJECTION_LOG_PATH.with_suffix(".tmp")
-        data_str = json.dumps(data, ensure_ascii=False, indent=2)
-        tmp.write_text(data_str, "utf-8")
-        tmp.replace(REJECTION_LOG_PATH)
-        _invalidate_mem_cache(REJECTION_LOG_PATH)
-        _gist_push_async(REJECTION_LOG_PATH.name, data_str)  # persistance cloud
+        _store_upsert("rejections", "", query, entry)   # une seule ligne écrite
+        _gist_push_async(REJECTION_LOG_PATH.name)       # persistance cloud
     except Exception:
         pass
 
@@ -1231,33 +1632,70 @@ def is_hard_to_match(query: str, rejections: dict) -> bool:
 # CHECKPOINT
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _ckpt_path(slug: str) -> Path: return CACHE_DIR / f"vivino_ckpt_{slug}.json"
+# Journal append-only : 1re ligne = en-tête JSON (slug, started_at, total),
+# puis un EAN (ou clé de requête) par ligne. Un flush = un append + fsync,
+# O(lot) quelle que soit l'avancée du run ; la reprise rejoue le journal.
+def _ckpt_path(slug: str) -> Path: return CACHE_DIR / f"vivino_ckpt_{slug}.jsonl"
+def _ckpt_legacy_path(slug: str) -> Path: return CACHE_DIR / f"vivino_ckpt_{slug}.json"
 
 # Buffer pour ckpt_tick : accumule les EANs, flush toutes les 3s
 _ckpt_pending:    dict  = {}   # slug -> [ean, ...]
 _ckpt_last_flush: dict  = {}   # slug -> timestamp
 _CKPT_FLUSH_INTERVAL    = 3.0  # secondes
 
-def ckpt_load(slug: str) -> dict | None:
+def _ckpt_write(p: Path, header: dict, eans) -> None:
+    """Réécrit atomiquement un journal (création, compaction)."""
+    import os
+    tmp = p.with_suffix(".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            f.writelines(f"{e}\n" for e in eans)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(p)
+    except Exception: tmp.unlink(missing_ok=True); raise
+
+def _ckpt_replay(slug: str) -> tuple[dict, list, bool] | None:
+    """
+    Relit le journal : (en-tête, EANs dédupliqués dans l'ordre, compaction utile).
+    Une dernière ligne sans \\n (crash pendant un append) est ignorée.
+    """
     p = _ckpt_path(slug)
-    if not p.exists(): return None
+    if not p.exists():
+        legacy = _ckpt_legacy_path(slug)   # ancien format JSON monobloc
+        if not legacy.exists(): return None
+        d = json.loads(legacy.read_text("utf-8"))
+        eans = list(dict.fromkeys(d.pop("done_eans", [])))
+        _ckpt_write(p, d, eans)
+        legacy.unlink(missing_ok=True)
+        return d, eans, False
+    raw = p.read_text("utf-8")
+    lines = raw.split("\n")
+    torn = not raw.endswith("\n")
+    lines = lines[:-1]                     # dernier fragment : vide, ou ligne tronquée
+    if not lines: return None
+    header = json.loads(lines[0])
+    eans = list(dict.fromkeys(l for l in lines[1:] if l))
+    return header, eans, torn or len(eans) < len(lines) - 1
+
+def ckpt_load(slug: str) -> dict | None:
     try:
-        d = json.loads(p.read_text("utf-8"))
-        if d.get("finished"): p.unlink(missing_ok=True); return None
-        if time.time() - d.get("started_at", 0) > 86400: p.unlink(missing_ok=True); return None
-        return d
+        r = _ckpt_replay(slug)
+        if r is None: return None
+        d, eans, dirty = r
+        if d.get("finished") or time.time() - d.get("started_at", 0) > 86400:
+            _ckpt_path(slug).unlink(missing_ok=True); return None
+        if dirty:
+            _ckpt_write(_ckpt_path(slug), d, eans)   # répare une ligne tronquée / doublons
+        return {**d, "done_eans": eans}
     except Exception: return None
 
 def ckpt_create(slug: str, total: int) -> None:
     # ⑥ CORRIGÉ : nettoyage explicite de l'ancien checkpoint avant création
     ckpt_finish(slug)
-    p, tmp = _ckpt_path(slug), _ckpt_path(slug).with_suffix(".tmp")
-    try:
-        tmp.write_text(json.dumps({"slug": slug, "started_at": time.time(),
-            "total": total, "done_eans": [], "finished": False},
-            ensure_ascii=False), "utf-8")
-        tmp.replace(p)
-    except Exception: tmp.unlink(missing_ok=True); raise
+    _ckpt_write(_ckpt_path(slug), {"slug": slug, "started_at": time.time(),
+                                   "total": total, "finished": False}, [])
 
 def ckpt_tick(slug: str, ean: str) -> None:
     """
@@ -1271,7 +1709,8 @@ def ckpt_tick(slug: str, ean: str) -> None:
         _flush_ckpt(slug)
 
 def _flush_ckpt(slug: str) -> None:
-    """Écrit en une seule passe tous les EANs accumulés depuis le dernier flush."""
+    """Ajoute en fin de journal tous les EANs accumulés depuis le dernier flush (append + fsync)."""
+    import os
     global _ckpt_pending, _ckpt_last_flush
     pending = _ckpt_pending.get(slug, [])
     if not pending:
@@ -1283,11 +1722,10 @@ def _flush_ckpt(slug: str) -> None:
         _ckpt_last_flush[slug] = time.time()
         return
     try:
-        d = json.loads(p.read_text("utf-8"))
-        d["done_eans"].extend(pending)
-        tmp = p.with_suffix(".tmp")
-        tmp.write_text(json.dumps(d, ensure_ascii=False), "utf-8")
-        tmp.replace(p)
+        with open(p, "a", encoding="utf-8") as f:
+            f.write("".join(f"{e}\n" for e in pending))
+            f.flush()
+            os.fsync(f.fileno())
         # Fix 3 : on ne vide pending QUE si l'écriture a réussi
         _ckpt_pending[slug] = []
         _ckpt_last_flush[slug] = time.time()
@@ -1295,11 +1733,22 @@ def _flush_ckpt(slug: str) -> None:
         # Échec d'écriture → on conserve pending pour réessayer au prochain tick
         pass
 
+def ckpt_compact(slug: str) -> None:
+    """Fin de run interrompu : flush puis réécriture compacte (doublons, ligne tronquée)."""
+    _flush_ckpt(slug)
+    try:
+        r = _ckpt_replay(slug)
+        if r and r[2]:
+            _ckpt_write(_ckpt_path(slug), r[0], r[1])
+    except Exception:
+        pass
+
 def ckpt_finish(slug: str) -> None:
     # Flush les EANs en attente avant de marquer terminé
     _flush_ckpt(slug)
     _ckpt_path(slug).unlink(missing_ok=True)
     _ckpt_path(slug).with_suffix(".tmp").unlink(missing_ok=True)
+    _ckpt_legacy_path(slug).unlink(missing_ok=True)
 
 
 _job_lock = threading.Lock()
@@ -1406,6 +1855,8 @@ def _background_job(slug: str, mode: str) -> None:
             raw = run_refresh_vivino(slug, resume=True, log=_log)
         elif mode == "refresh_stale":
             raw = run_refresh_stale_vivino(slug, log=_log)
+        elif mode == "rematch":
+            raw = run_rematch_vivino(slug, log=_log)
         else:
             raise ValueError(f"Mode inconnu: {mode}")
 
@@ -1443,31 +1894,28 @@ def start_background_job(slug: str, mode: str) -> bool:
 def _price_hist_path() -> Path: return CACHE_DIR / "price_history.json"
 
 def load_price_history() -> dict:
-    p = _price_hist_path()
-    data = _read_json_cached(p, ttl=60.0)   # TTL 60s — l'historique change peu souvent
-    return data if isinstance(data, dict) else {}
+    try:
+        return _store_load("price_history")
+    except Exception:
+        return {}
 
 def save_price_history(hist: dict) -> None:
-    p, tmp = _price_hist_path(), _price_hist_path().with_suffix(".tmp")
     try:
-        data_str = json.dumps(hist, ensure_ascii=False, indent=2)
-        tmp.write_text(data_str, "utf-8")
-        tmp.replace(p)
-        _invalidate_mem_cache(p)            # cohérence du cache mémoire
-        _gist_push_async(p.name, data_str)  # persistance cloud
-    except Exception: tmp.unlink(missing_ok=True)
+        if _store_save("price_history", "", hist):       # seuls les EAN modifiés
+            _gist_push_async(_price_hist_path().name)    # persistance cloud
+    except Exception:
+        pass
 
 def update_price_history(wines: list) -> None:
-    hist  = load_price_history()
+    hist  = dict(load_price_history())   # vue partagée du store : copier, ne pas modifier
     today = datetime.now().strftime("%Y-%m-%d")
     for w in wines:
         ean = w.get("ean")
         if not ean or not w.get("price"): continue
-        entry = hist.setdefault(ean, {"name": w["name"], "history": []})
-        entry["name"] = w["name"]
+        entry = dict(hist.get(ean) or {"history": []}, name=w["name"])
         if not entry["history"] or entry["history"][-1]["date"] != today:
-            entry["history"].append({"date": today, "price": w["price"]})
-            entry["history"] = entry["history"][-10:]
+            entry["history"] = (entry["history"] + [{"date": today, "price": w["price"]}])[-10:]
+        hist[ean] = entry
     save_price_history(hist)
 
 def price_trend(ean: str, current_price: float, ph: dict) -> str:
@@ -1551,6 +1999,7 @@ _REGIONS = [
     "Pays d'Oc","Vin de France",
 ]
 
+@lru_cache(maxsize=16384)
 def _norm_ascii(s: str) -> str:
     """Normalise une chaîne en ASCII lowercase (accents supprimés)."""
     return unicodedata.normalize("NFD", s).encode("ascii", "ignore").decode().lower()
@@ -1589,6 +2038,7 @@ def _fuzzy_match(query: str, target: str) -> bool:
 # Précompilation des régions normalisées — calculé 1× au démarrage, pas à chaque appel
 _REGIONS_NORM: list[tuple[str, str]] = [(r, _norm_ascii(r)) for r in _REGIONS]
 
+@lru_cache(maxsize=16384)
 def extract_region(wine_name: str) -> str:
     m = _REGION_AOP_RE.search(wine_name)
     if m:
@@ -1627,51 +2077,485 @@ _VIVINO_FIELDS: tuple = (
 # Champs numériques qui valent 0 (pas None) par défaut dans les resets suppressed/defaults
 _VIVINO_COUNT_FIELDS = frozenset({"ratings_count", "ratings_count_all"})
 
-def _merge_vivino(wines: list, vc: dict, ph: dict | None = None) -> list:
+# ── Table de vins en colonnes ───────────────────────────────────────────────
+# Le catalogue fusionné est stocké colonne par colonne : numériques dans des
+# array typés (None = NaN / sentinelle), chaînes internées, listes de cépages
+# en tuples partagés. Les lignes sont des vues Mapping en lecture seule
+# (w["name"], w.get("rating"), {**w}, dict(w)) : aucun dict par vin.
+_ABSENT    = object()        # clé absente pour ce vin (colonnes objet)
+_INT_NONE  = -(1 << 63)      # None dans une colonne entière
+_COL_FLOAT = frozenset({"price", "rating", "match_confidence", "score", "ratio",
+                        "acidity", "tannin", "sweetness", "body", "volume_cl"})
+_COL_INT   = frozenset({"ratings_count", "ratings_count_all", "vintage", "vivino_year"})
+_COL_BOOL  = frozenset({"vintage_match", "available", "is_natural"})
+_INTERNED_SEQS: dict = {}    # tuple de chaînes → instance partagée (cépages, hints)
+
+
+def _intern_value(v):
+    if type(v) is str:
+        return sys.intern(v)
+    if type(v) in (list, tuple) and all(type(x) is str for x in v):
+        t = tuple(sys.intern(x) for x in v)
+        if len(_INTERNED_SEQS) > 50000:
+            _INTERNED_SEQS.clear()
+        return _INTERNED_SEQS.setdefault(t, t)
+    return v
+
+
+def _pack_column(key: str, values: list) -> tuple:
+    """(type, données) : "f"/"i"/"b" si toutes les valeurs s'y prêtent exactement, sinon "o"."""
+    if key in _COL_FLOAT and all(v is None or type(v) is float for v in values):
+        return "f", array("d", (math.nan if v is None else v for v in values))
+    if key in _COL_INT and all(v is None or type(v) is int for v in values):
+        return "i", array("q", (_INT_NONE if v is None else v for v in values))
+    if key in _COL_BOOL and all(v is None or v is True or v is False for v in values):
+        return "b", array("b", (-1 if v is None else int(v) for v in values))
+    return "o", [_intern_value(v) for v in values]
+
+
+_BOOL3 = (None, False, True)
+
+
+class WineRow(Mapping):
+    """Vue d'un vin dans une WineTable (lecture seule, interface dict)."""
+    __slots__ = ("_t", "_i")
+
+    def __init__(self, table: "WineTable", i: int):
+        self._t, self._i = table, i
+
+    def _value(self, key):
+        col = self._t._cols.get(key)
+        if col is None:
+            return _ABSENT
+        kind, data = col
+        v = data[self._i]
+        if kind == "o": return v
+        if kind == "f": return None if v != v else v
+        if kind == "i": return None if v == _INT_NONE else v
+        return _BOOL3[v + 1]
+
+    def __getitem__(self, key):
+        v = self._value(key)
+        if v is _ABSENT:
+            raise KeyError(key)
+        return v
+
+    def get(self, key, default=None):
+        v = self._value(key)
+        return default if v is _ABSENT else v
+
+    def __contains__(self, key):
+        return self._value(key) is not _ABSENT
+
+    def __iter__(self):
+        i = self._i
+        for k, (kind, data) in self._t._cols.items():
+            if kind != "o" or data[i] is not _ABSENT:
+                yield k
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, WineRow) and other._t is self._t:
+            return other._i == self._i
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self._t), self._i))
+
+    def __repr__(self):
+        return f"WineRow({dict(self)!r})"
+
+
+class WineTable(Sequence):
+    """Catalogue fusionné en colonnes ; itère des WineRow (une par vin, créées une fois)."""
+
+    # Au-delà de cette part de vins modifiés, re-trier plutôt qu'insérer
+    _REORDER_MAX_FRACTION = 0.05
+
+    def __init__(self, columns: dict[str, list], n: int):
+        self.version = None   # catalogue_version() au moment de la fusion
+        self.prev    = None   # table de la version précédente (ordres réutilisables)
+        self._orders: dict[str, tuple[np.ndarray, np.ndarray]] = {}   # tri → (permutation, clés)
+        self._n    = n
+        self._cols = {k: _pack_column(k, v) for k, v in columns.items()}
+        self._rows = tuple(WineRow(self, i) for i in range(n))
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        return self._rows[i]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def column(self, key: str):
+        """Colonne brute (array typé ou liste) — None si le champ n'existe pas."""
+        col = self._cols.get(key)
+        return col[1] if col else None
+
+    def search(self, query: str) -> np.ndarray:
+        """Masque booléen des vins dont le nom ou la région matche (cf. _SearchIndex)."""
+        idx = self.__dict__.get("_search_index")
+        if idx is None:
+            regions = self.column("region") or [""] * self._n
+            idx = self._search_index = _SearchIndex(self.column("name"),
+                                                     [r or "" for r in regions])
+        return idx.match(query)
+
+    def _sort_keys(self, label: str) -> np.ndarray:
+        """Clés de tri (n × critères) équivalentes à SORTS[label]."""
+        out = []
+        for field, sign, empty in _SORT_KEYS[label]:
+            v = np.nan_to_num(_float_column(self, field), nan=0.0)
+            v[v == 0] = empty
+            out.append(sign * v)
+        return np.column_stack(out) if out else np.zeros((self._n, 0))
+
+    def order(self, label: str) -> np.ndarray:
+        """
+        Permutation des vins selon SORTS[label], calculée 1× par version.
+        Si la version précédente (même liste de vins) l'avait déjà, seuls
+        les vins dont les clés ont changé sont retirés puis réinsérés par
+        recherche dichotomique — pas de tri complet à chaque vin Vivino.
+        """
+        hit = self._orders.get(label)
+        if hit is not None:
+            return hit[0]
+        keys = self._sort_keys(label)
+        order = None
+        prev = self.prev
+        if prev is not None and label in prev._orders and prev._n == self._n \
+                and prev.column("name") == self.column("name"):
+            p_order, p_keys = prev._orders[label]
+            changed = np.flatnonzero((p_keys != keys).any(axis=1))
+            if len(changed) <= self._REORDER_MAX_FRACTION * self._n:
+                order = p_order
+                if len(changed):
+                    gone = np.zeros(self._n, dtype=bool)
+                    gone[changed] = True
+                    rest = p_order[~gone[p_order]]
+                    by = lambda i: (*keys[i].tolist(), int(i))   # clé seulement des vins comparés
+                    moved = sorted(changed.tolist(), key=by)
+                    pos = [bisect.bisect_left(rest, by(i), key=by) for i in moved]
+                    order = np.insert(rest, pos, moved).astype(np.int32, copy=False)
+        if order is None:
+            order = np.lexsort(keys.T[::-1]).astype(np.int32)
+        order.flags.writeable = False
+        self._orders[label] = (order, keys)
+        return order
+
+    def sorted_rows(self, label: str, mask: np.ndarray | None = None) -> list:
+        """Vins triés selon SORTS[label], restreints au masque de filtre s'il est donné."""
+        order = self.order(label)
+        if mask is not None:
+            order = order[mask[order]]
+        rows = self._rows
+        return [rows[i] for i in order.tolist()]
+
+    def facets(self) -> "_FacetIndex":
+        """Index de facettes des filtres latéraux (construit 1× par version de catalogue)."""
+        fx = self.__dict__.get("_facet_index")
+        if fx is None:
+            fx = self._facet_index = _FacetIndex(self)
+        return fx
+
+
+def _bigrams(s: str) -> set:
+    return {s[i:i+2] for i in range(len(s) - 1)}
+
+
+class _SearchIndex:
+    """
+    Index inversé de la recherche latérale : mêmes résultats que
+    _fuzzy_match(q, nom) or _fuzzy_match(q, région) pour chaque vin, obtenus par
+    intersection de listes de postings puis vérification sur les seuls candidats.
+      • textes distincts normalisés 1× (noms + régions)
+      • postings caractères / bigrammes bruts → règles 1 (sous-chaîne) et 2 (tous les mots)
+      • postings bigrammes alphabétiques (np) → règle 3 (≥ 70 % des bigrammes)
+    Résultats mis en cache par chaîne de recherche.
+    """
+    _CACHE_MAX = 512
+
+    def __init__(self, names: list, regions: list):
+        doc_of: dict[str, int] = {}
+        def _doc(text):
+            d = doc_of.get(text)
+            if d is None:
+                d = doc_of[text] = len(doc_of)
+            return d
+        self._row_name   = np.fromiter((_doc(x) for x in names), dtype=np.int32, count=len(names))
+        self._row_region = np.fromiter((_doc(x) for x in regions), dtype=np.int32, count=len(regions))
+        texts = list(doc_of)
+        self._t  = [_norm_ascii(x) for x in texts]
+        self._tw = [_NON_ALPHANUM_RE.sub(" ", t) for t in self._t]
+        grams: dict[str, set] = {}
+        alpha: dict[str, list] = {}
+        for d, t in enumerate(self._t):
+            for g in set(t) | _bigrams(t):
+                grams.setdefault(g, set()).add(d)
+            for g in _bigrams(_NONALPHA_RE.sub("", t)):
+                alpha.setdefault(g, []).append(d)
+        self._grams = grams
+        self._alpha = {g: np.array(ds, dtype=np.int32) for g, ds in alpha.items()}
+        self._n_docs = len(texts)
+        self._cache: dict[str, np.ndarray] = {}
+
+    def _candidates(self, s: str) -> set:
+        """Documents contenant tous les caractères/bigrammes de s (sur-ensemble de `s in t`)."""
+        keys = _bigrams(s) if len(s) > 1 else {s}
+        posts = sorted((self._grams.get(g, set()) for g in keys), key=len)
+        return set.intersection(*posts) if posts else set()
+
+    def _match_docs(self, q: str) -> np.ndarray:
+        hit = np.zeros(self._n_docs, dtype=bool)
+        # 1. Sous-chaîne directe
+        for d in self._candidates(q):
+            if q in self._t[d]:
+                hit[d] = True
+        # 2. Tous les mots présents (sous-chaînes de la version sans ponctuation)
+        words = q.split()
+        if len(words) > 1:
+            cands = set.intersection(*(self._candidates(w) for w in words))
+            for d in cands:
+                if not hit[d] and all(w in self._tw[d] for w in words):
+                    hit[d] = True
+        # 3. Bigrammes alphabétiques : ≥ 70 % de ceux de la query
+        if len(q) >= 5:
+            bq = _bigrams(_NONALPHA_RE.sub("", q))
+            posts = [self._alpha[g] for g in bq if g in self._alpha]
+            if bq and posts:
+                counts = np.bincount(np.concatenate(posts), minlength=self._n_docs)
+                hit |= counts / len(bq) >= 0.70
+        return hit
+
+    def match(self, query: str) -> np.ndarray:
+        """Masque booléen par vin (lecture seule, partagé via le cache)."""
+        mask = self._cache.get(query)
+        if mask is not None:
+            return mask
+        q = _norm_ascii(query.strip())
+        if not q:
+            mask = np.ones(len(self._row_name), dtype=bool)
+        else:
+            hit = self._match_docs(q)
+            mask = hit[self._row_name] | hit[self._row_region]
+        mask.flags.writeable = False
+        if len(self._cache) >= self._CACHE_MAX:
+            try: self._cache.pop(next(iter(self._cache)), None)   # plus ancienne requête
+            except (StopIteration, RuntimeError): pass
+        self._cache[query] = mask
+        return mask
+
+
+def _is_wine_table(wines) -> bool:
+    """WineTable, y compris construite par un rerun précédent (classe recréée à chaque exécution)."""
+    return type(wines).__name__ == "WineTable"
+
+
+def search_mask(wines, query: str):
+    """Masque de recherche pour `wines` (WineTable indexée, sinon _fuzzy_match), None si vide."""
+    if not query:
+        return None
+    if _is_wine_table(wines):
+        return wines.search(query)
+    return [_fuzzy_match(query, w["name"]) or _fuzzy_match(query, w.get("region") or "")
+            for w in wines]
+
+
+# ── Facettes des filtres ────────────────────────────────────────────────────
+def _float_column(table: "WineTable", key: str) -> np.ndarray:
+    """Colonne numérique en float64 (None / non numérique → NaN)."""
+    col = table._cols.get(key)
+    if col and col[0] == "f":
+        return np.frombuffer(col[1], dtype=np.float64).copy()
+    return np.array([v if type(v) in (int, float) else math.nan
+                     for v in (w.get(key) for w in table)], dtype=np.float64)
+
+
+def _truth_column(table: "WineTable", key: str, default, strict: bool = False) -> np.ndarray:
+    """Masque bool de w.get(key, default) (strict : `is True`, sinon valeur de vérité)."""
+    col = table._cols.get(key)
+    if col and col[0] == "b":
+        return np.frombuffer(col[1], dtype=np.int8) == 1
+    vals = (w.get(key, default) for w in table)
+    if strict:
+        return np.fromiter((v is True for v in vals), dtype=bool, count=len(table))
+    return np.fromiter((bool(v) for v in vals), dtype=bool, count=len(table))
+
+
+class _FacetIndex:
+    """
+    Facettes précalculées d'une WineTable pour les filtres latéraux :
+      • masques bool (bitsets) disponibilité / millésime confirmé
+      • codes région par vin + postings cépage → OR des valeurs choisies
+      • prix et note triés (argsort) → plages par np.searchsorted
+    Un filtre = ET de masques ; les comptes par facette sous le filtre
+    courant sont un np.bincount sur les vins retenus.
+    Mêmes sémantiques que l'ancienne compréhension de liste (prix `or 0`,
+    note vraie et ≥ min, available par défaut True, vintage_match `is True`).
+    """
+
+    def __init__(self, table: "WineTable"):
+        n = self.n = len(table)
+        price = np.nan_to_num(_float_column(table, "price"), nan=0.0)
+        self.price_max = float(price.max()) if n else 0.0
+        self._price_order  = np.argsort(price, kind="stable")
+        self._price_sorted = price[self._price_order]
+        rating = _float_column(table, "rating")
+        rating[np.isnan(rating) | (rating == 0)] = -np.inf
+        self._rating_order  = np.argsort(rating, kind="stable")
+        self._rating_sorted = rating[self._rating_order]
+        self.available     = _truth_column(table, "available", True)
+        self.vintage_match = _truth_column(table, "vintage_match", None, strict=True)
+        for m in (self.available, self.vintage_match):
+            m.flags.writeable = False
+        # Région : un code par vin (None et "" inclus, jamais sélectionnables)
+        region_code: dict = {}
+        self._region = np.fromiter(
+            (region_code.setdefault(w.get("region", ""), len(region_code)) for w in table),
+            dtype=np.int32, count=n)
+        self._region_code   = region_code
+        self._region_labels = list(region_code)
+        self.region_options = sorted({
+            r for w in table if (r := w.get("region") or extract_region(w["name"]))
+        })
+        # Cépages : paires (vin, cépage) → postings par cépage
+        grape_code: dict = {}
+        pair_row, pair_grape = [], []
+        for i, w in enumerate(table):
+            for g in set(w.get("grapes") or ()):
+                pair_row.append(i)
+                pair_grape.append(grape_code.setdefault(g, len(grape_code)))
+        self._pair_row   = np.array(pair_row, dtype=np.int32)
+        self._pair_grape = np.array(pair_grape, dtype=np.int32)
+        self._grape_code   = grape_code
+        self._grape_labels = list(grape_code)
+        self._grape_rows = [self._pair_row[self._pair_grape == c] for c in range(len(grape_code))]
+        self.grape_options = sorted(g for g in grape_code if g)
+
+    def _range(self, order: np.ndarray, values: np.ndarray, lo=None, hi=None) -> np.ndarray:
+        a = 0 if lo is None else int(np.searchsorted(values, lo, "left"))
+        b = self.n if hi is None else int(np.searchsorted(values, hi, "right"))
+        m = np.zeros(self.n, dtype=bool)
+        m[order[a:b]] = True
+        return m
+
+    def mask(self, price_range=None, rating_min: float = 0, only_vintage: bool = False,
+             only_dispo: bool = False, regions=(), grapes=()) -> np.ndarray:
+        """Masque des vins retenus par les filtres latéraux (hors recherche)."""
+        m = np.ones(self.n, dtype=bool)
+        if price_range is not None:
+            m &= self._range(self._price_order, self._price_sorted, *price_range)
+        if rating_min:
+            m &= self._range(self._rating_order, self._rating_sorted, lo=rating_min)
+        if only_vintage:
+            m &= self.vintage_match
+        if only_dispo:
+            m &= self.available
+        if regions:
+            codes = [self._region_code[r] for r in regions if r in self._region_code]
+            m &= np.isin(self._region, codes)
+        if grapes:
+            g = np.zeros(self.n, dtype=bool)
+            for x in grapes:
+                c = self._grape_code.get(x)
+                if c is not None:
+                    g[self._grape_rows[c]] = True
+            m &= g
+        return m
+
+    def region_counts(self, mask: np.ndarray) -> dict:
+        """Nombre de vins par région parmi ceux du masque (régions absentes omises)."""
+        counts = np.bincount(self._region[mask], minlength=len(self._region_labels))
+        return {r: int(c) for r, c in zip(self._region_labels, counts) if c}
+
+    def grape_counts(self, mask: np.ndarray) -> dict:
+        """Nombre de vins par cépage parmi ceux du masque."""
+        counts = np.bincount(self._pair_grape[mask[self._pair_row]],
+                             minlength=len(self._grape_labels))
+        return {g: int(c) for g, c in zip(self._grape_labels, counts) if c}
+
+
+def filter_wines(wines, search: str = "", price_range=None, rating_min: float = 0,
+                 only_vintage: bool = False, only_dispo: bool = False,
+                 regions=(), grapes=()) -> tuple[list, "np.ndarray | None"]:
+    """
+    Applique les filtres latéraux. Retourne (vins retenus, masque) — le masque
+    (None pour une simple liste) sert aux comptes par facette.
+    """
+    hits = search_mask(wines, search)
+    if _is_wine_table(wines):
+        m = wines.facets().mask(price_range, rating_min, only_vintage, only_dispo, regions, grapes)
+        if hits is not None:
+            m &= hits
+        return [wines[i] for i in np.flatnonzero(m)], m
+    lo, hi = price_range if price_range is not None else (-math.inf, math.inf)
+    return [w for i, w in enumerate(wines)
+        if lo <= (w.get("price") or 0) <= hi
+        and (rating_min == 0 or (w.get("rating") and w["rating"] >= rating_min))
+        and (hits is None or hits[i])
+        and (not only_vintage or w.get("vintage_match") is True)
+        and (not only_dispo or w.get("available", True))
+        and (not regions or w.get("region","") in regions)
+        and (not grapes or any(g in (w.get("grapes") or []) for g in grapes))], None
+
+
+def _vivino_default(f: str):
+    return [] if f == "grapes" else (0 if f in _VIVINO_COUNT_FIELDS else None)
+
+
+def _merge_vivino(wines: list, vc: dict, ph: dict | None = None) -> WineTable:
     """
     Injecte données Vivino + calcule score/région/tendance prix.
-    Retourne une NOUVELLE liste de copies de dicts pour éviter de muter
-    les objets stockés dans st.session_state entre les reruns Streamlit.
+    Retourne une NOUVELLE WineTable (jointure colonne par colonne, sans copie
+    de dict par vin) : les objets en st.session_state ne sont jamais mutés
+    entre les reruns Streamlit.
     Nouvelles données propagées : winery, vivino_region, grapes, style_name,
     is_natural, acidity, tannin, sweetness, body, ratings_count_all
     """
     if ph is None: ph = {}
-    # Pré-calculer build_query 1× par vin (évite N appels répétés lors des reruns)
-    _bq_cache: dict[str, str] = {}
-    def _bq(name):
-        if name not in _bq_cache:
-            _bq_cache[name] = build_query(name)
-        return _bq_cache[name]
-
-    result = []
+    n = len(wines)
+    # Colonnes Leclerc (ordre d'apparition des champs)
+    fields: dict[str, None] = {}
     for w in wines:
-        w = dict(w)
-        key = _bq(w["name"])
-        cv  = vc.get(key, {})
-        w.setdefault("available", True)
-        if cv.get("suppressed"):
-            for f in _VIVINO_FIELDS:
-                w[f] = [] if f == "grapes" else (0 if f in _VIVINO_COUNT_FIELDS else None)
-            w["vivino_url"] = ""
-        elif cv.get("rating") is not None or cv.get("vivino_url"):
-            for f in _VIVINO_FIELDS:
-                if f in cv:
-                    w[f] = cv[f]
-        # Defaults pour les champs manquants
-        for f in _VIVINO_FIELDS:
-            if f not in w:
-                w[f] = [] if f == "grapes" else (0 if f in _VIVINO_COUNT_FIELDS else None)
-        w.setdefault("vivino_url", "")
-        w["score"]       = compute_score(w.get("rating"), w.get("ratings_count"),
-                                          w.get("price"), w.get("vintage_match"))
-        # Région : préférer la région Vivino (plus précise) si disponible
-        w["region"]      = w.get("vivino_region") or extract_region(w["name"])
-        w["price_trend"] = price_trend(w.get("ean",""), w.get("price") or 0, ph) if w.get("price") else ""
-        # Propager grapes_hint si Vivino n'en a pas
-        if not w.get("grapes") and w.get("grapes_hint"):
-            w["grapes"] = [g.title() for g in w["grapes_hint"]]
-        result.append(w)
-    return result
+        fields.update(dict.fromkeys(w))
+    cols: dict[str, list] = {f: [w.get(f, _ABSENT) for w in wines] for f in fields}
+
+    # Jointure Vivino : 1 lookup par vin (build_query mémoïsé par nom)
+    _bq_cache: dict[str, str] = {}
+    cvs = []
+    for name in cols["name"]:
+        key = _bq_cache.get(name)
+        if key is None:
+            key = _bq_cache[name] = build_query(name)
+        cvs.append(vc.get(key, {}))
+    suppressed = [bool(cv.get("suppressed")) for cv in cvs]
+    has_data   = [cv.get("rating") is not None or bool(cv.get("vivino_url")) for cv in cvs]
+    for f in _VIVINO_FIELDS:
+        base = cols.get(f) or [_ABSENT] * n
+        d_sup = "" if f == "vivino_url" else _vivino_default(f)
+        d     = _vivino_default(f)   # grapes : [] → tuple vide interné au packing
+        cols[f] = [d_sup if sup else (cv[f] if has and f in cv else (d if b is _ABSENT else b))
+                   for sup, has, cv, b in zip(suppressed, has_data, cvs, base)]
+
+    cols["available"] = [True if v is _ABSENT else v for v in cols.get("available") or [_ABSENT] * n]
+    prices, eans = cols.get("price") or [_ABSENT] * n, cols.get("ean") or [_ABSENT] * n
+    prices = [None if p is _ABSENT else p for p in prices]
+    cols["score"] = [compute_score(r, c, p, m) for r, c, p, m in
+                     zip(cols["rating"], cols["ratings_count"], prices, cols["vintage_match"])]
+    # Région : préférer la région Vivino (plus précise) si disponible
+    cols["region"] = [vr or extract_region(nm) for vr, nm in zip(cols["vivino_region"], cols["name"])]
+    cols["price_trend"] = [price_trend("" if e is _ABSENT else e, p or 0, ph) if p else ""
+                           for e, p in zip(eans, prices)]
+    # Propager grapes_hint si Vivino n'en a pas
+    hints = cols.get("grapes_hint")
+    if hints:
+        cols["grapes"] = [[x.title() for x in h] if not g and h and h is not _ABSENT else g
+                          for g, h in zip(cols["grapes"], hints)]
+    return WineTable(cols, n)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1744,11 +2628,10 @@ def _parse_price(card) -> float:
 
     return 0.0
 
-def parse_page(html: str) -> tuple[list, int]:
+def _parse_page_bs4(html: str) -> tuple[list, int]:
     """
-    Parse une page Leclerc en une seule passe BeautifulSoup.
+    Parse une page Leclerc en une seule passe BeautifulSoup (implémentation de référence).
     Retourne (wines: list[dict], nb_pages: int).
-    Évite de parser le même HTML deux fois (parse_cards puis get_nb_pages).
     """
     soup  = BeautifulSoup(html, "html.parser")
     wines = []
@@ -1768,7 +2651,7 @@ def parse_page(html: str) -> tuple[list, int]:
         image = ""
         if img:
             image = img.get("src") or img.get("data-src") or \
-                    img.get("data-srcset", "").split()[0] or ""
+                    (img.get("data-srcset", "").split() or [""])[0]
         ym = _CARD_VINTAGE_RE.search(name)
         wines.append({"name": name, "price": _parse_price(card),
                       "url": url, "ean": ean, "image": image,
@@ -1781,30 +2664,372 @@ def parse_page(html: str) -> tuple[list, int]:
     return wines, (max(nums) if nums else 1)
 
 
-def parse_cards(html: str) -> list:
-    """Extrait uniquement les cartes produit (sans pagination). Voir parse_page() pour l'usage combiné."""
-    return parse_page(html)[0]
+# ── Backend lxml ───────────────────────────────────────────────────────────
+# Même logique que _parse_page_bs4/_parse_price, mais sur un arbre lxml avec
+# des XPath précompilés (libxml2 en C) : ~10× moins de CPU par page de 96 cartes.
+
+def _xp_class(token: str) -> str:
+    """Prédicat XPath : l'attribut class contient le jeton exact `token`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {token} ')"
+
+try:
+    from lxml import etree as _etree, html as _lxml_html
+    _XP_CARDS       = _etree.XPath("//app-product-card")
+    _XP_LABEL       = _etree.XPath(f".//*[{_xp_class('product-label')}]")
+    _XP_LINK        = _etree.XPath(".//a[@href]")
+    _XP_IMG         = _etree.XPath(".//img")
+    _XP_PRICE_BLOCK = _etree.XPath(f".//*[{_xp_class('block-price-and-availability')}]")
+    _XP_PRICE_UNIT  = _etree.XPath(f".//*[{_xp_class('price-unit')}]")
+    _XP_PRICE_CENTS = _etree.XPath(f".//*[{_xp_class('price-cents')}]")
+    _XP_ITEMPROP    = _etree.XPath(".//*[@itemprop='price']")
+    _XP_PRICE_ANY   = _etree.XPath(".//*[@class][" + " or ".join(
+        f"contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', "
+        f"'abcdefghijklmnopqrstuvwxyz'), '{p}')" for p in ("price", "prix", "amount")) + "]")
+    _XP_HREFS       = _etree.XPath("//a/@href")
+    _XP_TEXT        = _etree.XPath(".//text()[not(parent::script) and not(parent::style)]")
+except ImportError:   # lxml absent → backend BeautifulSoup
+    _etree = None
+
+
+def _lx_text(el, strip: bool = False) -> str:
+    """Équivalent de Tag.get_text() / get_text(strip=True) : script, style et commentaires exclus."""
+    parts = _XP_TEXT(el)
+    return "".join(t.strip() for t in parts) if strip else "".join(parts)
+
+
+def _parse_price_lxml(card) -> float:
+    """_parse_price sur un élément lxml — même cascade de patterns, même ordre."""
+    blk = _XP_PRICE_BLOCK(card)
+    if blk:
+        m = _PRICE_CSS1_RE.search(_lx_text(blk[0]))
+        if m: return float(f"{m.group(1)}.{m.group(2)}")
 
+    ue = _XP_PRICE_UNIT(card)
+    ce = _XP_PRICE_CENTS(card)
+    if ue and ce:
+        try:
+            return float(f"{_lx_text(ue[0], True)}.{_lx_text(ce[0], True).lstrip(',').strip()}")
+        except ValueError: pass
 
-def get_nb_pages(html: str) -> int:
-    """Nombre de pages de résultats. Voir parse_page() pour l'usage combiné."""
-    return parse_page(html)[1]
+    mp = _XP_ITEMPROP(card)
+    if mp:
+        val = mp[0].get("content") or _lx_text(mp[0], True)
+        try:
+            return float(str(val).replace(",", ".").replace("€", "").strip())
+        except ValueError: pass
 
+    for el in _XP_PRICE_ANY(card):
+        m = _PRICE_CSS2_RE.search(_lx_text(el, True))
+        if m:
+            val = float(f"{m.group(1)}.{m.group(2)}")
+            if 1.0 <= val <= 999.0:
+                return val
 
-# ═══════════════════════════════════════════════════════════════════════════
-# VIVINO — query + parsing + pertinence
-# ═══════════════════════════════════════════════════════════════════════════
+    for m in _PRICE_FALLBACK_RE.finditer(_lx_text(card)):
+        val = float(f"{m.group(1)}.{m.group(2)}")
+        if 1.0 <= val <= 999.0:
+            return val
+    return 0.0
 
-# ── Amélioration 3 : dictionnaire d'alias ──────────────────────────────────
-# Noms Leclerc → nom Vivino canonique.
-# Utilisé par build_query si le nom normalisé correspond à un alias connu.
-# Format : {fragment normalisé ASCII → query Vivino correcte}
-_WINE_ALIASES: dict[str, str] = {
-    # Seconds vins et châteaux abrégés
-    "hauts de smith":            "Les Hauts de Smith",
-    "reserve de leoville barton":"La Réserve de Léoville Barton",
-    "carruades de lafite":       "Carruades de Lafite",
-    "chapelle de la mission":    "La Chapelle de la Mission",
+
+def _parse_page_lxml(html: str) -> tuple[list, int]:
+    """parse_page sur lxml.html — sortie identique à _parse_page_bs4."""
+    root  = _lxml_html.fromstring(html)
+    wines = []
+    for card in _XP_CARDS(root):
+        lbl  = _XP_LABEL(card)
+        name = _lx_text(lbl[0], True) if lbl else ""
+        if not name: continue
+        lnk  = _XP_LINK(card)
+        href = lnk[0].get("href") if lnk else ""
+        url  = href if href.startswith("http") else f"https://www.e.leclerc{href}"
+        # EAN : recherché dans le HTML interne de la carte (comme decode_contents)
+        inner = (card.text or "") + "".join(
+            _etree.tostring(ch, encoding="unicode") for ch in card)
+        em   = _EAN_OFFER_RE.search(inner)
+        ean  = em.group(1) if em else ""
+        if not ean:
+            m2 = _EAN_URL_RE.search(url)
+            ean = m2.group(1) if m2 else ""
+        img   = _XP_IMG(card)
+        image = ""
+        if img:
+            img   = img[0]
+            image = img.get("src") or img.get("data-src") or \
+                    (img.get("data-srcset", "").split() or [""])[0]
+        ym = _CARD_VINTAGE_RE.search(name)
+        wines.append({"name": name, "price": _parse_price_lxml(card),
+                      "url": url, "ean": ean, "image": image,
+                      "vintage":     int(ym.group(1)) if ym else None,
+                      "grapes_hint": extract_grapes_from_name(name),
+                      "volume_cl":   extract_volume_cl(name)})
+    nums = [int(m.group(1)) for h in _XP_HREFS(root) if (m := _PAGE_NUM_RE.search(h))]
+    return wines, (max(nums) if nums else 1)
+
+
+def parse_page(html: str) -> tuple[list, int]:
+    """
+    Parse une page Leclerc en une seule passe (backend LECLERC_PARSER).
+    Retourne (wines: list[dict], nb_pages: int).
+    Évite de parser le même HTML deux fois (parse_cards puis get_nb_pages).
+    """
+    if LECLERC_PARSER == "lxml" and _etree is not None and html.strip():
+        return _parse_page_lxml(html)
+    return _parse_page_bs4(html)
+
+
+def parse_cards(html: str) -> list:
+    """Extrait uniquement les cartes produit (sans pagination). Voir parse_page() pour l'usage combiné."""
+    return parse_page(html)[0]
+
+
+def get_nb_pages(html: str) -> int:
+    """Nombre de pages de résultats. Voir parse_page() pour l'usage combiné."""
+    return parse_page(html)[1]
+
+
+# ── Client HTTP catalogue (sans navigateur) ────────────────────────────────
+# Le front e.leclerc charge les produits en JSON : on appelle directement cet
+# endpoint avec le code magasin (cookie + paramètre) et LECLERC_PAGE_SIZE.
+# La forme de la réponse n'est pas documentée : tout écart (clé absente, prix
+# d'unité incertaine, EAN manquant, désaccord avec le dernier catalogue issu
+# du navigateur) → None, l'appelant retombe sur Selenium.
+
+def _api_price(p: dict) -> float | None:
+    """
+    Prix en euros d'un produit JSON : champ "price" (nombre, chaîne « 12,95 € »
+    ou dict price/selling/value). None si absent ou nul : pas de devinette
+    centimes/euros sur d'autres champs (l'unité est vérifiée par
+    _leclerc_api_mismatch contre le catalogue Selenium).
+    """
+    raw = p.get("price")
+    while isinstance(raw, dict):
+        raw = raw.get("price") or raw.get("selling") or raw.get("value")
+    if raw is None or isinstance(raw, bool):
+        return None
+    try:
+        price = float(str(raw).replace(",", ".").replace("€", "").strip())
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+
+def parse_api_products(products: list) -> list[dict]:
+    """
+    Normalise les produits JSON du catalogue au format de parse_page()
+    (name, price, url, ean, image, vintage, grapes_hint, volume_cl).
+    Les produits sans nom, prix en euros ou EAN sont ignorés : l'appelant
+    compare les longueurs pour détecter un schéma inattendu.
+    """
+    wines = []
+    for p in products:
+        if not isinstance(p, dict): continue
+        name  = (p.get("label") or p.get("name") or p.get("title") or "").strip()
+        price = _api_price(p)
+        if not name or price is None: continue
+        slug_ = p.get("slug") or p.get("code") or ""
+        # /fp/ : format des URLs produit relevées dans le DOM (cf. cache Leclerc)
+        url   = p.get("url") or (f"https://www.e.leclerc/fp/{slug_}" if slug_ else "")
+        if url and not url.startswith("http"):
+            url = f"https://www.e.leclerc{url}"
+        ean = str(p.get("ean") or p.get("gtin") or p.get("sku") or "")
+        if not ean.isdigit() or len(ean) != 13:
+            m2  = _EAN_URL_RE.search(url)
+            ean = m2.group(1) if m2 else ""
+        if not ean: continue
+        imgs  = p.get("images") or []
+        image = ""
+        if imgs and isinstance(imgs, list):
+            image = imgs[0].get("url", "") if isinstance(imgs[0], dict) else str(imgs[0])
+        ym = _CARD_VINTAGE_RE.search(name)
+        wines.append({"name": name, "price": price,
+                      "url": url, "ean": ean, "image": image,
+                      "vintage":     int(ym.group(1)) if ym else None,
+                      "grapes_hint": extract_grapes_from_name(name),
+                      "volume_cl":   extract_volume_cl(name)})
+    return wines
+
+
+def _leclerc_api_mismatch(cards: list[dict], slug: str) -> str:
+    """
+    Confronte les cartes API au dernier catalogue Leclerc issu du navigateur.
+    Retourne "" si elles concordent, sinon la raison du refus :
+    - pas de référence (premier scrape) ;
+    - moins de LECLERC_API_MIN_MATCH des EAN déjà connus ;
+    - prix médian hors de ×0.67..×1.5 (centimes pris pour des euros…) ;
+    - URLs produit différentes de celles relevées dans le DOM.
+    """
+    ref = load_leclerc_cache(slug)
+    by_ean = {w["ean"]: w for w in (ref or {}).get("wines", []) if w.get("ean")}
+    if not by_ean:
+        return "pas de catalogue de référence"
+    common = [(c, by_ean[c["ean"]]) for c in cards if c["ean"] in by_ean]
+    if len(common) < LECLERC_API_MIN_MATCH * len(cards):
+        return f"{len(common)}/{len(cards)} EAN connus"
+    ratios = sorted(c["price"] / w["price"] for c, w in common if w.get("price"))
+    if ratios and not 0.67 <= ratios[len(ratios) // 2] <= 1.5:
+        return f"prix ×{ratios[len(ratios) // 2]:.2f} par rapport au navigateur"
+    same_url = sum(1 for c, w in common if c["url"] == w.get("url"))
+    if same_url < 0.9 * len(common):
+        return f"URLs produit différentes ({same_url}/{len(common)} identiques)"
+    return ""
+
+
+def _fetch_leclerc_api_page(slug: str, page: int) -> tuple[list, int] | None:
+    """Une page du catalogue JSON → (produits bruts, nb_pages) ou None si inutilisable."""
+    try:
+        resp = _LECLERC_SESSION.get(
+            LECLERC_API_URL,
+            params={
+                "language":  "fr-FR",
+                "size":      LECLERC_PAGE_SIZE,
+                "page":      page,
+                "categories": json.dumps({"code": [f"NAVIGATION_{slug}"]}),
+                "oaf-sign-code": STORE_CODE,
+            },
+            cookies={"oafSignCode": STORE_CODE, "oaf-sign-code": STORE_CODE},
+            timeout=LECLERC_API_TIMEOUT,
+        )
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+    except Exception:
+        return None
+    if isinstance(data, list):
+        return data, 1
+    if not isinstance(data, dict):
+        return None
+    items = data.get("items") or data.get("products")
+    if not isinstance(items, list):
+        return None
+    nb = data.get("nbPages") or data.get("totalPages") or (data.get("pagination") or {}).get("pages")
+    if not nb:
+        total = data.get("total") or data.get("nbItems") or (data.get("pagination") or {}).get("total")
+        nb = math.ceil(int(total) / LECLERC_PAGE_SIZE) if total else 1
+    return items, int(nb)
+
+
+def fetch_leclerc_catalogue_http(slug: str, log=None) -> list | None:
+    """
+    Catalogue complet via HTTP seul (quelques requêtes JSON au lieu de Chromium).
+    Pages 2..N en parallèle, même déduplication EAN/nom que _scrape_all_leclerc_pages.
+    Retourne None si l'endpoint ne répond pas comme attendu (→ fallback Selenium).
+    """
+    if not LECLERC_API_URL:
+        return None
+    first = _fetch_leclerc_api_page(slug, 1)
+    if not first or not first[0]:
+        return None
+    products, nb_pages = first
+    nb_pages = min(max(nb_pages, 1), MAX_PAGES)
+    pages: dict[int, list] = {1: products}
+    if nb_pages > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(4, nb_pages - 1)) as ex:
+            futs = {ex.submit(_fetch_leclerc_api_page, slug, p): p for p in range(2, nb_pages + 1)}
+            for fut in concurrent.futures.as_completed(futs):
+                res = fut.result()
+                if res is None:
+                    return None   # page manquante → résultat partiel refusé
+                pages[futs[fut]] = res[0]
+    all_cards, seen_keys = [], set()
+    for p in range(1, nb_pages + 1):
+        cards = parse_api_products(pages[p])
+        if len(cards) != len(pages[p]):
+            if log: log(f"  ⚠️ Catalogue HTTP : schéma inattendu page {p} "
+                        f"({len(cards)}/{len(pages[p])} produits lisibles)")
+            return None
+        for c in cards:
+            if c["ean"] not in seen_keys:
+                seen_keys.add(c["ean"])
+                all_cards.append(c)
+    if not all_cards:
+        return None
+    why = _leclerc_api_mismatch(all_cards, slug)
+    if why:
+        if log: log(f"  ⚠️ Catalogue HTTP écarté : {why}")
+        return None
+    if log: log(f"  ⚡ Catalogue HTTP : {nb_pages} pages · {len(all_cards)} cartes")
+    return all_cards
+
+
+def capture_leclerc_api_sample(slug: str = "vins-rouges", path: str | Path | None = None,
+                               log=print) -> Path | None:
+    """
+    Enregistre les réponses JSON que le front e.leclerc reçoit en affichant la
+    catégorie (même principe que l'interception ccu.e.leclerc d'app.py) : URL
+    de requête réelle + corps, dans tests/fixtures/leclerc_api_<slug>.json.
+    Sert à caler LECLERC_API_URL / parse_api_products sur le vrai schéma. Hors
+    Streamlit :
+        python -c "import streamlit_app as s; s.capture_leclerc_api_sample()"
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    hook = r"""
+        (() => {
+          const want = u => /ccu\.e\.leclerc|\/api\//.test(u || "");
+          const keep = (url, body) => (window.__lcCapture = window.__lcCapture || []).push({url, body});
+          const f = window.fetch;
+          window.fetch = async (...a) => {
+            const r = await f(...a);
+            try { if (want(r.url)) keep(r.url, await r.clone().text()); } catch (e) {}
+            return r;
+          };
+          const open = XMLHttpRequest.prototype.open, send = XMLHttpRequest.prototype.send;
+          XMLHttpRequest.prototype.open = function (m, u) { this.__lcUrl = u; return open.apply(this, arguments); };
+          XMLHttpRequest.prototype.send = function () {
+            this.addEventListener("load", () => {
+              try { if (want(this.__lcUrl)) keep(this.__lcUrl, this.responseText); } catch (e) {}
+            });
+            return send.apply(this, arguments);
+          };
+        })();"""
+    driver = make_driver(page_load_strategy="normal")
+    try:
+        _set_store_cookie(driver)
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": hook})
+        driver.get(leclerc_url(slug))
+        try:
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "app-product-card")))
+        except Exception:
+            pass
+        time.sleep(2)
+        captured = driver.execute_script("return window.__lcCapture || [];")
+    finally:
+        try: driver.quit()
+        except Exception: pass
+    samples = []
+    for c in captured:
+        try:
+            samples.append({"url": c["url"], "response": json.loads(c["body"])})
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not samples:
+        if log: log("❌ Aucune réponse JSON capturée")
+        return None
+    out = Path(path) if path else Path(__file__).parent / "tests" / "fixtures" / f"leclerc_api_{slug}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"slug": slug, "store": STORE_CODE, "captured_at": time.time(),
+                               "samples": samples}, ensure_ascii=False, indent=1), encoding="utf-8")
+    if log: log(f"✅ {len(samples)} réponse(s) capturée(s) → {out}")
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VIVINO — query + parsing + pertinence
+# ═══════════════════════════════════════════════════════════════════════════
+
+# ── Amélioration 3 : dictionnaire d'alias ──────────────────────────────────
+# Noms Leclerc → nom Vivino canonique.
+# Utilisé par build_query si le nom normalisé correspond à un alias connu.
+# Format : {fragment normalisé ASCII → query Vivino correcte}
+_WINE_ALIASES: dict[str, str] = {
+    # Seconds vins et châteaux abrégés
+    "hauts de smith":            "Les Hauts de Smith",
+    "reserve de leoville barton":"La Réserve de Léoville Barton",
+    "carruades de lafite":       "Carruades de Lafite",
+    "chapelle de la mission":    "La Chapelle de la Mission",
     "second vin lynch bages":    "Echo de Lynch Bages",
     "pavillon rouge":            "Pavillon Rouge du Château Margaux",
     "benjamin de beauregard":    "Benjamin de Beauregard",
@@ -1962,6 +3187,8 @@ _PRICE_FALLBACK_RE = re.compile(r"(?<![0-9])(\d{1,3})[,.](\d{2})\s*€")
 # _parse_price patterns 1 & 2 — present dans le sous-bloc CSS price
 _PRICE_CSS1_RE    = re.compile(r"(\d+)[€\s]*[,.](\d{2})")
 _PRICE_CSS2_RE    = re.compile(r"(\d+)[,.](\d{2})")
+# fetch_vivino : titre d'une page de blocage / rate-limit
+_VIVINO_BLOCKED_TITLE_RE = re.compile(r"\b429\b|too many requests|access denied|forbidden|just a moment", re.I)
 # fetch_vivino_selenium : année dans l'URL courante
 _VIVINO_YEAR_URL_RE = re.compile(r"[?&]year=(\d{4})")
 # _norm_words : appelée dans _name_similarity, _fallback_queries, etc.
@@ -1972,6 +3199,16 @@ _NON_ALPHANUM_RE = re.compile(r"[^a-z0-9 ]")
 _REGION_AOP_RE   = re.compile(r"-\s*([\w\s\-\']+?)\s*(?:AOP|IGP|AOC|AOP-AOC)\b", re.I)
 # vivino_candidates_from_search : filtre hrefs résultats de recherche
 _VIVINO_WINE_HREF_RE = re.compile(r"/w(?:ines)?/[^/?&#\s]+")
+# vivino_candidates_from_search : état React embarqué (attribut ou assignation JS)
+_VIVINO_STATE_ATTR_RE = re.compile(r'data-preloaded-state="([^"]*)"')
+_VIVINO_STATE_JS_RE   = re.compile(r'window\.__[A-Z_]+__\s*=\s*|<script[^>]+type="application/json"[^>]*>\s*')
+# fetch_vivino : page de recherche explicitement vide (cache négatif autorisé)
+_VIVINO_NO_RESULTS_RE = re.compile(
+    r'class="[^"]*(?:noResults|no-results)'
+    r"|aucun (?:vin|résultat) (?:ne correspond|trouvé)"
+    r"|(?:could ?n.t|did ?n.t) find any|no (?:wines|results) (?:found|match)", re.I)
+# _vivino_search_empty : conteneurs de résultats dans l'état embarqué
+_VIVINO_RESULT_KEYS = ("records", "matches", "results", "hits")
 # fetch_vivino : extraction JSON fallback depuis HTML brut
 _VIVINO_AVG_RE    = re.compile(r'"ratings_average"\s*:\s*([\d.]+)')
 _VIVINO_CNT_RE    = re.compile(r'"ratings_count"\s*:\s*(\d+)')
@@ -2145,25 +3382,97 @@ def _extract_year(text: str) -> int | None:
     return int(m.group(0)) if m else None
 
 
+def _vivino_search_states(html: str) -> list:
+    """États React embarqués (attribut data-preloaded-state ou assignation JS) décodés."""
+    blobs = [_html.unescape(m.group(1)) for m in _VIVINO_STATE_ATTR_RE.finditer(html)]
+    decoder = json.JSONDecoder()
+    states = []
+    for m in _VIVINO_STATE_JS_RE.finditer(html):
+        try:
+            states.append(decoder.raw_decode(html, m.end())[0])
+        except ValueError:
+            pass
+    for blob in blobs:
+        try:
+            states.append(json.loads(blob))
+        except ValueError:
+            pass
+    return states
+
+
+def _vivino_search_records(html: str, states: list | None = None) -> dict[str, dict]:
+    """
+    Décode l'état React embarqué dans la page de recherche Vivino et retourne
+    les vintages trouvés au format explore/explore ({"vintage": …}, réduit par
+    _trim_vivino_record), indexés par seo_name et id du vin et du vintage, et
+    par « clé:année » : plusieurs millésimes d'un même vin ne se masquent pas.
+    """
+    out: dict[str, dict] = {}
+    stack = list(_vivino_search_states(html) if states is None else states)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        wine = node.get("wine")
+        if isinstance(wine, dict) and (wine.get("seo_name") or wine.get("id")) \
+                and ("year" in node or "statistics" in node):
+            rec = _trim_vivino_record({"vintage": node})
+            year = node.get("year")
+            for k in (wine.get("seo_name"), wine.get("id"), node.get("seo_name"), node.get("id")):
+                if k not in (None, ""):
+                    out.setdefault(str(k), rec)
+                    if year:   # lien « /w/<id>?year=<année> » → ce millésime précis
+                        out.setdefault(f"{k}:{year}", rec)
+        stack.extend(v for v in reversed(list(node.values())) if isinstance(v, (dict, list)))
+    return out
+
+
+def _vivino_search_empty(html: str) -> bool:
+    """
+    True seulement si Vivino affirme qu'il n'y a aucun résultat : marqueur
+    « aucun résultat » dans la page, ou état embarqué décodé dont le conteneur
+    de résultats est une liste vide. Une page partielle (timeout, blocage,
+    rendu incomplet) renvoie False : pas de cache négatif.
+    """
+    if _VIVINO_NO_RESULTS_RE.search(html):
+        return True
+    states = _vivino_search_states(html)
+    if not states or _vivino_search_records(html, states):
+        return False
+    stack = states
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if any(node.get(k) == [] for k in _VIVINO_RESULT_KEYS):
+                return True
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+    return False
+
+
+def _vivino_record_rating(rec: dict | None) -> dict:
+    """rating/ratings_count d'un record (statistiques du vintage, sinon du vin)."""
+    v = (rec or {}).get("vintage") or {}
+    stats = v.get("statistics") or {}
+    if not stats.get("ratings_average"):
+        stats = (v.get("wine") or {}).get("statistics") or stats
+    avg = stats.get("ratings_average")
+    return {"rating": round(float(avg), 1) if avg else None,
+            "ratings_count": int(stats.get("ratings_count") or 0)}
+
+
 def vivino_candidates_from_search(html: str, max_candidates: int = VIVINO_CANDIDATES_MAX) -> list[dict]:
     """
     Retourne plusieurs candidats depuis la page de recherche Vivino.
-    Extrait aussi rating/count depuis les JSON embarqués → évite la 2e navigation.
+    L'état React embarqué fournit note, domaine, région, cépages et structure
+    de chaque carte ("record") → pas de 2e navigation vers la page du vin.
     """
-    # ── Extraire ratings depuis les JSON embarqués ──────────────────────────
-    # La page React encode les données de chaque carte dans des blocs JSON.
-    # On parse tous les blocs pour construire seo_name→(rating, count, nb_all).
-    _ratings_by_seo: dict[str, tuple] = {}
-    for m in re.finditer(r'"seo_name"\s*:\s*"([^"]+)"[^}]{0,600}?"ratings_average"\s*:\s*([\d.]+)[^}]{0,200}?"ratings_count"\s*:\s*(\d+)', html):
-        seo, avg, cnt = m.group(1), float(m.group(2)), int(m.group(3))
-        if seo not in _ratings_by_seo:
-            _ratings_by_seo[seo] = (avg, cnt)
-    # Fallback: parser les ratings_count_all (niveau wine, pas vintage)
-    _all_by_seo: dict[str, int] = {}
-    for m in re.finditer(r'"seo_name"\s*:\s*"([^"]+)"[^}]{0,800}?"ratings_count"\s*:\s*(\d+)', html):
-        seo = m.group(1)
-        if seo not in _all_by_seo:
-            _all_by_seo[seo] = int(m.group(2))
+    # ── État React embarqué : un décodage JSON → records explore-like ───────
+    _records = _vivino_search_records(html)
 
     soup = BeautifulSoup(html, "html.parser")
     out, seen = [], set()
@@ -2179,16 +3488,25 @@ def vivino_candidates_from_search(html: str, max_candidates: int = VIVINO_CANDID
         # Extraire le seo_name depuis l'URL pour le lookup rating
         _seo_m = re.search(r"/w(?:ines)?/([^/?&#]+)", href)
         _seo = _seo_m.group(1) if _seo_m else ""
-        _rating, _count = _ratings_by_seo.get(_seo, (None, 0))
-        out.append({
+        _year_m = _VIVINO_YEAR_URL_RE.search(href)
+        rec = (_records.get(f"{_seo}:{_year_m.group(1)}") if _year_m else None) \
+              or _records.get(_seo)
+        cand = {
             "url":    url,
             "title":  title,
             "year":   _extract_year(title),
-            "rating": _rating,          # None si absent de la page
-            "ratings_count": _count,
-        })
+            **_vivino_record_rating(rec),   # rating None si absent de la page
+        }
+        if rec:
+            cand["record"] = rec            # champs enrichis sans 2e navigation
+        out.append(cand)
         if len(out) >= max_candidates:
             break
+    if not out and _records:
+        # Pas de liens exploitables (rendu partiel) : candidats depuis l'état seul
+        uniq = list({id(r): r for r in _records.values()}.values())
+        out = [{**c, **_vivino_record_rating(c["record"])}
+               for c in _vivino_api_candidates(uniq) if c["url"]]
     return out
 
 
@@ -2312,6 +3630,199 @@ def choose_best_vivino_candidate(
     return best, best_score
 
 
+# ── Scoring vectorisé (lots de vins) ───────────────────────────────────────
+# Même barème que choose_best_vivino_candidate, calculé sur toutes les paires
+# (vin, candidat) d'un coup : mots, mots longs, bigrammes et cépages sont codés
+# en entiers puis en bitsets empaquetés (np.packbits) → intersections par AND +
+# popcount. Les additions sont faites dans le même ordre que la version scalaire
+# (mêmes flottants IEEE) et l'arrondi à 4 décimales utilise round() de Python :
+# résultat identique, candidat par candidat.
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+_BG_WIDTH  = 26 * 26   # bigrammes de lettres a-z (cf. _NONALPHA_RE)
+
+
+def _bitset(rows: list, width: int) -> np.ndarray:
+    """[ensemble d'ids] → matrice uint8 (len(rows), ⌈width/8⌉) de bits empaquetés."""
+    out = np.zeros((max(len(rows), 1), (max(width, 1) + 7) // 8), dtype=np.uint8)
+    r = [i for i, ids in enumerate(rows) for _ in ids]
+    c = np.fromiter((x for ids in rows for x in ids), dtype=np.int64, count=len(r))
+    if r:
+        np.bitwise_or.at(out, (np.array(r), c >> 3), (128 >> (c & 7)).astype(np.uint8))
+    return out
+
+
+def _popcount(packed: np.ndarray) -> np.ndarray:
+    return _POPCOUNT8[packed].sum(axis=1)
+
+
+def _has_bit(packed: np.ndarray, rows: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """packed[rows] contient-il le bit ids ? (ids < 0 → False)"""
+    safe = np.maximum(ids, 0)
+    return (ids >= 0) & (((packed[rows, safe >> 3] >> (7 - (safe & 7))) & 1) == 1)
+
+
+def _bigram_ids(ascii_letters: str) -> set:
+    return {(ord(ascii_letters[i]) - 97) * 26 + ord(ascii_letters[i + 1]) - 97
+            for i in range(len(ascii_letters) - 1)}
+
+
+# Vocabulaire global (mot → id stable) : les représentations de titres restent
+# valides d'un lot à l'autre et peuvent être mémorisées.
+_SCORE_VOCAB: dict[str, int] = {}
+
+def _score_wid(w: str) -> int:
+    wid = _SCORE_VOCAB.get(w)
+    if wid is None:
+        wid = _SCORE_VOCAB.setdefault(w, len(_SCORE_VOCAB))
+    return wid
+
+
+@lru_cache(maxsize=65536)
+def _title_features(title: str) -> tuple[frozenset, frozenset, frozenset, str]:
+    """Titre candidat → (ids mots, ids mots ≥5 lettres, ids bigrammes, titre ASCII)."""
+    words = _norm_words(title)
+    asc   = _NONALPHA_RE.sub("", _norm_ascii(title))
+    return (frozenset(_score_wid(w) for w in words),
+            frozenset(_score_wid(w) for w in words if len(w) >= 5),
+            frozenset(_bigram_ids(asc)) if len(asc) > 1 else frozenset(),
+            _norm_ascii(title))
+
+
+@lru_cache(maxsize=16384)
+def _query_features(query: str) -> tuple:
+    """Query → (ids mots, ids bigrammes, id mot-clé producteur, id 1er mot, nb mots, query ASCII)."""
+    q_words = _norm_words(query)
+    q_ascii = _NONALPHA_RE.sub("", _norm_ascii(query))
+    q_key   = max(q_words, key=len, default="")
+    q_ord   = [w for w in _WORDS3_RE.findall(_norm_ascii(query)) if w not in _NAME_PREFIX_STOP]
+    return (frozenset(_score_wid(w) for w in q_words),
+            frozenset(_bigram_ids(q_ascii)) if len(q_ascii) > 1 else frozenset(),
+            _score_wid(q_key) if q_key and len(q_key) >= 5 else -1,
+            # premier mot significatif (≥ 4 lettres) : -2 = pas de pénalité possible
+            _score_wid(q_ord[0]) if q_ord and len(q_ord[0]) >= 4 else -2,
+            len(q_words), _norm_ascii(query).strip())
+
+
+def choose_best_vivino_candidates_batch(jobs: list[dict]) -> list[tuple[dict | None, float]]:
+    """
+    Version vectorisée de choose_best_vivino_candidate pour un lot de vins.
+    jobs : [{"query", "vintage", "candidates", "region"?, "rejected_urls"?,
+             "grapes_hint"?, "slug"?}] (mêmes paramètres que la version scalaire).
+    Retourne [(best, score)] dans l'ordre des jobs — même choix, même score.
+    """
+    grape_vocab: dict[str, int] = {}
+    def _gid(g):  return grape_vocab.setdefault(g, len(grape_vocab))
+
+    # ── Représentations des queries (1 ligne par job) ─────────────────────
+    q_rows, q_bg, q_key_id, q_first_id, q_info = [], [], [], [], []
+    for job in jobs:
+        words, bigrams, key_id, first_id, n_words, single = _query_features(job["query"])
+        q_rows.append(words); q_bg.append(bigrams)
+        q_key_id.append(key_id); q_first_id.append(first_id)
+        q_info.append((n_words, single))
+
+    # ── Paires (job, candidat) retenues + représentations des titres ──────
+    title_idx: dict[str, int] = {}
+    t_rows, t_long, t_bg, t_ascii = [], [], [], []   # 1 ligne par titre distinct
+    p_job, p_title, p_cand = [], [], []
+    p_year, p_type_bad, p_region, p_vregion, p_grapes, p_has_rec = [], [], [], [], [], []
+    for j, job in enumerate(jobs):
+        region_norm = _norm_ascii(job.get("region") or "")
+        rejected    = job.get("rejected_urls") or set()
+        slug        = job.get("slug", "vins-rouges")
+        for k, c in enumerate(job["candidates"]):
+            rec   = c.get("record")
+            c_url = c.get("url") or (
+                "https://www.vivino.com/wines/" +
+                (((rec or {}).get("vintage") or {}).get("wine") or {}).get("seo_name", "")
+                if rec else "")
+            if c_url and c_url in rejected:
+                continue
+            c_title = c.get("title", "")
+            ti = title_idx.get(c_title)
+            if ti is None:
+                words, long_words, bigrams, asc = _title_features(c_title)
+                ti = title_idx[c_title] = len(t_rows)
+                t_rows.append(words); t_long.append(long_words)
+                t_bg.append(bigrams); t_ascii.append(asc)
+            if not t_rows[ti]:
+                continue
+            wine_obj = ((rec or {}).get("vintage") or {}).get("wine") or {}
+            p_job.append(j); p_title.append(ti); p_cand.append(k)
+            p_year.append(c.get("year") or 0)
+            p_has_rec.append(bool(rec))
+            p_region.append(bool(region_norm) and region_norm in t_ascii[ti])
+            viv_type = wine_obj.get("type_id") if rec else None
+            exp_slug = _VIVINO_TYPE_TO_SLUG.get(viv_type, "") if viv_type else ""
+            p_type_bad.append(bool(exp_slug) and exp_slug != slug)
+            viv_region = _norm_ascii((wine_obj.get("region") or {}).get("name") or "") if rec else ""
+            p_vregion.append(bool(region_norm) and bool(viv_region) and
+                             (viv_region in region_norm or region_norm in viv_region))
+            style = wine_obj.get("style") or {}
+            p_grapes.append({_gid(_norm_ascii(g.get("name", ""))) for g in (style.get("grapes") or [])}
+                            if rec else set())
+
+    results: list[tuple[dict | None, float]] = [(None, -1.0)] * len(jobs)
+    if not p_job:
+        return results
+    pj, pt = np.array(p_job), np.array(p_title)
+    hints  = [{_gid(_norm_ascii(g)) for g in (job.get("grapes_hint") or [])} for job in jobs]
+
+    # ── Similarité nom ────────────────────────────────────────────────────
+    V  = len(_SCORE_VOCAB)
+    QW, CW, CL = _bitset(q_rows, V), _bitset(t_rows, V), _bitset(t_long, V)
+    inter  = _popcount(QW[pj] & CW[pt])
+    union  = _popcount(QW)[pj] + _popcount(CW)[pt] - inter
+    jacc   = np.where(union > 0, inter / np.maximum(union, 1), 0.0)
+    QB, CB = _bitset(q_bg, _BG_WIDTH), _bitset(t_bg, _BG_WIDTH)
+    bg_in  = _popcount(QB[pj] & CB[pt])
+    bg_un  = _popcount(QB)[pj] + _popcount(CB)[pt] - bg_in
+    bg     = np.where(bg_un > 0, bg_in / np.maximum(bg_un, 1), 0.0)
+    key_id, first_id = np.array(q_key_id)[pj], np.array(q_first_id)[pj]
+    prod   = np.where(_has_bit(CW, pt, key_id), 0.10, 0.0)
+    extra  = np.minimum(0.20, _popcount(CL[pt] & ~QW[pj]) * 0.08)
+    fwp    = np.where((first_id != -2) & ~_has_bit(CW, pt, first_id), 0.15, 0.0)
+    base   = np.minimum(1.0, np.maximum(0.0, jacc * 0.7 + bg * 0.3 + prod - extra - fwp))
+    score  = np.array([round(x, 4) for x in base.tolist()])
+
+    # ── Boosts / pénalités (même ordre que la version scalaire) ───────────
+    score  = score + np.where(np.array(p_region), 0.30, 0.0)
+    vint   = np.array([int(job.get("vintage") or 0) for job in jobs])[pj]
+    cy     = np.array(p_year, dtype=np.int64)
+    vterm  = np.select(
+        [(vint > 0) & (cy > 0) & (cy == vint),
+         (vint > 0) & (cy > 0) & (np.abs(cy - vint) == 1),
+         (vint > 0) & (cy > 0),
+         (vint > 0)],
+        [0.20, 0.08, -0.12, -0.03], 0.0)
+    score  = score + vterm
+    G      = len(grape_vocab)
+    HB, VB = _bitset(hints, G), _bitset(p_grapes, G)
+    n_hint = _popcount(HB)[pj]
+    n_viv  = _popcount(VB)
+    common = _popcount(HB[pj] & VB)
+    g_on   = (n_hint > 0) & np.array(p_has_rec) & (n_viv > 0)
+    score  = score + np.where(g_on, np.minimum(0.20, common * 0.08), 0.0)
+    score  = score - np.where(g_on & (common == 0) & (n_hint >= 2), 0.08, 0.0)
+    score  = score - np.where(np.array(p_type_bad), 0.75, 0.0)
+    score  = score + np.where(np.array(p_vregion), 0.15, 0.0)
+
+    # ── Meilleur candidat par job (1er maximum, comme `score > best_score`) ─
+    bounds = np.flatnonzero(np.diff(pj)) + 1
+    for seg in np.split(np.arange(len(pj)), bounds):
+        j    = p_job[seg[0]]
+        i    = seg[int(np.argmax(score[seg]))]
+        best, best_score = jobs[j]["candidates"][p_cand[i]], float(score[i])
+        n_words, single_word = q_info[j]
+        if best_score < VIVINO_SIMILARITY_MIN:
+            results[j] = (None, best_score)
+        elif n_words <= 1 and single_word in _GENERIC_APPELLATIONS and best_score < 0.70:
+            results[j] = (None, best_score)
+        else:
+            results[j] = (best, best_score)
+    return results
+
+
 def _fallback_queries(wine_name: str, vintage,
                       rejections: dict | None = None) -> list[str]:
     """
@@ -2360,16 +3871,245 @@ def _fallback_queries(wine_name: str, vintage,
     return result
 
 
+# ── Mémo des recherches Vivino ─────────────────────────────────────────────
+# Les cascades _fallback_queries / winery rejouent les mêmes recherches à chaque
+# fill_missing. On mémorise les candidats bruts (avant scoring : les rejets
+# utilisateur restent appliqués par choose_best_vivino_candidate) par
+# (source, query, millésime, wine_type_id) dans SQLite, avec un TTL distinct
+# pour les recherches sans candidat et une éviction LRU (used_at).
+_search_memo_puts = 0
+
+def _search_memo_key(source: str, query: str, vintage, wine_type_id: int) -> str:
+    return f"{source}|{wine_type_id}|{vintage or ''}|{' '.join(query.lower().split())}"
+
+
+def _search_memo_get(key: str) -> list | None:
+    """Candidats mémorisés, ou None si absent / expiré."""
+    try:
+        row = _db().execute("SELECT n, data, stored_at FROM search_memo WHERE key=?",
+                            (key,)).fetchone()
+        if not row:
+            return None
+        n, data, stored_at = row
+        ttl = (VIVINO_SEARCH_TTL_HIT_DAYS if n else VIVINO_SEARCH_TTL_MISS_DAYS) * 86400
+        now = time.time()
+        if now - stored_at > ttl:
+            return None
+        _db().execute("UPDATE search_memo SET used_at=? WHERE key=?", (now, key))
+        return json.loads(data)
+    except Exception:
+        return None
+
+
+def _search_memo_put(key: str, candidates: list) -> None:
+    global _search_memo_puts
+    try:
+        now  = time.time()
+        conn = _db()
+        conn.execute("INSERT OR REPLACE INTO search_memo VALUES (?,?,?,?,?)",
+                     (key, len(candidates),
+                      json.dumps(candidates, ensure_ascii=False, separators=(",", ":")),
+                      now, now))
+        _search_memo_puts += 1
+        if _search_memo_puts % 200 == 0:   # éviction LRU amortie
+            conn.execute(
+                "DELETE FROM search_memo WHERE key IN (SELECT key FROM search_memo "
+                "ORDER BY used_at LIMIT max(0, (SELECT count(*) FROM search_memo) - ?))",
+                (VIVINO_SEARCH_MEMO_MAX,))
+    except Exception:
+        pass
+
+
+def _trim_vivino_record(r: dict) -> dict:
+    """Réduit un record explore/explore aux champs lus par le scoring et l'extraction."""
+    v = r.get("vintage") or {}
+    w = v.get("wine") or {}
+    style, region, taste = w.get("style") or {}, w.get("region") or {}, w.get("taste") or {}
+    return {"vintage": {
+        "name": v.get("name"), "year": v.get("year"),
+        **({"statistics": v["statistics"]} if "statistics" in v else {}),
+        "wine": {
+            "name": w.get("name"), "seo_name": w.get("seo_name"),
+            "type_id": w.get("type_id"), "is_natural": w.get("is_natural"),
+            # ratings_average du vin : repli de _vivino_record_rating sans note de millésime
+            "statistics": {"ratings_count":   (w.get("statistics") or {}).get("ratings_count"),
+                           "ratings_average": (w.get("statistics") or {}).get("ratings_average")},
+            "style": {"regional_name": style.get("regional_name"),
+                      "seo_name": style.get("seo_name"),
+                      "grapes": [{"name": g.get("name")} for g in (style.get("grapes") or [])]},
+            "region": {"name": region.get("name"), "seo_name": region.get("seo_name"),
+                       "country": {"code": (region.get("country") or {}).get("code")}},
+            "winery": {"name": (w.get("winery") or {}).get("name")},
+            "taste": {"structure": taste.get("structure") or {}},
+        }}}
+
+
+def save_wine_candidates(slug: str, query: str, vintage, region: str,
+                         grapes_hint: list, attempts: list) -> None:
+    """Persiste les candidats bruts d'un vin (table candidates/slug, clé = build_query)."""
+    if not attempts:
+        return
+    try:
+        _store_upsert("candidates", slug, query, {
+            "vintage": vintage, "region": region, "grapes_hint": grapes_hint or [],
+            "attempts": attempts, "at": time.time()})
+    except Exception:
+        pass
+
+
+def _cascade_pick(results: list[tuple[int, dict | None, float]]) -> tuple[dict | None, float]:
+    """
+    Choix final d'une cascade de repli sans candidat ≥ VIVINO_CASCADE_ACCEPT :
+    meilleure confiance, à égalité la requête la plus prioritaire.
+    results : [(rang de priorité, best, confiance), …]
+    """
+    found = [r for r in results if r[1]]
+    if not found:
+        return None, 0.0
+    _, best, conf = max(found, key=lambda r: (r[2], -r[0]))
+    return best, conf
+
+
+def _cascade_replay(scored: list[tuple[int, dict | None, float]]) -> tuple[dict | None, float]:
+    """
+    Rejoue hors ligne la décision de fetch_vivino sur des recherches mémorisées.
+    scored : [(priorité, best, confiance), …] ; priorité 0 = recherche
+    principale, rang + 1 = requête de repli (cf. attempts).
+    Mêmes règles que la cascade en direct : la recherche principale l'emporte
+    si elle a un candidat ; sinon lots de VIVINO_CASCADE_WIDTH, un candidat
+    ≥ VIVINO_CASCADE_ACCEPT coupe (le plus prioritaire), le premier lot qui
+    trouve quelque chose est départagé par _cascade_pick.
+    """
+    scored = sorted(scored, key=lambda r: r[0])
+    main = [r for r in scored if r[0] == 0]
+    if main and main[0][1]:
+        return main[0][1], main[0][2]
+    fallbacks = [(prio - 1, best, conf) for prio, best, conf in scored if prio > 0]
+    arrived: list[tuple[int, dict | None, float]] = []
+    for rank, best, conf in fallbacks:
+        if arrived and rank // VIVINO_CASCADE_WIDTH != arrived[-1][0] // VIVINO_CASCADE_WIDTH \
+                and any(r[1] for r in arrived):
+            break   # le lot précédent a trouvé : le suivant n'a pas été lancé
+        if best and conf >= VIVINO_CASCADE_ACCEPT:
+            return best, conf
+        arrived.append((rank, best, conf))
+    return _cascade_pick(arrived)
+
+
+_VIVINO_EXPLORE_URL = "https://www.vivino.com/api/explore/explore"
+
+
+def _vivino_explore_params(query: str, wine_type_id: int) -> dict:
+    return {
+        "language": "fr",
+        "country_codes[]": "fr",
+        "price_range_max": 300,
+        "price_range_min": 0,
+        "wine_type_ids[]": wine_type_id,
+        "q": query,
+        "order_by": "ratings_count",   # tri par popularité ≈ pertinence (seule valeur valide)
+    }
+
+
+def _vivino_api_candidates(records: list) -> list[dict]:
+    """Records explore/explore → candidats au format de choose_best_vivino_candidate."""
+    candidates = []
+    for r in records[:VIVINO_CANDIDATES_MAX]:
+        vintage_obj = r.get("vintage", {}) or {}
+        wine_obj    = vintage_obj.get("wine", {}) or {}
+        title = f"{wine_obj.get('name','')} {vintage_obj.get('name','')}".strip()
+        seo = (wine_obj.get("seo_name") or "").strip().lstrip("/")
+        if seo and not seo.startswith(("w/", "wines/")):
+            seo = f"wines/{seo}"
+        c_url = f"https://www.vivino.com/{seo}" if seo else ""
+        candidates.append({"title": title, "year": _safe_year(vintage_obj.get("year")),
+                            "record": r, "url": c_url})
+    return candidates
+
+
+def _vivino_winery_fallback(records: list, query: str) -> str:
+    """Nom du domaine du 1er record s'il n'apparaît pas déjà dans la query."""
+    if not records:
+        return ""
+    w0 = ((records[0].get("vintage") or {}).get("wine") or {})
+    winery_name = (w0.get("winery") or {}).get("name", "")
+    if winery_name and _norm_ascii(winery_name) not in _norm_ascii(query):
+        return winery_name
+    return ""
+
+
+def _vivino_api_result(best: dict, confidence: float, vintage) -> dict:
+    """Candidat API retenu → entrée enrichie (note, domaine, région, cépages, structure)."""
+    picked      = best.get("record", {})
+    vintage_obj = picked.get("vintage", {}) or {}
+    wine_obj    = vintage_obj.get("wine", {}) or {}
+    stats       = vintage_obj.get("statistics", wine_obj.get("statistics", {})) or {}
+    vy = _safe_year(vintage_obj.get("year"))
+
+    seo_name = (wine_obj.get("seo_name") or "").strip().lstrip("/")
+    if seo_name and not seo_name.startswith(("w/", "wines/")):
+        seo_name = f"wines/{seo_name}"
+    vivino_url = f"https://www.vivino.com/{seo_name}" if seo_name else ""
+
+    vmatch = None
+    if vintage and vy:    vmatch = (vintage == vy)
+    elif not vintage:     vmatch = True
+
+    # ── Extraction enrichie des données Vivino ─────────────────────────
+    style   = wine_obj.get("style") or {}
+    region_obj = wine_obj.get("region") or {}
+    winery_obj = wine_obj.get("winery") or {}
+    taste   = wine_obj.get("taste") or {}
+    structure = (taste.get("structure") or {})
+
+    grapes_vivino = [g.get("name", "") for g in (style.get("grapes") or []) if g.get("name")]
+
+    return {
+        "rating":             stats.get("ratings_average"),
+        "ratings_count":      int(stats.get("ratings_count") or 0),
+        "ratings_count_all":  int((wine_obj.get("statistics") or {}).get("ratings_count") or 0),
+        "vivino_url":         vivino_url,
+        "vivino_year":        vy,
+        "vintage_match":      vmatch,
+        "match_confidence":   round(confidence, 3),
+        # Nouvelles données
+        "vivino_name":        wine_obj.get("name", ""),
+        "winery":             winery_obj.get("name", ""),
+        "vivino_region":      region_obj.get("name", ""),
+        "vivino_region_seo":  region_obj.get("seo_name", ""),
+        "country":            (region_obj.get("country") or {}).get("code", ""),
+        "grapes":             grapes_vivino,
+        "style_name":         style.get("regional_name") or style.get("seo_name", ""),
+        "is_natural":         bool(wine_obj.get("is_natural")),
+        "acidity":            structure.get("acidity"),
+        "tannin":             structure.get("tannin"),
+        "sweetness":          structure.get("sweetness"),
+        "body":               structure.get("intensity"),
+    }
+
+
 def fetch_vivino_via_api(query: str, vintage, slug: str = "vins-rouges",
                          _tried: set | None = None,
                          rejected_urls: set | None = None,
-                         grapes_hint: list | None = None) -> dict | None:
+                         grapes_hint: list | None = None,
+                         _attempts: list | None = None) -> dict | None:
     """
     Appel API Vivino avec cascade de requêtes de repli.
     - grapes_hint : cépages extraits du nom Leclerc → boostent le scoring
     - winery.name : utilisé comme fallback query si aucun candidat trouvé
     - Extraction enrichie : winery, region, grapes, taste, type_id
+    Les candidats de chaque requête sont persistés (save_wine_candidates) pour
+    run_rematch_vivino, comme dans fetch_vivino.
     """
+    if _attempts is None:
+        attempts: list[list] = []
+        try:
+            return fetch_vivino_via_api(query, vintage, slug=slug, _tried=_tried,
+                                        rejected_urls=rejected_urls,
+                                        grapes_hint=grapes_hint, _attempts=attempts)
+        finally:
+            save_wine_candidates(slug, query, vintage, extract_region(query),
+                                 grapes_hint or [], attempts)
     if _tried is None:
         _tried = {query}
     wine_type_id = VIVINO_TYPE_IDS.get(slug, 1)
@@ -2377,71 +4117,71 @@ def fetch_vivino_via_api(query: str, vintage, slug: str = "vins-rouges",
     _rejected    = rejected_urls or set()
     _grapes_hint = grapes_hint or []
     try:
-        _vivino_wait_if_throttled()   # attendre si 429 récent
-        resp = _SESSION.get(
-            "https://www.vivino.com/api/explore/explore",
-            params={
-                "language": "fr",
-                "country_codes[]": "fr",
-                "price_range_max": 300,
-                "price_range_min": 0,
-                "wine_type_ids[]": wine_type_id,
-                "q": query,
-                "order_by": "ratings_count",   # tri par popularité ≈ pertinence (seule valeur valide)
-            },
-            timeout=VIVINO_API_TIMEOUT,
-        )
-        if resp.status_code == 429:
-            delay = _vivino_set_backoff(resp.headers.get("Retry-After", ""))
-            time.sleep(delay)
-            return None
-        if resp.status_code == 403:
-            # IP bloquée — incrémenter compteur global, ne pas faire de fallbacks
-            n403 = _vivino_inc_403()
-            if n403 == 1:   # loguer une seule fois
+        # L'API ignore le millésime : une seule entrée de mémo pour tous les millésimes
+        memo_key = _search_memo_key("api", query, None, wine_type_id)
+        records  = _search_memo_get(memo_key)
+        if records is None:
+            if not _vivino_wait_if_throttled():   # jeton du régulateur (False = disjoncteur ouvert)
+                return None
+            try:
+                resp = _SESSION.get(
+                    _VIVINO_EXPLORE_URL,
+                    params=_vivino_explore_params(query, wine_type_id),
+                    timeout=VIVINO_API_TIMEOUT,
+                )
+            except requests.RequestException:
+                # Timeout/connexion : compter l'échec (libère aussi la sonde semi-ouverte)
+                _VIVINO_GOV.on_error("error")
+                return None
+            if resp.status_code == 429:
+                # Pause globale : les prochains acquire() attendent la fin du Retry-After
+                _vivino_set_backoff(resp.headers.get("Retry-After", ""))
+                return None
+            if resp.status_code == 403:
+                # IP bloquée — incrémenter compteur global, ne pas faire de fallbacks
+                n403 = _vivino_inc_403()
+                if n403 == 1:   # loguer une seule fois
+                    import logging as _log
+                    _log.warning(f"[Vivino API] HTTP 403 pour {query!r} — IP bloquée ({n403})")
+                return None
+            if resp.status_code != 200:
+                _VIVINO_GOV.on_error("error")
                 import logging as _log
-                _log.warning(f"[Vivino API] HTTP 403 pour {query!r} — IP bloquée ({n403})")
-            return None
-        if resp.status_code != 200:
-            import logging as _log
-            ct = resp.headers.get("Content-Type", "?")
-            _log.warning(
-                f"[Vivino API] HTTP {resp.status_code} pour {query!r} "
-                f"| Content-Type: {ct} "
-                f"| Body: {resp.text[:120]!r}"
-            )
-            return None
+                ct = resp.headers.get("Content-Type", "?")
+                _log.warning(
+                    f"[Vivino API] HTTP {resp.status_code} pour {query!r} "
+                    f"| Content-Type: {ct} "
+                    f"| Body: {resp.text[:120]!r}"
+                )
+                return None
 
-        # Vérifier que la réponse est bien du JSON (anti-scraping renvoie parfois du HTML)
-        ct = resp.headers.get("Content-Type", "")
-        if "json" not in ct:
-            import logging as _log
-            _log.warning(
-                f"[Vivino API] Réponse non-JSON pour {query!r} "
-                f"| Content-Type: {ct} | Body: {resp.text[:120]!r}"
-            )
-            return None
+            # Vérifier que la réponse est bien du JSON (anti-scraping renvoie parfois du HTML)
+            ct = resp.headers.get("Content-Type", "")
+            if "json" not in ct:
+                _VIVINO_GOV.on_error("error")
+                import logging as _log
+                _log.warning(
+                    f"[Vivino API] Réponse non-JSON pour {query!r} "
+                    f"| Content-Type: {ct} | Body: {resp.text[:120]!r}"
+                )
+                return None
 
-        data = resp.json()
-        records = (data.get("explore_vintage", {}) or {}).get("records", [])
-        # Si la clé explore_vintage est absente, loguer la structure pour déboguer
-        if "explore_vintage" not in data:
-            import logging as _log
-            _log.warning(
-                f"[Vivino API] Clé explore_vintage absente pour {query!r} "
-                f"| Clés top-level: {list(data.keys())[:8]}"
-            )
-        candidates = []
-        for r in records[:VIVINO_CANDIDATES_MAX]:
-            vintage_obj = r.get("vintage", {}) or {}
-            wine_obj    = vintage_obj.get("wine", {}) or {}
-            title = f"{wine_obj.get('name','')} {vintage_obj.get('name','')}".strip()
-            seo = (wine_obj.get("seo_name") or "").strip().lstrip("/")
-            if seo and not seo.startswith(("w/", "wines/")):
-                seo = f"wines/{seo}"
-            c_url = f"https://www.vivino.com/{seo}" if seo else ""
-            candidates.append({"title": title, "year": _safe_year(vintage_obj.get("year")),
-                                "record": r, "url": c_url})
+            _VIVINO_GOV.on_success()
+            data = resp.json()
+            records = (data.get("explore_vintage", {}) or {}).get("records", [])
+            # Si la clé explore_vintage est absente, loguer la structure pour déboguer
+            if "explore_vintage" not in data:
+                import logging as _log
+                _log.warning(
+                    f"[Vivino API] Clé explore_vintage absente pour {query!r} "
+                    f"| Clés top-level: {list(data.keys())[:8]}"
+                )
+            else:
+                records = [_trim_vivino_record(r) for r in records[:VIVINO_CANDIDATES_MAX]]
+                _search_memo_put(memo_key, records)
+        candidates = _vivino_api_candidates(records)
+        # Priorité 0 = requête principale, puis ordre des requêtes de repli
+        _attempts.append([query, candidates, len(_attempts)])
 
         best, confidence = choose_best_vivino_candidate(
             query, vintage, candidates, region=region,
@@ -2453,71 +4193,249 @@ def fetch_vivino_via_api(query: str, vintage, slug: str = "vins-rouges",
             fallbacks = _fallback_queries(query, vintage, rejections=_rejs_for_fallback)
 
             # Fallback winery : si le 1er candidat a un winery connu, le tenter
-            if records:
-                w0 = ((records[0].get("vintage") or {}).get("wine") or {})
-                winery_name = (w0.get("winery") or {}).get("name", "")
-                if winery_name and _norm_ascii(winery_name) not in _norm_ascii(query):
-                    if winery_name not in _tried:
-                        fallbacks = [winery_name] + fallbacks
+            winery_name = _vivino_winery_fallback(records, query)
+            if winery_name and winery_name not in _tried:
+                fallbacks = [winery_name] + fallbacks
 
             for fallback_q in fallbacks:
                 if fallback_q not in _tried:
                     _tried.add(fallback_q)
                     result = fetch_vivino_via_api(fallback_q, vintage, slug=slug,
                                                   _tried=_tried, rejected_urls=_rejected,
-                                                  grapes_hint=_grapes_hint)
+                                                  grapes_hint=_grapes_hint, _attempts=_attempts)
                     if result:
                         return result
             return None
 
-        picked      = best.get("record", {})
-        vintage_obj = picked.get("vintage", {}) or {}
-        wine_obj    = vintage_obj.get("wine", {}) or {}
-        stats       = vintage_obj.get("statistics", wine_obj.get("statistics", {})) or {}
-        vy = _safe_year(vintage_obj.get("year"))
+        return _vivino_api_result(best, confidence, vintage)
+    except Exception:
+        return None
 
-        seo_name = (wine_obj.get("seo_name") or "").strip().lstrip("/")
-        if seo_name and not seo_name.startswith(("w/", "wines/")):
-            seo_name = f"wines/{seo_name}"
-        vivino_url = f"https://www.vivino.com/{seo_name}" if seo_name else ""
 
-        vmatch = None
-        if vintage and vy:    vmatch = (vintage == vy)
-        elif not vintage:     vmatch = True
+# ── Client API asynchrone (httpx, HTTP/2 keep-alive) ────────────────────────
+# Même décision que fetch_vivino_via_api (choose_best_vivino_candidate), mais
+# les requêtes d'un catalogue entier partent ensemble sur un seul pool de
+# connexions, bornées par _VIVINO_API_WORKERS et le régulateur _VIVINO_GOV.
+# httpx est optionnel : sans lui, run_vivino_api_pass ne fait rien.
 
-        # ── Extraction enrichie des données Vivino ─────────────────────────
-        style   = wine_obj.get("style") or {}
-        region_obj = wine_obj.get("region") or {}
-        winery_obj = wine_obj.get("winery") or {}
-        taste   = wine_obj.get("taste") or {}
-        structure = (taste.get("structure") or {})
+def _vivino_async_client():
+    import httpx
+    try:
+        import h2  # noqa: F401 — HTTP/2 si disponible, sinon HTTP/1.1 keep-alive
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        headers=VIVINO_API_HEADERS,
+        timeout=httpx.Timeout(VIVINO_API_TIMEOUT),
+        limits=httpx.Limits(max_connections=_VIVINO_API_WORKERS,
+                            max_keepalive_connections=_VIVINO_API_WORKERS),
+        follow_redirects=True,
+    )
 
-        grapes_vivino = [g.get("name", "") for g in (style.get("grapes") or []) if g.get("name")]
 
-        return {
-            "rating":             stats.get("ratings_average"),
-            "ratings_count":      int(stats.get("ratings_count") or 0),
-            "ratings_count_all":  int((wine_obj.get("statistics") or {}).get("ratings_count") or 0),
-            "vivino_url":         vivino_url,
-            "vivino_year":        vy,
-            "vintage_match":      vmatch,
-            "match_confidence":   round(confidence, 3),
-            # Nouvelles données
-            "vivino_name":        wine_obj.get("name", ""),
-            "winery":             winery_obj.get("name", ""),
-            "vivino_region":      region_obj.get("name", ""),
-            "vivino_region_seo":  region_obj.get("seo_name", ""),
-            "country":            (region_obj.get("country") or {}).get("code", ""),
-            "grapes":             grapes_vivino,
-            "style_name":         style.get("regional_name") or style.get("seo_name", ""),
-            "is_natural":         bool(wine_obj.get("is_natural")),
-            "acidity":            structure.get("acidity"),
-            "tannin":             structure.get("tannin"),
-            "sweetness":          structure.get("sweetness"),
-            "body":               structure.get("intensity"),
-        }
-    except Exception:
+async def _vivino_acquire_async(timeout: float) -> bool:
+    """
+    _VIVINO_GOV.acquire() (bloquant) dans un thread, sûr à l'annulation : si la
+    tâche est annulée pendant l'attente, le jeton obtenu ensuite est rendu au
+    régulateur au lieu d'être perdu (ou de bloquer la sonde semi-ouverte).
+    """
+    import asyncio
+    lock, state = threading.Lock(), {"cancelled": False, "granted": False}
+
+    def _acquire() -> bool:
+        ok = _VIVINO_GOV.acquire(timeout)
+        with lock:
+            if ok and state["cancelled"]:
+                _VIVINO_GOV.release()
+                return False
+            state["granted"] = ok
+        return ok
+
+    try:
+        return await asyncio.to_thread(_acquire)
+    except asyncio.CancelledError:
+        with lock:
+            state["cancelled"] = True
+            if state["granted"]:
+                _VIVINO_GOV.release()
+        raise
+
+
+async def _vivino_explore_async(client, sem, query: str, wine_type_id: int,
+                                deadline: float) -> list | None:
+    """
+    Records explore/explore (mémo compris) pour une query.
+    None = requête impossible (disjoncteur, 403/429, budget épuisé, erreur).
+    """
+    import asyncio
+    import httpx
+    memo_key = _search_memo_key("api", query, None, wine_type_id)
+    records  = _search_memo_get(memo_key)
+    if records is not None:
+        return records
+    async with sem:
+        # False = disjoncteur ouvert ou budget dépassé
+        if not await _vivino_acquire_async(deadline - time.time()):
+            return None
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            _VIVINO_GOV.release()
+            return None
+        try:
+            resp = await client.get(_VIVINO_EXPLORE_URL,
+                                    params=_vivino_explore_params(query, wine_type_id),
+                                    timeout=min(VIVINO_API_TIMEOUT, remaining))
+        except httpx.HTTPError:
+            _VIVINO_GOV.on_error("error")
+            return None
+        except asyncio.CancelledError:
+            _VIVINO_GOV.release()   # requête annulée (cascade coupée, budget) : pas de verdict
+            raise
+    if resp.status_code == 429:
+        _vivino_set_backoff(resp.headers.get("Retry-After", ""))
+        return None
+    if resp.status_code == 403:
+        _vivino_inc_403()
         return None
+    if resp.status_code != 200 or "json" not in resp.headers.get("Content-Type", ""):
+        _VIVINO_GOV.on_error("error")
+        return None
+    _VIVINO_GOV.on_success()
+    data = resp.json()
+    if "explore_vintage" not in data:
+        return []
+    records = [_trim_vivino_record(r) for r in
+               ((data.get("explore_vintage") or {}).get("records") or [])[:VIVINO_CANDIDATES_MAX]]
+    _search_memo_put(memo_key, records)
+    return records
+
+
+async def fetch_vivino_via_api_async(client, sem, query: str, vintage,
+                                     slug: str = "vins-rouges",
+                                     rejected_urls: set | None = None,
+                                     grapes_hint: list | None = None,
+                                     rejections: dict | None = None,
+                                     budget: float = VIVINO_WINE_BUDGET_S) -> dict | None:
+    """
+    Version asynchrone de fetch_vivino_via_api.
+    - budget : secondes allouées au vin, cascade de repli comprise
+    - Les requêtes de repli partent par lots de VIVINO_CASCADE_WIDTH ; chaque
+      résultat est évalué dès son arrivée et le premier dont la confiance atteint
+      VIVINO_CASCADE_ACCEPT annule les autres (sinon _cascade_pick départage)
+    """
+    import asyncio
+    deadline     = time.time() + budget
+    wine_type_id = VIVINO_TYPE_IDS.get(slug, 1)
+    _rejected    = rejected_urls or set()
+    _grapes_hint = grapes_hint or []
+    attempts: list[list] = []   # [query, candidats, priorité] → save_wine_candidates
+
+    def _decide(q: str, records: list, prio: int) -> dict | None:
+        candidates = _vivino_api_candidates(records)
+        attempts.append([q, candidates, prio])
+        best, confidence = choose_best_vivino_candidate(
+            q, vintage, candidates, region=extract_region(q),
+            rejected_urls=_rejected, grapes_hint=_grapes_hint, slug=slug)
+        return _vivino_api_result(best, confidence, vintage) if best else None
+
+    async def _attempt(rank: int, q: str) -> tuple[int, dict | None]:
+        try:
+            records = await _vivino_explore_async(client, sem, q, wine_type_id, deadline)
+            return rank, (_decide(q, records, rank + 1) if records is not None else None)
+        except Exception:
+            return rank, None
+
+    async def _cascade() -> dict | None:
+        records = await _vivino_explore_async(client, sem, query, wine_type_id, deadline)
+        if records is None:
+            return None
+        result = _decide(query, records, 0)
+        if result:
+            return result
+        fallbacks = _fallback_queries(query, vintage, rejections=rejections)
+        winery_name = _vivino_winery_fallback(records, query)
+        if winery_name:
+            fallbacks = [winery_name] + [q for q in fallbacks if q != winery_name]
+        queries = [q for q in fallbacks if q != query]
+        arrived: list[tuple[int, dict | None, float]] = []
+        # Par lots de VIVINO_CASCADE_WIDTH, comme la cascade Selenium : le lot
+        # suivant ne part que si aucun candidat n'a été trouvé
+        for start in range(0, len(queries), VIVINO_CASCADE_WIDTH):
+            tasks = [asyncio.create_task(_attempt(rank, q)) for rank, q in
+                     enumerate(queries[start:start + VIVINO_CASCADE_WIDTH], start)]
+            try:
+                for fut in asyncio.as_completed(tasks):
+                    rank, result = await fut
+                    conf = (result or {}).get("match_confidence", 0.0)
+                    if result and conf >= VIVINO_CASCADE_ACCEPT:
+                        return result
+                    arrived.append((rank, result, conf))
+            finally:
+                for t in tasks:
+                    t.cancel()
+            if any(r[1] for r in arrived):
+                break
+        return _cascade_pick(arrived)[0]
+
+    try:
+        return await asyncio.wait_for(_cascade(), timeout=max(0.1, deadline - time.time()))
+    except Exception:   # budget épuisé (TimeoutError) ou erreur inattendue
+        return None
+    finally:
+        save_wine_candidates(slug, query, vintage, extract_region(query), _grapes_hint, attempts)
+
+
+def run_vivino_api_pass(slug: str, wines: list, rejections: dict | None = None,
+                        budget: float = VIVINO_API_PASS_BUDGET_S,
+                        on_result=None) -> dict[int, dict]:
+    """
+    Passe API async sur une liste de vins, dans un budget global fixe.
+    Retourne {index dans wines: résultat} pour les vins trouvés ; on_result(i, vd)
+    est appelé dans le thread appelant à chaque vin trouvé.
+    """
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return {}
+    import asyncio
+    _rej = rejections if rejections is not None else load_vivino_rejections()
+
+    async def _main() -> dict[int, dict]:
+        found: dict[int, dict] = {}
+        sem      = asyncio.Semaphore(_VIVINO_API_WORKERS)   # requêtes HTTP en vol
+        wine_sem = asyncio.Semaphore(_VIVINO_API_WORKERS)   # vins en vol (le budget par vin démarre ici)
+
+        async with _vivino_async_client() as client:
+            async def _one(i: int, w: dict):
+                key = build_query(w["name"])
+                if is_hard_to_match(key, _rej):
+                    return i, None
+                async with wine_sem:
+                    if _vivino_is_blocked():
+                        return i, None
+                    return i, await fetch_vivino_via_api_async(
+                        client, sem, key, w.get("vintage"), slug=slug,
+                        rejected_urls=get_rejected_urls(key, _rej),
+                        grapes_hint=w.get("grapes_hint") or [], rejections=_rej)
+
+            tasks = [asyncio.create_task(_one(i, w)) for i, w in enumerate(wines)]
+            try:
+                for fut in asyncio.as_completed(tasks, timeout=budget):
+                    i, vd = await fut
+                    if vd:
+                        found[i] = vd
+                        if on_result: on_result(i, vd)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return found
+
+    return asyncio.run(_main())
 
 def parse_wine_jsonld(html: str) -> dict:
     rating, count = None, 0
@@ -2564,11 +4482,51 @@ def parse_wine_jsonld(html: str) -> dict:
 # SELENIUM
 # ═══════════════════════════════════════════════════════════════════════════
 
-def make_driver():
+# ── Profil allégé : blocage de ressources par site (CDP) ────────────────────
+# On ne lit que le DOM et le JSON embarqué : images, médias, polices et
+# trackers ne servent à rien. Le blocage est posé par onglet via
+# Network.setBlockedURLs ; chaque site garde ce dont son rendu a besoin.
+_BLOCK_PATTERNS = {
+    "image":   ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "media":   ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "font":    ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "css":     ["*.css*"],
+    "tracker": ["*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+                "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+                "*hotjar.com*", "*contentsquare.net*", "*criteo.com*", "*criteo.net*",
+                "*bat.bing.com*", "*analytics.tiktok.com*", "*cdn.segment.com*",
+                "*abtasty.com*", "*tagcommander.com*", "*sentry.io*"],
+}
+# Catégories autorisées par site : le lazy-loading Angular de Leclerc dépend
+# de la mise en page (CSS) ; Vivino est lu via l'état React embarqué.
+_BLOCK_ALLOW = {
+    "leclerc": {"css"},
+    "vivino":  set(),
+}
+
+
+def _apply_resource_blocking(driver, site: str) -> bool:
+    """Pose le profil de blocage de `site` sur l'onglet courant. False si CDP indisponible."""
+    if not DRIVER_BLOCK_RESOURCES:
+        return False
+    allow = _BLOCK_ALLOW.get(site, set())
+    urls = [u for cat, pats in _BLOCK_PATTERNS.items() if cat not in allow for u in pats]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+        return True
+    except Exception:
+        return False
+
+
+def make_driver(page_load_strategy: str = DRIVER_PAGE_LOAD_STRATEGY):
     """
     ③ CORRIGÉ (indirectement) : les appelants initialisent désormais
     driver = None avant d'appeler make_driver(), ce qui évite le NameError
     dans les blocs finally si make_driver() lève une exception.
+
+    page_load_strategy "eager" : les appelants attendent déjà leurs éléments
+    (WebDriverWait), inutile d'attendre images et scripts tiers.
     """
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service
@@ -2584,6 +4542,7 @@ def make_driver():
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
     opts.add_experimental_option("useAutomationExtension", False)
+    opts.page_load_strategy = page_load_strategy
     for b in ["/usr/bin/chromium","/usr/bin/chromium-browser",
               "/usr/bin/google-chrome","/usr/bin/google-chrome-stable"]:
         if os.path.exists(b): opts.binary_location = b; break
@@ -2593,11 +4552,12 @@ def make_driver():
     return webdriver.Chrome(options=opts)
 
 
-def _set_store_cookie(driver) -> None:
+def _set_store_cookie(driver) -> bool:
     """
     Injecte le cookie de sélection de magasin avant de scraper.
     Sans ce cookie, e.leclerc affiche les prix à 0 car le JS ne sait
     pas quel magasin charger (le fragment #oaf-sign-code= n'est pas fiable).
+    Retourne True si le cookie a pu être posé.
     """
     try:
         # Naviguer sur la page d'accueil pour établir le domaine
@@ -2615,43 +4575,338 @@ def _set_store_cookie(driver) -> None:
             "domain": ".e.leclerc",
             "path":   "/",
         })
+        return True
+    except Exception:
+        return False   # non-bloquant : l'app fonctionne même sans cookie
+
+
+# ── Pool de drivers Chrome ──────────────────────────────────────────────────
+# Un démarrage à froid de Chrome coûte 2–5 s et ~150 Mo : les drivers sont
+# prêtés puis rendus au pool au lieu d'être quittés. Chaque entrée est un
+# dict {"driver", "created", "cookie"} ; "cookie" = cookie magasin déjà posé.
+# Au prêt : recyclage si trop vieux (DRIVER_MAX_AGE) ou en mauvaise santé
+# (onglet planté, session détachée). Partagé par les chemins Leclerc et Vivino.
+# L'état vit dans un st.cache_resource : un global serait recréé à chaque
+# rerun, orphelinant les drivers au repos et multipliant les hooks atexit.
+@st.cache_resource
+def _driver_pool() -> tuple[dict, threading.Condition]:
+    pool = {"idle": [], "live": 0}   # live = drivers existants (au repos + prêtés)
+    atexit.register(lambda: shutdown_driver_pool())   # 1× par process
+    return pool, threading.Condition()
+
+_DRIVER_POOL, _driver_pool_cond = _driver_pool()
+
+def _driver_healthy(driver) -> bool:
+    """Vérifie que la session répond encore (crash d'onglet, session détachée…)."""
+    try:
+        driver.execute_script("return 1")
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+def _discard_driver(entry: dict) -> None:
+    try: entry["driver"].quit()
+    except Exception: pass
+    with _driver_pool_cond:
+        _DRIVER_POOL["live"] -= 1
+        _driver_pool_cond.notify()
+
+
+def _lease_driver(store_cookie: bool = False, timeout: float | None = None) -> dict:
+    """
+    Prête un driver du pool (bloque si DRIVER_POOL_SIZE drivers sont déjà prêtés).
+    timeout : attente maximale en s, TimeoutError au-delà.
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        entry = None
+        with _driver_pool_cond:
+            while not _DRIVER_POOL["idle"] and _DRIVER_POOL["live"] >= DRIVER_POOL_SIZE:
+                left = None if deadline is None else deadline - time.time()
+                if left is not None and left <= 0:
+                    raise TimeoutError("pool de drivers saturé")
+                _driver_pool_cond.wait(left)
+            if _DRIVER_POOL["idle"]:
+                entry = _DRIVER_POOL["idle"].pop()   # LIFO : le plus récemment utilisé
+            else:
+                _DRIVER_POOL["live"] += 1            # place réservée pour un nouveau driver
+        if entry is None:
+            try:
+                entry = {"driver": make_driver(), "created": time.time(), "cookie": False,
+                         "block": None}
+            except Exception:
+                with _driver_pool_cond:
+                    _DRIVER_POOL["live"] -= 1
+                    _driver_pool_cond.notify()
+                raise
+        elif (time.time() - entry["created"] > DRIVER_MAX_AGE
+              or not _driver_healthy(entry["driver"])):
+            _discard_driver(entry)
+            continue
+        site = "leclerc" if store_cookie else "vivino"
+        if entry.get("block") != site:
+            _apply_resource_blocking(entry["driver"], site)
+            entry["block"] = site
+        if store_cookie and not entry["cookie"]:
+            entry["cookie"] = _set_store_cookie(entry["driver"])
+        return entry
+
+
+def _release_driver(entry: dict, suspect: bool = False) -> None:
+    """Rend un driver au pool. suspect=True (exception pendant l'usage) → contrôle de santé."""
+    if (time.time() - entry["created"] > DRIVER_MAX_AGE
+            or (suspect and not _driver_healthy(entry["driver"]))):
+        _discard_driver(entry)
+        return
+    try:
+        entry["driver"].get("about:blank")   # libère la page (DOM, JS) entre deux jobs
     except Exception:
-        pass   # non-bloquant : l'app fonctionne même sans cookie
+        _discard_driver(entry)
+        return
+    with _driver_pool_cond:
+        _DRIVER_POOL["idle"].append(entry)
+        _driver_pool_cond.notify()
+
+
+@contextmanager
+def pooled_driver(store_cookie: bool = False):
+    """
+    with pooled_driver(store_cookie=True) as driver: …
+    Remplace le couple make_driver()/driver.quit() : le navigateur reste chaud
+    pour le job suivant, avec le cookie magasin déjà posé si demandé.
+    """
+    entry = _lease_driver(store_cookie)
+    ok = False
+    try:
+        yield entry["driver"]
+        ok = True
+    finally:
+        _release_driver(entry, suspect=not ok)
+
+
+def shutdown_driver_pool() -> None:
+    """Quitte tous les drivers au repos (arrêt du process)."""
+    with _driver_pool_cond:
+        idle = list(_DRIVER_POOL["idle"])
+        _DRIVER_POOL["idle"].clear()
+    for entry in idle:
+        _discard_driver(entry)
+
+
+def save_page_fixtures(slug: str = "vins-rouges", query: str = "chateau margaux",
+                       log=print) -> list[Path]:
+    """
+    Enregistre une page catégorie Leclerc (cookie magasin posé) et une page de
+    recherche Vivino dans tests/fixtures/pages/ : rejouées par les tests de
+    parité bs4/lxml (parse_page) et de vivino_candidates_from_search. Hors
+    Streamlit :
+        python -c "import streamlit_app as s; s.save_page_fixtures()"
+    """
+    out_dir = Path(__file__).parent / "tests" / "fixtures" / "pages"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    targets = [
+        (leclerc_url(slug), True, "app-product-card", out_dir / f"leclerc_{slug}.html"),
+        (f"https://www.vivino.com/search/wines?q={requests.utils.quote(query)}&language=fr",
+         False, "[href*='/w/']", out_dir / f"vivino_{_norm_ascii(query).replace(' ', '-')}.html"),
+    ]
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    saved = []
+    for url, store_cookie, ready_css, path in targets:
+        with pooled_driver(store_cookie=store_cookie) as driver:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, 20).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ready_css)))
+            except Exception:
+                # Page de consentement, blocage, DOM changé : pas une fixture de parité
+                if log: log(f"❌ {url} : éléments attendus absents, page non enregistrée")
+                continue
+            time.sleep(2)
+            path.write_text(driver.page_source, encoding="utf-8")
+        saved.append(path)
+        if log: log(f"✅ {path}")
+    return saved
+
+
+def measure_driver_profiles(urls: list[str] | None = None, runs: int = 3, log=print) -> list[dict]:
+    """
+    Banc de mesure des profils driver : « complet » (load normal, rien de bloqué)
+    contre « allégé » (DRIVER_PAGE_LOAD_STRATEGY + _BLOCK_PATTERNS).
+    Pour chaque URL et chaque profil : temps de driver.get() jusqu'aux éléments
+    attendus, octets transférés et nombre de requêtes (Performance API, cache
+    vidé à chaque passage), tas JS. Hors Streamlit :
+        python -c "import streamlit_app as s; s.measure_driver_profiles()"
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    urls = urls or [leclerc_url("vins-rouges"),
+                    "https://www.vivino.com/search/wines?q=chateau%20margaux&language=fr"]
+    ready_css = {"leclerc": "app-product-card", "vivino": "[href*='/w/']"}
+    # Octets : document + ressources (les requêtes bloquées n'apparaissent pas)
+    perf_js = """
+        const nav = performance.getEntriesByType('navigation')[0] || {};
+        const res = performance.getEntriesByType('resource');
+        return [(nav.transferSize || 0) + res.reduce((a, r) => a + (r.transferSize || 0), 0),
+                res.length + 1,
+                (performance.memory || {}).usedJSHeapSize || 0];"""
+    rows = []
+    for profile, strategy, block in [("complet", "normal", False),
+                                     ("allégé", DRIVER_PAGE_LOAD_STRATEGY, True)]:
+        driver = None
+        try:
+            driver = make_driver(page_load_strategy=strategy)
+            for url in urls:
+                site = "leclerc" if "e.leclerc" in url else "vivino"
+                if block:
+                    _apply_resource_blocking(driver, site)
+                else:
+                    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+                times, sizes, reqs, heaps = [], [], [], []
+                for _ in range(runs):
+                    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                    t0 = time.time()
+                    driver.get(url)
+                    try:
+                        WebDriverWait(driver, 20).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, ready_css[site])))
+                    except Exception:
+                        pass
+                    times.append(time.time() - t0)
+                    time.sleep(1.0)   # laisser arriver les ressources tardives (profil complet)
+                    size, n, heap = driver.execute_script(perf_js)
+                    sizes.append(size); reqs.append(n); heaps.append(heap)
+                    driver.get("about:blank")
+                row = {"profile": profile, "site": site,
+                       "s_per_page": round(sorted(times)[len(times) // 2], 2),
+                       "kb_per_page": round(sum(sizes) / len(sizes) / 1024),
+                       "requests": round(sum(reqs) / len(reqs)),
+                       "heap_mb": round(max(heaps) / 1e6, 1)}
+                rows.append(row)
+                if log: log(f"{profile:8} {site:8} {row['s_per_page']:6.2f} s  "
+                            f"{row['kb_per_page']:7} Ko  {row['requests']:4} req  {row['heap_mb']:6} Mo JS")
+        finally:
+            if driver is not None:
+                try: driver.quit()
+                except Exception: pass
+    return rows
 
 
 
+def _fetch_leclerc_page(driver, slug: str, p: int) -> str:
+    """Charge la page p du catalogue et retourne son HTML une fois les cartes présentes."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    driver.get(leclerc_url(slug, p))
+    waited = False
+    try:
+        WebDriverWait(driver, 18).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "app-product-card")))
+        waited = True
+    except Exception:
+        pass
+    time.sleep(0.8 if waited else 2.5)   # court si déjà chargé, long sinon
+    return driver.page_source
+
+
 def _scrape_all_leclerc_pages(driver, slug: str, log=None) -> list:
     """
     Itère toutes les pages Leclerc et retourne la liste brute de toutes les cartes.
     Facteur commun de scrape_leclerc_full, check_availability, repair_zero_prices.
 
-    Gestion du timing :
+    La page 1 (qui donne nb_pages) est chargée sur le driver fourni ; les pages
+    2..nb_pages sont réparties sur LECLERC_PAGE_WORKERS drivers (le driver fourni
+    + des drivers prêtés par le pool) via une file de pages. La fusion et la
+    déduplication EAN/nom se font ensuite dans l'ordre des pages, comme en séquentiel.
+
+    Gestion du timing (par page, cf. _fetch_leclerc_page) :
     - WebDriverWait jusqu'à ce que les cartes soient présentes (rapide si le site charge vite)
     - sleep court (0.8s) après wait réussi, sleep plus long (2.5s) si wait échoué
     """
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    _CARD_CSS = "app-product-card"
+    import queue
+    if log: log(f"  📄 Page 1/1…")
+    cards, nb_pages = parse_page(_fetch_leclerc_page(driver, slug, 1))
+    nb_pages = min(nb_pages, MAX_PAGES)
+    pages: dict[int, list] = {1: cards}
+    if cards and nb_pages > 1:
+        todo: "queue.Queue[int]" = queue.Queue()
+        for p in range(2, nb_pages + 1):
+            todo.put(p)
+
+        # Les workers ne touchent ni `pages` ni log (un log Streamlit appelé hors
+        # du thread du script, sans ScriptRunContext, est perdu) : tout passe par
+        # _results_q — (page, cartes) dès qu'une page est lue, (_PAGE_LOG, message)
+        # pour le journal, (_WORKER_DONE, None) en fin de worker.
+        _results_q: "queue.Queue[tuple]" = queue.Queue()
+        _PAGE_LOG, _WORKER_DONE = object(), object()
+
+        def _drain(drv) -> bool:
+            """Vide la file sur `drv` → driver sain ?"""
+            while True:
+                try: p = todo.get_nowait()
+                except queue.Empty: return True
+                try:
+                    _results_q.put((p, parse_cards(_fetch_leclerc_page(drv, slug, p))))
+                except Exception as e:
+                    # Pas de page vide à la place : p reste absente de `pages` et
+                    # passe au rattrapage séquentiel (qui lève si elle échoue encore).
+                    # Driver suspect → ce worker s'arrête.
+                    _results_q.put((_PAGE_LOG, f"  ⚠️ Page {p} : {type(e).__name__} — reprise plus tard"))
+                    return False
+
+        def _pooled_drain() -> None:
+            # Driver supplémentaire : _lease_driver bloque tant que DRIVER_POOL_SIZE
+            # drivers sont prêtés (jobs Vivino…). Attente par tranches d'1 s pour
+            # abandonner dès que les autres workers ont vidé la file.
+            while not todo.empty():
+                try:
+                    entry = _lease_driver(store_cookie=True, timeout=1.0)
+                except TimeoutError:
+                    continue
+                ok = False
+                try:
+                    ok = _drain(entry["driver"])
+                    return
+                finally:
+                    _release_driver(entry, suspect=not ok)
+
+        def _worker(drain, *args) -> None:
+            try:
+                drain(*args)
+            except Exception as e:
+                _results_q.put((_PAGE_LOG, f"  ⚠️ Driver supplémentaire indisponible : {e}"))
+            finally:
+                _results_q.put((_WORKER_DONE, None))
+
+        n_extra = max(0, min(LECLERC_PAGE_WORKERS, nb_pages - 1) - 1)
+        if log: log(f"  📄 Pages 2–{nb_pages} sur {n_extra + 1} drivers…")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_extra + 1) as ex:
+            ex.submit(_worker, _drain, driver)
+            for _ in range(n_extra):
+                ex.submit(_worker, _pooled_drain)
+            n_alive = n_extra + 1
+            while n_alive:
+                p, payload = _results_q.get()
+                if p is _WORKER_DONE:
+                    n_alive -= 1
+                elif p is _PAGE_LOG:
+                    if log: log(payload)
+                else:
+                    pages[p] = payload
+                    if log: log(f"  📥 Page {p}/{nb_pages} : {len(payload)} cartes")
+        # Pages perdues par un worker en échec → rattrapage séquentiel ; une
+        # nouvelle exception remonte (pas de catalogue tronqué en silence)
+        for p in range(2, nb_pages + 1):
+            if p not in pages:
+                pages[p] = parse_cards(_fetch_leclerc_page(driver, slug, p))
+
     all_cards, seen_keys = [], set()
-    nb_pages = 1
-    for p in range(1, MAX_PAGES + 1):
-        if log: log(f"  📄 Page {p}/{nb_pages}…")
-        driver.get(leclerc_url(slug, p))
-        waited = False
-        try:
-            WebDriverWait(driver, 18).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, _CARD_CSS)))
-            waited = True
-        except Exception:
-            pass
-        time.sleep(0.8 if waited else 2.5)   # court si déjà chargé, long sinon
-        html = driver.page_source
-        if p == 1:
-            cards, nb_pages = parse_page(html)
-            nb_pages = min(nb_pages, MAX_PAGES)
-        else:
-            cards = parse_cards(html)
+    for p in range(1, nb_pages + 1):
+        cards = pages.get(p) or []
         if not cards:
             if log: log(f"  ⚠️ Page {p} vide — arrêt")
             break
@@ -2663,22 +4918,22 @@ def _scrape_all_leclerc_pages(driver, slug: str, log=None) -> list:
                 new.append(c)
         all_cards.extend(new)
         if log: log(f"  ✅ Page {p} : +{len(new)} cartes (total {len(all_cards)})")
-        if p >= nb_pages:
-            break
     return all_cards
 
+def _scrape_leclerc_catalogue(slug: str, log=None) -> list:
+    """Catalogue Leclerc : client HTTP d'abord, Selenium (pool) en fallback."""
+    cards = fetch_leclerc_catalogue_http(slug, log)
+    if cards is not None:
+        return cards
+    if log: log("  🌐 API catalogue indisponible — fallback navigateur")
+    with pooled_driver(store_cookie=True) as driver:
+        return _scrape_all_leclerc_pages(driver, slug, log)
+
+
 def scrape_leclerc_full(slug: str, log=None) -> list:
-    """Scrape complet Leclerc via _scrape_all_leclerc_pages."""
-    driver = None
-    try:
-        driver = make_driver()
-        _set_store_cookie(driver)
-        if log: log(f"🌐 Scrape complet Leclerc ({slug})…")
-        wines = _scrape_all_leclerc_pages(driver, slug, log)
-    finally:
-        if driver is not None:
-            try: driver.quit()
-            except Exception: pass
+    """Scrape complet Leclerc via _scrape_leclerc_catalogue (HTTP puis Selenium)."""
+    if log: log(f"🌐 Scrape complet Leclerc ({slug})…")
+    wines = _scrape_leclerc_catalogue(slug, log)
     if log: log(f"✅ {len(wines)} vins récupérés")
     update_price_history(wines)
     return wines
@@ -2687,21 +4942,14 @@ def scrape_leclerc_full(slug: str, log=None) -> list:
 def check_availability(slug: str, cached_wines: list, log=None) -> list:
     """
     Vérifie stock + met à jour les prix depuis les données fraîches du site.
-    Utilise _scrape_all_leclerc_pages pour itérer toutes les pages.
+    Utilise _scrape_leclerc_catalogue (HTTP puis Selenium) pour toutes les pages.
     """
-    driver = None
     fresh_cards: list[dict] = []
     try:
-        driver = make_driver()
-        _set_store_cookie(driver)
         if log: log(f"🌐 Vérification stock + prix ({slug})…")
-        fresh_cards = _scrape_all_leclerc_pages(driver, slug, log)
+        fresh_cards = _scrape_leclerc_catalogue(slug, log)
     except Exception as e:
         if log: log(f"⚠️ Vérif. stock échouée : {e}")
-    finally:
-        if driver is not None:
-            try: driver.quit()
-            except Exception: pass
 
     # Indexer par EAN et par nom pour mise à jour disponibilité + prix
     current_eans: set[str]        = {c["ean"] for c in fresh_cards if c.get("ean")}
@@ -2730,9 +4978,40 @@ def check_availability(slug: str, cached_wines: list, log=None) -> list:
     if log: log(f"✅ {nok} dispo · {len(result)-nok} indispo · {n_price_updated} prix mis à jour")
     return result
 
+_VIVINO_ENRICHED_EMPTY = {
+    "ratings_count_all": 0, "vivino_name": "", "winery": "",
+    "vivino_region": "", "vivino_region_seo": "", "country": "",
+    "grapes": [], "style_name": "", "is_natural": False,
+    "acidity": None, "tannin": None, "sweetness": None, "body": None,
+}
+
+
+def _vivino_result_from_search(best: dict, confidence: float, vintage) -> dict:
+    """Résultat Vivino à partir d'un candidat de page de recherche portant déjà sa note."""
+    if best.get("record"):
+        # Même extraction que l'API ; l'URL reste celle du lien de la carte
+        res = _vivino_api_result(best, confidence, vintage)
+        res["vivino_url"] = best.get("url") or res["vivino_url"]
+        if res.get("rating") is None:
+            res["rating"], res["ratings_count"] = best.get("rating"), best.get("ratings_count", 0)
+        return res
+    vy = _safe_year(best.get("year")) if best.get("year") else None
+    vmatch = None
+    if vintage and vy:   vmatch = (vintage == vy)
+    elif not vintage:    vmatch = True
+    return {**_VIVINO_ENRICHED_EMPTY,
+            "rating":           best["rating"],
+            "ratings_count":    best.get("ratings_count", 0),
+            "vivino_url":       best.get("url", ""),
+            "vivino_year":      vy,
+            "vintage_match":    vmatch,
+            "match_confidence": round(confidence, 3)}
+
+
 def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", region: str = "") -> dict:
     """
-    2 navigations avec choix du meilleur candidat (nom + millésime + région).
+    1 navigation (2 si la page de recherche ne porte pas la note) avec choix du
+    meilleur candidat (nom + millésime + région).
 
     ⑩ CORRIGÉ : le double appel API (ligne 865 + ligne 885 si Selenium échoue)
     est éliminé : l'API n'est appelée qu'une fois en entrée. Si elle retourne
@@ -2756,40 +5035,145 @@ def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", reg
     best, confidence = None, 0.0
     tried_sel = {sel_query}
 
+    _type_id = VIVINO_TYPE_IDS.get(slug, 1)
+    # [[query Selenium, candidats bruts, priorité], …] → re-matching hors ligne.
+    # Priorité 0 = recherche principale, rang + 1 = requête de repli.
+    attempts: list[list] = []
+    _card_css = "[class*='wineCard'],[class*='wine-card'],[class*='averageValue'],[href*='/w/']"
+
+    def _search_url(q):
+        return f"https://www.vivino.com/search/wines?q={requests.utils.quote(q)}&language=fr"
+
+    def _score(q, cands, prio=0):
+        attempts.append([q, cands, prio])
+        return choose_best_vivino_candidate(query, vintage, cands, region=region,
+                                            grapes_hint=_gh, slug=slug)
+
     def _selenium_search(q):
-        """Effectue une recherche Selenium et retourne (best, confidence)."""
+        """Effectue une recherche Selenium (ou relit le mémo) et retourne (best, confidence)."""
         try:
-            driver.get(f"https://www.vivino.com/search/wines"
-                       f"?q={requests.utils.quote(q)}&language=fr")
-            _sel_waited = False
-            try:
-                WebDriverWait(driver, 9).until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR,
-                         "[class*='wineCard'],[class*='wine-card'],[class*='averageValue'],[href*='/w/']")))
-                _sel_waited = True
-            except Exception: pass
-            time.sleep(0.5 if _sel_waited else 1.5)
-            cands = vivino_candidates_from_search(driver.page_source)
-            return choose_best_vivino_candidate(query, vintage, cands, region=region,
-                                                grapes_hint=_gh, slug=slug)
+            memo_key = _search_memo_key("sel", q, vintage, _type_id)
+            cands = _search_memo_get(memo_key)
+            if cands is None:
+                if not _vivino_wait_if_throttled():
+                    return None, 0.0
+                try:
+                    driver.get(_search_url(q))
+                except Exception:
+                    _VIVINO_GOV.on_error("error")   # libère aussi la sonde semi-ouverte
+                    raise
+                _sel_waited = False
+                try:
+                    WebDriverWait(driver, 9).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, _card_css)))
+                    _sel_waited = True
+                except Exception: pass
+                time.sleep(0.5 if _sel_waited else 1.5)
+                if not _sel_waited and _VIVINO_BLOCKED_TITLE_RE.search(driver.title or ""):
+                    _vivino_set_backoff()   # page de blocage : signal pour l'ordonnanceur
+                    return None, 0.0
+                _VIVINO_GOV.on_success()
+                html = driver.page_source
+                cands = vivino_candidates_from_search(html)
+                # Cache négatif seulement si Vivino affiche explicitement « aucun
+                # résultat » (readyState ne suffit pas : chargement eager)
+                if cands or _vivino_search_empty(html):
+                    _search_memo_put(memo_key, cands)
+            return _score(q, cands)
         except Exception:
             return None, 0.0
 
+    def _selenium_cascade(queries):
+        """
+        Cascade de repli spéculative : VIVINO_CASCADE_WIDTH requêtes lancées
+        ensemble (un onglet chacune sur le même driver), chaque page évaluée dès
+        qu'elle a chargé. Un candidat ≥ VIVINO_CASCADE_ACCEPT ferme les autres
+        onglets ; sinon le lot suivant n'est lancé que si aucun candidat n'a été
+        trouvé, et _cascade_pick départage.
+        """
+        main = driver.current_window_handle
+        arrived: list[tuple[int, dict | None, float]] = []
+        for start in range(0, len(queries), VIVINO_CASCADE_WIDTH):
+            tabs: dict[str, list] = {}   # handle → [rang, query, clé mémo, t0, t_cartes]
+            try:
+                for rank, q in enumerate(queries[start:start + VIVINO_CASCADE_WIDTH], start):
+                    memo_key = _search_memo_key("sel", q, vintage, _type_id)
+                    cands = _search_memo_get(memo_key)
+                    if cands is not None:
+                        best_q, conf_q = _score(q, cands, rank + 1)
+                        if best_q and conf_q >= VIVINO_CASCADE_ACCEPT:
+                            return best_q, conf_q
+                        arrived.append((rank, best_q, conf_q))
+                        continue
+                    if not _vivino_wait_if_throttled():
+                        break
+                    # Navigation non bloquante : la page charge pendant qu'on ouvre les suivantes
+                    driver.switch_to.new_window("tab")
+                    _apply_resource_blocking(driver, "vivino")   # CDP : profil par onglet
+                    driver.execute_script("window.location.href = arguments[0];", _search_url(q))
+                    tabs[driver.current_window_handle] = [rank, q, memo_key, time.time(), None]
+
+                while tabs:
+                    for handle, tab in list(tabs.items()):
+                        rank, q, memo_key, t0, t_cards = tab
+                        driver.switch_to.window(handle)
+                        has_cards = driver.execute_script(
+                            "return !!document.querySelector(arguments[0]);", _card_css)
+                        now = time.time()
+                        if has_cards and t_cards is None:
+                            tab[4] = t_cards = now
+                        # Même attente que _selenium_search : cartes + 0.5 s, ou 9 s + 1.5 s
+                        if not ((t_cards is not None and now - t_cards >= 0.5) or now - t0 >= 10.5):
+                            continue
+                        del tabs[handle]
+                        if t_cards is None and _VIVINO_BLOCKED_TITLE_RE.search(driver.title or ""):
+                            _vivino_set_backoff()
+                            driver.close()
+                            return _cascade_pick(arrived)
+                        _VIVINO_GOV.on_success()
+                        html = driver.page_source
+                        driver.close()
+                        cands = vivino_candidates_from_search(html)
+                        if cands or _vivino_search_empty(html):
+                            _search_memo_put(memo_key, cands)
+                        best_q, conf_q = _score(q, cands, rank + 1)
+                        if best_q and conf_q >= VIVINO_CASCADE_ACCEPT:
+                            return best_q, conf_q
+                        arrived.append((rank, best_q, conf_q))
+                    if tabs:
+                        time.sleep(0.15)
+            except Exception:
+                pass
+            finally:
+                for handle in tabs:   # requêtes annulées : jeton rendu au régulateur
+                    _VIVINO_GOV.release()
+                    try:
+                        driver.switch_to.window(handle)
+                        driver.close()
+                    except Exception: pass
+                try: driver.switch_to.window(main)
+                except Exception: pass
+            if any(r[1] for r in arrived):
+                break
+        return _cascade_pick(arrived)
+
     try:
         best, confidence = _selenium_search(sel_query)
 
-        # Cascade de repli si aucun candidat trouvé
+        # Cascade de repli (spéculative, par lots) si aucun candidat trouvé
         if not best:
+            fallbacks = []
             for fallback_q in _fallback_queries(wine_name, vintage):
                 fsel = f"{fallback_q} {vintage}" if vintage else fallback_q
                 if fsel not in tried_sel:
                     tried_sel.add(fsel)
-                    best, confidence = _selenium_search(fsel)
-                    if best:
-                        break
+                    fallbacks.append(fsel)
+            if fallbacks:
+                best, confidence = _selenium_cascade(fallbacks)
     except Exception:
         return EMPTY
+    finally:
+        save_wine_candidates(slug, query, vintage, region, _gh, attempts)
 
     if not best:
         return EMPTY
@@ -2798,12 +5182,10 @@ def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", reg
     if not wine_url:
         return EMPTY
 
-    _enriched_empty = {
-        "ratings_count_all": 0, "vivino_name": "", "winery": "",
-        "vivino_region": "", "vivino_region_seo": "", "country": "",
-        "grapes": [], "style_name": "", "is_natural": False,
-        "acidity": None, "tannin": None, "sweetness": None, "body": None,
-    }
+    # Champs enrichis depuis l'état de la page de recherche (vides sans record)
+    _enriched_empty = ({k: v for k, v in _vivino_api_result(best, confidence, vintage).items()
+                        if k in _VIVINO_ENRICHED_EMPTY}
+                       if best.get("record") else _VIVINO_ENRICHED_EMPTY)
 
     vy = _safe_year(best.get("year")) if best.get("year") else None
     vmatch = None
@@ -2811,20 +5193,20 @@ def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", reg
     elif not vintage:    vmatch = True
 
     # ── Optimisation : rating déjà disponible depuis la page de recherche ──
-    # Si vivino_candidates_from_search a pu extraire le rating directement,
+    # L'état React de la page de recherche porte note + champs enrichis :
     # on évite la 2e navigation (wine page) : gain ~1.5s par vin.
     if best.get("rating"):
-        return {**_enriched_empty,
-                "rating":           best["rating"],
-                "ratings_count":    best.get("ratings_count", 0),
-                "vivino_url":       wine_url,
-                "vivino_year":      vy,
-                "vintage_match":    vmatch,
-                "match_confidence": round(confidence, 3)}
+        return _vivino_result_from_search(best, confidence, vintage)
 
     # ── Fallback : naviguer sur la page du vin pour extraire le rating ──────
     try:
-        driver.get(wine_url)
+        if not _vivino_wait_if_throttled():
+            raise RuntimeError("Vivino : disjoncteur ouvert")
+        try:
+            driver.get(wine_url)
+        except Exception:
+            _VIVINO_GOV.on_error("error")
+            raise
         _wine_waited = False
         try:
             WebDriverWait(driver, 9).until(
@@ -2833,6 +5215,10 @@ def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", reg
             _wine_waited = True
         except Exception: pass
         time.sleep(0.5 if _wine_waited else 1.5)
+        if not _wine_waited and _VIVINO_BLOCKED_TITLE_RE.search(driver.title or ""):
+            _vivino_set_backoff()
+            return EMPTY
+        _VIVINO_GOV.on_success()
         d = parse_wine_jsonld(driver.page_source)
         # Affiner le millésime depuis l'URL de la page wine (plus fiable que le titre)
         m = _VIVINO_YEAR_URL_RE.search(driver.current_url)
@@ -2855,10 +5241,45 @@ def fetch_vivino(driver, wine_name: str, vintage, slug: str = "vins-rouges", reg
 # ORCHESTRATION
 # ═══════════════════════════════════════════════════════════════════════════
 
-def load_wines_from_cache(slug: str) -> list:
-    lc = load_leclerc_cache(slug)
-    if not lc: return []
-    return _merge_vivino(lc["wines"], load_vivino_cache(slug), load_price_history())
+# ── Catalogue partagé entre sessions ──────────────────────────────────────
+# Une WineTable par slug pour tout le process, reconstruite seulement quand
+# une des tables sources a été écrite (compteurs _store_version) : les sessions
+# et reruns partagent le même résultat parsé et fusionné. Le dict vit dans un
+# st.cache_resource pour survivre au module neuf de chaque rerun ; une table
+# peut donc venir d'une exécution précédente (cf. _is_wine_table).
+@st.cache_resource
+def _catalogue_store() -> tuple[dict, threading.Lock]:
+    return {}, threading.Lock()
+
+
+_catalogue, _catalogue_lock = _catalogue_store()   # slug → (version, table)
+
+
+def catalogue_version(slug: str) -> tuple:
+    """Version des données du catalogue : change exactement à chaque sauvegarde source."""
+    return (_store_version.get(("leclerc", slug), 0),
+            _store_version.get(("vivino", slug), 0),
+            _store_version.get(("price_history", ""), 0))
+
+
+def load_wines_from_cache(slug: str) -> "WineTable | list":
+    ver = catalogue_version(slug)
+    hit = _catalogue.get(slug)
+    if hit and hit[0] == ver:
+        return hit[1]
+    with _catalogue_lock:   # une seule reconstruction à la fois, les autres sessions attendent
+        hit = _catalogue.get(slug)
+        if hit and hit[0] == ver:
+            return hit[1]
+        lc = load_leclerc_cache(slug)
+        if not lc: return []
+        table = _merge_vivino(lc["wines"], load_vivino_cache(slug), load_price_history())
+        table.version = ver
+        if hit:   # ordres de tri mis à jour par insertion depuis la version précédente
+            hit[1].prev = None
+            table.prev = hit[1]
+        _catalogue[slug] = (ver, table)
+        return table
 
 
 def run_check_stock(slug: str, log=None) -> list:
@@ -2889,8 +5310,7 @@ def _api_lookup_wine(wine: dict, slug: str,
     if is_hard_to_match(key, _rej):
         return key, region, None
     rejected = get_rejected_urls(key, _rej)
-    # Délai léger entre requêtes pour éviter de déclencher le rate-limiter
-    time.sleep(0.15)
+    # Débit régulé par _VIVINO_GOV dans fetch_vivino_via_api (plus de sleep fixe)
     result = fetch_vivino_via_api(key, wine.get("vintage"), slug=slug,
                                   rejected_urls=rejected,
                                   grapes_hint=wine.get("grapes_hint") or [])
@@ -2944,12 +5364,34 @@ def _scrape_vivino_list(slug, wines, todo, vc, log):
     if n_skip_hard and log:
         log(f"  ⚠️ {n_skip_hard} vins skippés (trop de rejets précédents)")
 
-    # ── Phase 1 (API) désactivée ──────────────────────────────────────────────
-    # L'API publique Vivino (/api/explore/explore) ignore le paramètre q et retourne
-    # les vins les plus populaires globalement (Marqués de Riscal, Meiomi…) sans
-    # rapport avec la query. Selenium donne des résultats corrects et précis.
+    # ── Phase 1 (API async) — désactivée par défaut (VIVINO_API_PHASE) ────────
+    # L'API publique Vivino (/api/explore/explore) ignore souvent le paramètre q et
+    # retourne les vins les plus populaires globalement (Marqués de Riscal, Meiomi…)
+    # sans rapport avec la query. Selenium donne des résultats corrects et précis.
+    # Activée : passe concurrente bornée (run_vivino_api_pass), seuls les vins non
+    # résolus partent ensuite en Selenium.
+    api_hits: dict[int, dict] = {}
+    if VIVINO_API_PHASE:
+        if log: log(f"⚡ API Vivino async ×{_VIVINO_API_WORKERS} — {len(to_process)} vins "
+                    f"(budget {VIVINO_API_PASS_BUDGET_S}s)…")
+
+        def _api_found(i: int, vd: dict) -> None:
+            nonlocal done_count, found
+            w = to_process[i]
+            vc[_key_of[id(w)]] = _make_vc_entry(vd)
+            ckpt_tick(slug, w.get("ean") or _key_of[id(w)])
+            done_count += 1
+            if vd.get("rating"):
+                found += 1
+
+        api_hits = run_vivino_api_pass(slug, to_process, rejections=_rejections,
+                                       on_result=_api_found)
+        if api_hits:
+            save_vivino_cache(vc, slug)
+        if log: log(f"  ⚡ API : {len(api_hits)}/{len(to_process)} vins résolus")
+
     need_selenium: list[tuple[dict, str]] = [
-        (w, extract_region(w["name"])) for w in to_process
+        (w, extract_region(w["name"])) for i, w in enumerate(to_process) if i not in api_hits
     ]
 
     # ── Selenium (seule phase active) ─────────────────────────────────────
@@ -2961,11 +5403,16 @@ def _scrape_vivino_list(slug, wines, todo, vc, log):
     n_w = min(_VIVINO_SEL_WORKERS, len(need_selenium))
     if log: log(f"🌐 Selenium ×{n_w} workers — {len(need_selenium)} vins…")
 
-    # _results : key → vd (écrit par workers, lu par thread principal)
-    # Thread-safe : workers n'écrivent que dans _results (protégé par lock),
-    # le thread principal est le seul à lire/écrire vc.
-    _results_lock = threading.Lock()
-    _results: dict[str, dict] = {}
+    # _results_q : file (key, vd) alimentée par les workers, consommée par le
+    # thread principal dès l'arrivée de chaque résultat (seul à lire/écrire vc
+    # et à appeler log : hors ScriptRunContext, un log Streamlit est perdu).
+    # (_WORKER_LOG, message) pour le journal ; chaque worker termine par une
+    # sentinelle (_WORKER_DONE, worker_id).
+    import queue
+    _results_q: "queue.Queue[tuple]" = queue.Queue()
+    _WORKER_DONE, _WORKER_LOG = object(), object()
+    _EMPTY_VD = {"rating": None, "ratings_count": 0, "vivino_url": "", "vivino_year": None,
+                 "vintage_match": None, "match_confidence": 0.0}
 
     # _pending : key → (wine, region) — construit avec id() unique pour éviter
     # les collisions de build_query sur deux vins au nom similaire
@@ -2985,105 +5432,158 @@ def _scrape_vivino_list(slug, wines, todo, vc, log):
         _seen_ids[id(w)] = k
         _ns_keyed.append((k, w, r))
 
-    def _worker_scrape(chunk: list[tuple[str,dict,str]], worker_id: int) -> None:
-        """Un worker scrape son chunk avec son propre driver Chrome."""
-        _drv = None
+    # ── Ordonnanceur : file de travail partagée (work-stealing) ─────────────
+    # Les workers tirent le vin suivant dans une file commune : la durée totale
+    # suit le volume de travail et non le chunk le plus lent. Un vin dont le
+    # driver a planté est remis en file (nouvel essai avec un driver neuf, sur
+    # n'importe quel worker). Le nombre de workers actifs s'adapte au rythme
+    # des 429/403 : divisé par 2 à chaque signal, +1 après _SCHED_RAMP_OK succès.
+    # Disjoncteur ouvert : le vin revient en file (rien en cache ni au checkpoint)
+    # et le worker attend le cooldown ; au-delà de _SCHED_BREAKER_WAIT le run
+    # s'arrête comme interrompu.
+    _work_q: "queue.Queue[tuple]" = queue.Queue()
+    for item in _ns_keyed:
+        _work_q.put((*item, 0))
+    _sched_lock = threading.Lock()
+    _sched = {"target": n_w, "ok": 0, "events": _vivino_throttle_count(), "stop": False}
+    _SCHED_MAX_TRIES    = 3
+    _SCHED_RAMP_OK      = 25
+    _SCHED_BREAKER_WAIT = 300   # s : au-delà, le run s'arrête (reprise via checkpoint)
+
+    def _sched_feedback(success: bool) -> None:
+        with _sched_lock:
+            ev = _vivino_throttle_count()
+            if ev > _sched["events"]:
+                _sched["events"], _sched["ok"] = ev, 0
+                if _sched["target"] > 1:
+                    _sched["target"] = max(1, _sched["target"] // 2)
+                    _results_q.put((_WORKER_LOG, f"  🐢 Rate-limit Vivino — "
+                                                 f"{_sched['target']} worker(s) actif(s)"))
+            elif success:
+                _sched["ok"] += 1
+                if _sched["ok"] >= _SCHED_RAMP_OK and _sched["target"] < n_w:
+                    _sched["target"] += 1
+                    _sched["ok"] = 0
+
+    def _worker_scrape(worker_id: int) -> None:
+        """Tire les vins de la file commune ; driver prêté par le pool, respawn après crash."""
+        entry = None
         try:
-            _drv = make_driver()
-            for key, wine, region in chunk:
+            while True:
+                with _sched_lock:
+                    if _sched["stop"]:
+                        return
+                    parked = worker_id >= _sched["target"]
+                if parked:                     # réduit par l'ordonnanceur
+                    if entry is not None:      # driver rendu au pool pendant la pause
+                        _release_driver(entry)
+                        entry = None
+                    if _work_q.empty(): return
+                    time.sleep(1.0)
+                    continue
                 try:
-                    vd = fetch_vivino(_drv, wine["name"], wine.get("vintage"),
+                    key, wine, region, tries = _work_q.get_nowait()
+                except queue.Empty:
+                    return
+                if entry is None:
+                    try:
+                        entry = _lease_driver()
+                    except Exception:
+                        _work_q.put((key, wine, region, tries))   # un autre worker le prendra
+                        return
+                crashed = False
+                try:
+                    vd = fetch_vivino(entry["driver"], wine["name"], wine.get("vintage"),
                                       slug=slug, region=region)
                 except Exception:
-                    vd = {"rating": None, "ratings_count": 0, "vivino_url": "",
-                          "vivino_year": None, "vintage_match": None, "match_confidence": 0.0}
-                with _results_lock:
-                    _results[key] = vd
-        except Exception as _we:
-            # Worker planté → marquer tous ses vins non traités comme vides
-            # pour ne pas bloquer la boucle de polling
-            with _results_lock:
-                for _k, _w, _r in chunk:
-                    if _k not in _results:
-                        _results[_k] = {"rating": None, "ratings_count": 0,
-                                        "vivino_url": "", "vivino_year": None,
-                                        "vintage_match": None, "match_confidence": 0.0}
+                    vd, crashed = dict(_EMPTY_VD), True
+                if crashed or not (vd.get("rating") or vd.get("vivino_url")):
+                    if not _driver_healthy(entry["driver"]):
+                        _discard_driver(entry)          # respawn au prochain vin
+                        entry, crashed = None, True
+                    # Disjoncteur ouvert : le vide vient du régulateur, pas de Vivino.
+                    # Ne rien mettre en cache ni cocher : remettre en file et attendre
+                    # la fin du cooldown, ou arrêter le run s'il est trop long.
+                    wait = _vivino_breaker_wait()
+                    if wait:
+                        _work_q.put((key, wine, region, tries))
+                        if wait > _SCHED_BREAKER_WAIT:
+                            with _sched_lock:
+                                first, _sched["stop"] = not _sched["stop"], True
+                            if first:
+                                _results_q.put((_WORKER_LOG, f"  ⛔ Vivino bloqué ({wait:.0f}s) "
+                                                             f"— arrêt du scraping"))
+                            return
+                        if entry is not None:           # pas de driver immobilisé pendant l'attente
+                            _release_driver(entry)
+                            entry = None
+                        time.sleep(wait)
+                        continue
+                if crashed and tries + 1 < _SCHED_MAX_TRIES:
+                    _work_q.put((key, wine, region, tries + 1))
+                    continue
+                _results_q.put((key, vd))
+                _sched_feedback(bool(vd.get("rating") or vd.get("vivino_url")))
         finally:
-            if _drv:
-                try: _drv.quit()
-                except Exception: pass
-
-    # Découper en chunks round-robin pour équilibrer la charge
-    chunks: list[list] = [[] for _ in range(n_w)]
-    for i, item in enumerate(_ns_keyed):
-        chunks[i % n_w].append(item)
+            if entry is not None:
+                _release_driver(entry)
+            _results_q.put((_WORKER_DONE, worker_id))
 
-    threads = [threading.Thread(target=_worker_scrape, args=(chunk, i), daemon=True)
-               for i, chunk in enumerate(chunks) if chunk]
+    threads = [threading.Thread(target=_worker_scrape, args=(i,), daemon=True)
+               for i in range(n_w)]
     for t in threads: t.start()
 
-    # Polling : traiter les résultats au fur et à mesure
     _processed: set[str] = set()
     _total = len(_ns_keyed)
-    try:
-        while len(_processed) < _total:
-            # Arrêt anticipé si tous les threads sont morts ET plus rien à venir
-            if all(not t.is_alive() for t in threads):
-                with _results_lock:
-                    _ready_now = {k: v for k, v in _results.items() if k not in _processed}
-                # Traiter ce qui reste puis sortir
-                for key, vd in _ready_now.items():
-                    if key not in _pending: continue
-                    wine, region = _pending[key]
-                    ean = wine.get("ean") or key
-                    _existing = vc.get(_key_of[id(wine)], {})
-                    _new_has  = bool(vd.get("rating") or vd.get("vivino_url"))
-                    _had_data = bool(_existing.get("rating") or _existing.get("vivino_url"))
-                    vc[_key_of[id(wine)]] = _make_vc_entry(vd) if _new_has else (
-                        {**_existing, "cached_at": _existing.get("cached_at", time.time())}
-                        if _had_data else _make_vc_entry(vd))
-                    ckpt_tick(slug, ean)
-                    done_count += 1; _processed.add(key)
-                    if vd.get("rating"): found += 1
-                # Marquer les non-traités comme interrompus
-                if len(_processed) < _total:
-                    interrupted = True
-                break
 
-            with _results_lock:
-                _ready = {k: v for k, v in _results.items() if k not in _processed}
-            for key, vd in _ready.items():
-                if key not in _pending: continue
-                wine, region = _pending[key]
-                ean = wine.get("ean") or key
-                orig_key = _key_of[id(wine)]
-                _existing = vc.get(orig_key, {})
-                _new_has  = bool(vd.get("rating") or vd.get("vivino_url"))
-                _had_data = bool(_existing.get("rating") or _existing.get("vivino_url"))
-                if _new_has:
-                    vc[orig_key] = _make_vc_entry(vd)
-                elif _had_data:
-                    vc[orig_key] = {**_existing, "cached_at": _existing.get("cached_at", time.time())}
-                else:
-                    vc[orig_key] = _make_vc_entry(vd)
-                ckpt_tick(slug, ean)
-                done_count += 1
-                _processed.add(key)
-                if vd.get("rating"):
-                    found += 1
-                    if log: log(f"  ✅ [{done_count}/{len(wines)}] {wine['name'][:38]}\n"
-                                f"     ★ {vd['rating']} · {fmt_count(vd.get('ratings_count'))} avis")
-                    if found % 20 == 0:
-                        save_vivino_cache(vc, slug)
-                elif _new_has:
-                    if log: log(f"  🔗 [{done_count}/{len(wines)}] {wine['name'][:38]} — URL trouvée")
-                elif _had_data:
-                    if log: log(f"  ⚠️ [{done_count}/{len(wines)}] {wine['name'][:38]} — non trouvé, données conservées")
-                else:
-                    if log: log(f"  🔍 [{done_count}/{len(wines)}] {wine['name'][:45]} — aucune note")
-            if len(_processed) < _total:
-                time.sleep(0.5)
-        for t in threads: t.join(timeout=10)   # laisser le temps aux drivers de se fermer
+    def _apply(key: str, vd: dict) -> None:
+        """Intègre un résultat worker dans vc (+ checkpoint, log)."""
+        nonlocal done_count, found
+        wine, region = _pending[key]
+        ean = wine.get("ean") or key
+        orig_key = _key_of[id(wine)]
+        _existing = vc.get(orig_key, {})
+        _new_has  = bool(vd.get("rating") or vd.get("vivino_url"))
+        _had_data = bool(_existing.get("rating") or _existing.get("vivino_url"))
+        if _new_has:
+            vc[orig_key] = _make_vc_entry(vd)
+        elif _had_data:
+            vc[orig_key] = {**_existing, "cached_at": _existing.get("cached_at", time.time())}
+        else:
+            vc[orig_key] = _make_vc_entry(vd)
+        ckpt_tick(slug, ean)
+        done_count += 1
+        _processed.add(key)
+        if vd.get("rating"):
+            found += 1
+            if log: log(f"  ✅ [{done_count}/{len(wines)}] {wine['name'][:38]}\n"
+                        f"     ★ {vd['rating']} · {fmt_count(vd.get('ratings_count'))} avis")
+            if found % 20 == 0:
+                save_vivino_cache(vc, slug)
+        elif _new_has:
+            if log: log(f"  🔗 [{done_count}/{len(wines)}] {wine['name'][:38]} — URL trouvée")
+        elif _had_data:
+            if log: log(f"  ⚠️ [{done_count}/{len(wines)}] {wine['name'][:38]} — non trouvé, données conservées")
+        else:
+            if log: log(f"  🔍 [{done_count}/{len(wines)}] {wine['name'][:45]} — aucune note")
+
+    # Consommation événementielle : bloque sur la file, traite chaque résultat
+    # dès son arrivée, s'arrête quand tous les workers ont envoyé leur sentinelle.
+    try:
+        n_alive = len(threads)
+        while n_alive:
+            key, vd = _results_q.get()
+            if key is _WORKER_DONE:
+                n_alive -= 1
+                continue
+            if key is _WORKER_LOG:
+                if log: log(vd)
+                continue
+            if key in _pending and key not in _processed:
+                _apply(key, vd)
+        if len(_processed) < _total:
+            interrupted = True
+        for t in threads: t.join(timeout=10)   # laisser le temps aux drivers de revenir au pool
     except Exception as e:
         interrupted = True
         for t in threads: t.join(timeout=3)
@@ -3092,6 +5592,7 @@ def _scrape_vivino_list(slug, wines, todo, vc, log):
         save_vivino_cache(vc, slug, _force_gist=True)
         remaining = len(wines) - done_count
         if interrupted or remaining > 0:
+            ckpt_compact(slug)
             if log: log(f"\n⚠️ {done_count}/{len(wines)} traités · {remaining} restants\n"
                         f"💡 Cliquez **▶️ Reprendre** pour continuer")
         else:
@@ -3103,7 +5604,7 @@ def _scrape_vivino_list(slug, wines, todo, vc, log):
 def repair_zero_prices(slug: str, log=None) -> int:
     """
     Rescrape uniquement les vins dont price=0 ou price=None dans le cache.
-    Utilise Selenium avec cookie magasin pour récupérer les vrais prix.
+    Utilise le catalogue HTTP (magasin STORE_CODE) ou Selenium avec cookie magasin.
     Retourne le nombre de vins corrigés.
     """
     lc = load_leclerc_cache(slug)
@@ -3117,12 +5618,9 @@ def repair_zero_prices(slug: str, log=None) -> int:
         return 0
 
     if log: log(f"🔧 {len(zero_price)} vins avec prix=0 détectés, rescraping…")
-    driver = None
     fixed = 0
     try:
-        driver = make_driver()
-        _set_store_cookie(driver)
-        fresh_cards = _scrape_all_leclerc_pages(driver, slug, log)
+        fresh_cards = _scrape_leclerc_catalogue(slug, log)
         fresh_by_ean  = {c["ean"]:  c["price"] for c in fresh_cards if c.get("ean") and c.get("price") and c["price"] > 0}
         fresh_by_name = {c["name"]: c["price"] for c in fresh_cards if c.get("price") and c["price"] > 0}
 
@@ -3144,10 +5642,6 @@ def repair_zero_prices(slug: str, log=None) -> int:
             if log: log(f"⚠️ Aucun prix récupéré — le site n'a peut-être pas chargé les prix")
     except Exception as e:
         if log: log(f"❌ Erreur : {e}")
-    finally:
-        if driver is not None:
-            try: driver.quit()
-            except Exception: pass
     return fixed
 
 
@@ -3285,6 +5779,86 @@ def run_refresh_stale_vivino(slug: str, log=None) -> list:
     )
 
 
+def run_rematch_vivino(slug: str, log=None) -> list:
+    """
+    Re-matching hors ligne : rejoue choose_best_vivino_candidate (version lot)
+    sur les candidats persistés par fetch_vivino et les clients API (sync et
+    async), sans réseau ni navigateur.
+    Applique les changements de barème / VIVINO_SIMILARITY_MIN à tout le catalogue.
+    - même URL           → confiance mise à jour
+    - nouveau candidat   → note reprise de la page de recherche ; sinon entrée vidée
+                           (🔎 Compléter les manquants ira chercher la note)
+    - plus aucun candidat → entrée vidée
+    Les entrées verrouillées / corrigées à la main ne sont jamais touchées.
+    """
+    lc = load_leclerc_cache(slug)
+    if not lc:
+        if log: log("❌ Pas de cache Leclerc.")
+        return []
+    wines = [dict(w) for w in lc["wines"]]
+    for w in wines: w.setdefault("available", True)
+    vc    = load_vivino_cache(slug)
+    store = _store_load("candidates", slug)
+    rej   = load_vivino_rejections()
+
+    jobs, owners, n_missing, seen = [], [], 0, set()
+    for w in wines:
+        key = build_query(w["name"])
+        if key in seen: continue
+        seen.add(key)
+        e = vc.get(key, {})
+        if e.get("locked") or e.get("manual_override") or e.get("suppressed"):
+            continue
+        rec = store.get(key)
+        if not rec:
+            n_missing += 1
+            continue
+        for i, attempt in enumerate(rec.get("attempts", [])):
+            # Anciennes entrées [query, candidats] : priorité = ordre d'enregistrement
+            cands, prio = attempt[1], (attempt[2] if len(attempt) > 2 else i)
+            jobs.append({"query": key, "vintage": rec.get("vintage"), "candidates": cands,
+                         "region": rec.get("region", ""), "grapes_hint": rec.get("grapes_hint"),
+                         "rejected_urls": get_rejected_urls(key, rej), "slug": slug})
+            owners.append((key, prio))
+    if log: log(f"🎯 Re-matching hors ligne : {len(seen) - n_missing} vins "
+                f"({len(jobs)} recherches mémorisées · {n_missing} sans candidats)…")
+
+    scored: dict[str, list] = {}
+    for (key, prio), (best, conf) in zip(owners, choose_best_vivino_candidates_batch(jobs)):
+        scored.setdefault(key, []).append((prio, best, conf))
+    # Même décision que la cascade en direct (priorités, lots, seuil d'acceptation)
+    picks = {key: _cascade_replay(res) for key, res in scored.items()}
+
+    changed = same = 0
+    empty = {"rating": None, "ratings_count": 0, "vivino_url": "", "vivino_year": None,
+             "vintage_match": None, "match_confidence": 0.0}
+    for key, (best, conf) in picks.items():
+        old     = vc.get(key, {})
+        old_url = old.get("vivino_url", "")
+        new_url = (best or {}).get("url", "")
+        if new_url == old_url:
+            if new_url and old.get("match_confidence") != round(conf, 3):
+                vc[key] = {**old, "match_confidence": round(conf, 3)}
+            same += 1
+            continue
+        changed += 1
+        # Candidats API : note dans le record, pas au niveau du candidat
+        res = (_vivino_result_from_search(best, conf, store[key].get("vintage"))
+               if best and (best.get("rating") or best.get("record")) else {})
+        if res.get("rating"):
+            vc[key] = _make_vc_entry(res)
+            what = f"→ {best.get('title', '')[:40]} ★ {res['rating']}"
+        else:
+            vc[key] = _make_vc_entry({**_VIVINO_ENRICHED_EMPTY, **empty})
+            what = "→ à compléter" if best else "→ aucun candidat retenu"
+        if log and changed <= 50:
+            log(f"  🔀 {key[:40]} : {old_url.rsplit('/', 1)[-1][:30] or '∅'} {what}")
+    if changed:
+        save_vivino_cache(vc, slug, _force_gist=True)
+    if log: log(f"✅ Re-matching : {changed} matchs modifiés · {same} inchangés")
+    return _merge_vivino(wines, vc, load_price_history())
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # RENDU HTML
 # ═══════════════════════════════════════════════════════════════════════════
@@ -3308,7 +5882,84 @@ def fmt_count(n) -> str:
     return f"{n:,}".replace(",", "\u202f")
 
 
+# ── Cache des fragments HTML ───────────────────────────────────────────────
+# Pendant un job, _live_polling relance le script toutes les ~2 s : les cartes
+# de la page courante sont identiques d'un rerun à l'autre. On mémorise le HTML
+# par (empreinte des champs affichés, rang, max_score arrondi), dans un
+# st.cache_resource : les globales du script sont recréées à chaque rerun, le
+# cache lui survit et est partagé par toutes les sessions. Le thème n'entre pas
+# dans la clé : les couleurs passent par les variables CSS (--card, --ink…),
+# le markup est le même en clair et en sombre.
+class _RenderCache:
+    """LRU borné thread-safe de fragments HTML, avec compteurs hits/misses."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render) -> str:
+        with self._lock:
+            html_ = self._data.get(key)
+            if html_ is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return html_
+            self.misses += 1
+        html_ = render()
+        with self._lock:
+            self._data[key] = html_
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return html_
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+@st.cache_resource
+def _render_caches() -> tuple:
+    """(cartes du classement, cartes Bonnes Affaires) — uniques par process serveur."""
+    return _RenderCache(RENDER_CACHE_MAX), _RenderCache(RENDER_CACHE_MAX // 4)
+
+
+_CARD_CACHE, _DEAL_CACHE = _render_caches()
+_FP_ABSENT = ("\x00absent",)   # champ absent (valeur stable d'un rerun à l'autre, ≠ None)
+
+# Champs lus par wine_card_html / deal_card_html (empreinte de la clé de cache)
+_CARD_FIELDS = ("name", "url", "vivino_url", "region", "image", "vintage", "available",
+                "vivino_year", "match_confidence", "score", "rating", "_stale", "is_natural",
+                "grapes", "style_name", "volume_cl", "ratings_count", "price_trend", "price",
+                "vintage_match")
+_DEAL_FIELDS = ("name", "url", "vivino_url", "region", "score", "rating",
+                "ratings_count", "price_trend", "price")
+
+
+def _card_fingerprint(wine, fields: tuple) -> tuple:
+    """Valeurs des champs affichés (absent ≠ None, listes figées en tuples)."""
+    if type(wine).__name__ == "WineRow":   # ligne immuable : empreinte calculée 1× par version
+        memo = wine._t.__dict__.setdefault("_fingerprints", {})
+        fp = memo.get((fields, wine._i))
+        if fp is None:
+            fp = memo[(fields, wine._i)] = tuple(wine.get(f, _FP_ABSENT) for f in fields)
+        return fp
+    return tuple(tuple(v) if type(v) is list else v
+                 for v in (wine.get(f, _FP_ABSENT) for f in fields))
+
+
 def wine_card_html(wine: dict, rank: int, max_score: float) -> str:
+    """Carte du classement, servie depuis _CARD_CACHE quand le vin n'a pas changé."""
+    max_score = round(max_score, 2)   # seau : la barre de score ne bouge pas au 1/100e près
+    return _CARD_CACHE.get_or_render(
+        (_card_fingerprint(wine, _CARD_FIELDS), rank, max_score),
+        lambda: _render_wine_card(wine, rank, max_score))
+
+
+def _render_wine_card(wine: dict, rank: int, max_score: float) -> str:
     cls  = _RANK_CLS.get(rank, "")
     if wine.get("vintage_match") is False: cls = (cls + " vintage-warn").strip()
     if not wine.get("available", True):    cls = (cls + " unavailable").strip()
@@ -3430,6 +6081,45 @@ def wine_card_html(wine: dict, rank: int, max_score: float) -> str:
             f'</div>')
 
 
+def deal_card_html(w: dict, idx_d: int) -> str:
+    """Carte de l'onglet Bonnes Affaires (idx_d = position 0-based), mise en cache."""
+    return _DEAL_CACHE.get_or_render(
+        (_card_fingerprint(w, _DEAL_FIELDS), idx_d),
+        lambda: _render_deal_card(w, idx_d))
+
+
+def _render_deal_card(w: dict, idx_d: int) -> str:
+    score   = w.get("score") or 0
+    trend   = w.get("price_trend", "")
+    trend_h = {"↑": '<span class="p-up">↑</span>',
+               "↓": '<span class="p-down">↓</span>',
+               "=": '<span class="p-eq">=</span>'}.get(trend, "")
+    safe_name = _html.escape(w["name"])
+    safe_url  = _html.escape(w.get("url") or "")
+    safe_viv  = _html.escape(w.get("vivino_url") or "")
+    safe_reg  = _html.escape(w.get("region") or "")
+    url_lec = f'<a href="{safe_url}" target="_blank" class="lnk lnk-lec">🛒 Leclerc</a>' if safe_url else ""
+    url_viv = f'<a href="{safe_viv}" target="_blank" class="lnk lnk-viv">🍷 Vivino</a>' if safe_viv else ""
+    rank_icon = {0:"🥇",1:"🥈",2:"🥉"}.get(idx_d, f"#{idx_d+1}")
+    top_cls = "d-top" if idx_d < 3 else ""
+    reg_txt = f"🗺️ {safe_reg} · " if safe_reg else ""
+    return f"""
+<div class="deal-card {top_cls}">
+  <div style="text-align:center;min-width:56px">
+    <div style="font-size:1.4rem;line-height:1">{rank_icon}</div>
+    <div class="deal-score">{score:.2f}</div>
+    <div class="deal-label">score</div>
+  </div>
+  <div class="deal-body">
+    <div class="deal-name">{safe_name}</div>
+    <div class="deal-meta">{reg_txt}★ {w.get("rating",0):.1f}
+      · {fmt_count(w.get("ratings_count",0))} avis</div>
+    <div class="wine-links" style="margin-top:.3rem">{url_lec}{url_viv}</div>
+  </div>
+  <div class="deal-price"><strong>{(w.get("price") or 0):.2f} €</strong>{trend_h}</div>
+</div>"""
+
+
 _VINTAGE_MATCH_LABEL = {True: "✅", False: "⚠️", None: "—"}
 
 
@@ -3552,73 +6242,31 @@ for k, v in [("wines",[]),("loaded_slug",None),("data_ready",False)]:
 # @st.cache_resource supprimé : on utilise session_state pour ne restaurer qu'1×
 # par session Streamlit, mais permettre une nouvelle tentative si l'instance redémarre.
 def _startup_restore():
-    """Restaure les données depuis le Gist si des fichiers sont absents ou vides.
+    """Restaure les données depuis le Gist si des tables SQLite sont vides.
 
-    Vérifie le CONTENU des fichiers, pas juste leur présence :
-    - Vivino : dict avec au moins 1 entrée
-    - Leclerc : dict avec clé "wines" non vide
-    Un fichier présent mais vide ({} ou {"wines":[]}) est traité comme manquant.
+    Les caches JSON locaux (et leurs .bak) sont déjà importés au chargement
+    du module par _store_migrate_json ; il ne reste ici que le recours Gist.
+    Une table présente mais vide est traitée comme manquante.
     """
-    def _is_valid_vivino(p: Path) -> bool:
-        if not p.exists(): return False
-        try:
-            d = json.loads(p.read_text("utf-8"))
-            return isinstance(d, dict) and len(d) > 0
-        except Exception: return False
-
-    def _is_valid_leclerc(p: Path) -> bool:
-        if not p.exists(): return False
-        try:
-            d = json.loads(p.read_text("utf-8"))
-            return isinstance(d, dict) and len(d.get("wines", [])) > 0
-        except Exception: return False
-
     _SLUGS = ["vins-rouges", "vins-blancs", "vins-roses", "vins-mousseux-et-petillants"]
-    _checks = (
-        [(f"vivino_{s}.json",  _viv_path(s),  _is_valid_vivino)  for s in _SLUGS] +
-        [(f"leclerc_{s}.json", _lec_path(s),  _is_valid_leclerc) for s in _SLUGS]
-    )
+    _checks = ([(_viv_path(s).name, ("vivino", s)) for s in _SLUGS] +
+               [(_lec_path(s).name, ("leclerc", s)) for s in _SLUGS])
 
-    missing = [fname for fname, path, check in _checks if not check(path)]
+    missing = [fname for fname, target in _checks if not _store_count(*target)]
     if not missing:
         return None   # tout est présent ET valide
 
-    # Tentative 1 : backups .bak locaux
-    restored_local = 0
-    still_missing = []
-    for fname in missing:
-        bak = (CACHE_DIR / fname).with_suffix(".bak")
-        if bak.exists():
-            try:
-                content = bak.read_text("utf-8")
-                parsed  = json.loads(content)
-                valid = (len(parsed.get("wines",[])) > 0
-                         if "leclerc" in fname else len(parsed) > 0)
-                if isinstance(parsed, dict) and valid:
-                    (CACHE_DIR / fname).write_text(content, "utf-8")
-                    _invalidate_mem_cache(CACHE_DIR / fname)
-                    restored_local += 1
-                    continue
-            except Exception:
-                pass
-        still_missing.append(fname)
-
-    if not still_missing:
-        return f"✅ {restored_local} fichier(s) restaurés depuis backup local"
-
-    # Tentative 2 : Gist
     if not _gist_is_configured():
         import logging
-        logging.warning(f"[startup] {len(still_missing)} fichier(s) invalides/manquants, Gist non configuré : {still_missing}")
+        logging.warning(f"[startup] {len(missing)} table(s) vide(s), Gist non configuré : {missing}")
         return None
     n = restore_from_gist()
-    total = restored_local + n
-    if total > 0:
-        return f"✅ {total} fichier(s) restaurés (Gist : {n}, backup local : {restored_local})"
+    if n > 0:
+        return f"✅ {n} fichier(s) restaurés depuis le Gist"
     # Dernier recours : logger clairement ce qui manque
     import logging
-    logging.warning(f"[startup] Restauration échouée pour : {still_missing}")
-    return f"⚠️ {len(still_missing)} fichier(s) non restaurés — vérifiez la config Gist"
+    logging.warning(f"[startup] Restauration échouée pour : {missing}")
+    return f"⚠️ {len(missing)} fichier(s) non restaurés — vérifiez la config Gist"
 
 # Restauration 1× par session (pas à chaque rerun)
 if not st.session_state.get("_startup_restore_done"):
@@ -3641,23 +6289,10 @@ def _startup_gist_sync():
     _SLUGS = ["vins-rouges", "vins-blancs", "vins-roses", "vins-mousseux-et-petillants"]
     pushed = 0
     for slug in _SLUGS:
-        for _path_fn, _is_valid in (
-            (_viv_path,  lambda d: isinstance(d, dict) and len(d) > 0),
-            (_lec_path,  lambda d: isinstance(d, dict) and len(d.get("wines", [])) > 0),
-        ):
-            p = _path_fn(slug)
-            if not p.exists():
-                continue
-            try:
-                content = p.read_text("utf-8")
-                parsed  = json.loads(content)
-                if _is_valid(parsed):   # seulement si contenu valide
-                    threading.Thread(
-                        target=gist_push, args=(p.name, content), daemon=False
-                    ).start()
-                    pushed += 1
-            except Exception:
-                pass
+        for _path_fn, _tbl in ((_viv_path, "vivino"), (_lec_path, "leclerc")):
+            if _store_count(_tbl, slug):   # seulement si contenu valide
+                _gist_push_async(_path_fn(slug).name, force=True)
+                pushed += 1
     return pushed
 
 _startup_gist_sync()
@@ -3676,102 +6311,49 @@ if _early_job.get("status") in {"running", "queued"}:
     # cela provoquerait une boucle infinie slug != loaded_slug → rerun → écraser...
     _active_slug  = st.session_state.get("loaded_slug", _early_slug)
     if _early_slug and _early_slug == _active_slug:
-        _early_lc = load_leclerc_cache(_early_slug)
-        if _early_lc:
-            _fresh = _merge_vivino(
-                _early_lc["wines"], load_vivino_cache(_early_slug), load_price_history()
-            )
-            if _fresh:
-                st.session_state.wines       = _fresh
-                st.session_state.loaded_slug = _early_slug
-                st.session_state.data_ready  = True
+        _fresh = load_wines_from_cache(_early_slug)   # catalogue partagé (pas de re-fusion)
+        if _fresh:
+            st.session_state.wines       = _fresh
+            st.session_state.loaded_slug = _early_slug
+            st.session_state.data_ready  = True
 
 # ── SUIVI EN TEMPS RÉEL ───────────────────────────────────────────────────
-# st.fragment(run_every=N) se réexécute automatiquement toutes les N secondes,
-# sans nécessiter d'interaction utilisateur. Quand un job est actif, il
-# déclenche un rerun complet de l'app (scope="app") pour rafraîchir toute l'UI.
-@st.fragment(run_every=2)
-def _live_polling():
-    _now = time.time()
-
-    # ── Backup Gist périodique (toutes les heures) ────────────────────────
-    # Indépendant du scraping — garantit que le Gist reste à jour même si
-    # l'utilisateur n'a pas scrapé depuis plusieurs heures/jours.
-    # session_state["_gist_hourly_backup"] repart à 0 à chaque restart →
-    # le premier poll après un redémarrage pousse immédiatement.
-    if (_gist_is_configured()
-            and _now - st.session_state.get("_gist_hourly_backup", 0.0) > 3600):
-        st.session_state["_gist_hourly_backup"] = _now
-        for _bslug in ["vins-rouges", "vins-blancs", "vins-roses",
-                        "vins-mousseux-et-petillants"]:
-            for _bpath_fn, _bcheck in ((_viv_path, lambda d: isinstance(d, dict) and len(d) > 0),
-                                        (_lec_path, lambda d: isinstance(d, dict) and len(d.get("wines", [])) > 0)):
-                _bp = _bpath_fn(_bslug)
-                if _bp.exists():
-                    try:
-                        _bc = _bp.read_text("utf-8")
-                        _bd = json.loads(_bc)
-                        if _bcheck(_bd):
-                            threading.Thread(
-                                target=gist_push, args=(_bp.name, _bc), daemon=False
-                            ).start()
-                    except Exception:
-                        pass
-
-    if not st.session_state.get("auto_live", True):
-        return
-    # Cooldown : ne pas déclencher deux reruns complets en moins de 1.8s
-    if _now - st.session_state.get("_last_full_rerun", 0.0) < 1.8:
-        return
-    _j = load_job_state()
-    _st = _j.get("status")
-    if _st in {"running", "queued"}:
-        st.session_state["_last_full_rerun"] = _now
-        st.rerun(scope="app")
-    elif _st in {"done", "error"}:
-        if _now - (_j.get("finished_at") or 0) < 6.0:
-            st.session_state["_last_full_rerun"] = _now
-            st.rerun(scope="app")
-
-_live_polling()
-
-_cur_slug = st.session_state.get("loaded_slug")   # cache — accédé plusieurs fois ci-dessous
-
-# ── SIDEBAR ───────────────────────────────────────────────────────────────
-with st.sidebar:
-    # ── Branding sidebar ──────────────────────────────────────────────
-    st.markdown(
-        '<div class="sb-brand">'
-        '<div class="sb-brand-title">🍷 Cave <span>Leclerc</span></div>'
-        '<div class="sb-brand-sub">Blagnac × Vivino</div>'
-        '</div>',
-        unsafe_allow_html=True)
-
-    st.markdown('<div class="sb-section">🍾 Type de vin</div>', unsafe_allow_html=True)
-    # key= explicite : évite que Streamlit perde la sélection lors des st.rerun()
-    # index= : restaure la sélection depuis loaded_slug si la clé widget est perdue
-    _wine_labels = list(WINE_TYPES.keys())
-    _loaded_lbl  = next(
-        (k for k, v in WINE_TYPES.items() if v == st.session_state.get("loaded_slug")),
-        _wine_labels[0]
-    )
-    wine_label = st.selectbox(
-        "Type", _wine_labels,
-        index=_wine_labels.index(_loaded_lbl),
-        key="wine_type_selector",
-        label_visibility="collapsed",
-    )
-    slug       = WINE_TYPES[wine_label]
-
-    st.markdown('<div class="sb-section">🔄 Mise à jour</div>', unsafe_allow_html=True)
-
+# Pendant un job, seules les zones qui bougent sont des st.fragment rafraîchis
+# toutes les LIVE_REFRESH_S s : carte de progression + couverture (sidebar),
+# cartes de la page du classement, console. Elles relisent le catalogue quand
+# sa version (époques d'écriture du store) a changé ; les cartes inchangées
+# sortent du cache HTML. Le reste du script (CSS, filtres, onglets, dataframes)
+# n'est réexécuté que sur un changement d'état du job (démarrage, fin).
+_LIVE_JOB = _early_job.get("status") in {"running", "queued"}
+
+
+def _live_fragment(fn):
+    """fn en fragment rafraîchi pendant un job, appel direct sinon."""
+    return st.fragment(fn, run_every=LIVE_REFRESH_S) if _LIVE_JOB else fn
+
+
+def _live_wines(slug: str):
+    """Vins de la session, rechargés si la version du catalogue a changé depuis le dernier rendu."""
+    if st.session_state.get("loaded_slug") == slug:
+        ver = (slug, catalogue_version(slug))
+        if st.session_state.get("_live_version") != ver:
+            fresh = load_wines_from_cache(slug)
+            if fresh:
+                st.session_state.wines      = fresh
+                st.session_state.data_ready = True
+            st.session_state["_live_version"] = ver
+    return st.session_state.get("wines") or []
+
+
+def _sidebar_live_panel(slug: str) -> int:
+    """Couverture Vivino + carte de progression du job (sidebar). Retourne le nb de vins sans note."""
     lc = load_leclerc_cache(slug)
     vc = load_vivino_cache(slug)
 
     if lc:
         n_total = len(lc["wines"])
-        _session_wines = st.session_state.get("wines") or []
-        if _session_wines and _cur_slug == slug:
+        _session_wines = _live_wines(slug)
+        if _session_wines and st.session_state.get("loaded_slug") == slug:
             n_rated   = sum(1 for w in _session_wines if w.get("rating"))
             n_missing = n_total - n_rated
         else:
@@ -3811,21 +6393,11 @@ with st.sidebar:
             '</div>',
             unsafe_allow_html=True)
 
-
     job = load_job_state()
-    _any_job_running = job.get("status") in {"running", "queued"}
-    _cross_slug_job  = _any_job_running and job.get("slug") != slug
-    _job_slug_label  = next(
-        (k for k, v in WINE_TYPES.items() if v == job.get("slug")), job.get("slug", "")
-    )
-
-    # Initialisation — toutes les variables bouton à False
-    # (certaines ne sont définies que dans le bloc else / mode normal)
-    btn_stock = btn_vivino = btn_repair_prices = False
-    btn_fill  = btn_stale  = btn_resume        = False
-
-    # ── MODE SCRAPING : carte de progression, boutons masqués ────────────
-    if _any_job_running:
+    if job.get("status") in {"running", "queued"}:
+        _cross_slug_job = job.get("slug") != slug
+        _job_slug_label = next(
+            (k for k, v in WINE_TYPES.items() if v == job.get("slug")), job.get("slug", ""))
         msg    = job.get("message", "")
         age    = fmt_age(job.get("updated_at", 0))
         m_prog = _PROGRESS_RE.search(msg)
@@ -3842,6 +6414,14 @@ with st.sidebar:
                 f'<div class="job-meta">{done_n} / {total_n} vins · {pct_int}% · {age}</div>'
                 f'</div>',
                 unsafe_allow_html=True)
+            _gov = _VIVINO_GOV.snapshot()
+            _gov_txt = {"closed": "🟢", "half-open": "🟡", "open": "🔴"}.get(_gov["state"], "")
+            _gov_txt += f" Vivino {_gov['rate']:.2f} req/s"
+            if _gov["paused_for"]:
+                _gov_txt += f" · pause {_gov['paused_for']:.0f}s"
+            if _gov["state"] == "open":
+                _gov_txt += f" · bloqué {_gov['open_for']:.0f}s ({_gov['reason']})"
+            st.caption(_gov_txt)
         else:
             st.markdown(
                 f'<div class="job-card">'
@@ -3850,7 +6430,89 @@ with st.sidebar:
                 f'<div class="job-meta">{age}</div>'
                 f'</div>',
                 unsafe_allow_html=True)
+    return n_missing
+
+
+@st.fragment(run_every=LIVE_REFRESH_S)
+def _live_polling():
+    _now = time.time()
+
+    # ── Backup Gist périodique (toutes les heures) ────────────────────────
+    # Indépendant du scraping — garantit que le Gist reste à jour même si
+    # l'utilisateur n'a pas scrapé depuis plusieurs heures/jours.
+    # session_state["_gist_hourly_backup"] repart à 0 à chaque restart →
+    # le premier poll après un redémarrage pousse immédiatement.
+    if (_gist_is_configured()
+            and _now - st.session_state.get("_gist_hourly_backup", 0.0) > 3600):
+        st.session_state["_gist_hourly_backup"] = _now
+        for _bslug in ["vins-rouges", "vins-blancs", "vins-roses",
+                        "vins-mousseux-et-petillants"]:
+            for _bpath_fn, _btbl in ((_viv_path, "vivino"), (_lec_path, "leclerc")):
+                if _store_count(_btbl, _bslug):
+                    _gist_push_async(_bpath_fn(_bslug).name, force=True)
+
+    if not st.session_state.get("auto_live", True):
+        return
+    # Cooldown : ne pas déclencher deux reruns complets en moins de 1.8s
+    if _now - st.session_state.get("_last_full_rerun", 0.0) < 1.8:
+        return
+    # Rerun complet seulement quand l'état du job change (les fragments live
+    # suivent la progression) : boutons, onglets et compteurs se remettent à jour.
+    _j = load_job_state()
+    if (_j.get("status"), _j.get("slug")) != st.session_state.get("_live_job_state"):
+        st.session_state["_last_full_rerun"] = _now
+        st.rerun(scope="app")
+
+st.session_state["_live_job_state"] = (_early_job.get("status"), _early_job.get("slug"))
+_live_polling()
+
+_cur_slug = st.session_state.get("loaded_slug")   # cache — accédé plusieurs fois ci-dessous
+
+# ── SIDEBAR ───────────────────────────────────────────────────────────────
+with st.sidebar:
+    # ── Branding sidebar ──────────────────────────────────────────────
+    st.markdown(
+        '<div class="sb-brand">'
+        '<div class="sb-brand-title">🍷 Cave <span>Leclerc</span></div>'
+        '<div class="sb-brand-sub">Blagnac × Vivino</div>'
+        '</div>',
+        unsafe_allow_html=True)
+
+    st.markdown('<div class="sb-section">🍾 Type de vin</div>', unsafe_allow_html=True)
+    # key= explicite : évite que Streamlit perde la sélection lors des st.rerun()
+    # index= : restaure la sélection depuis loaded_slug si la clé widget est perdue
+    _wine_labels = list(WINE_TYPES.keys())
+    _loaded_lbl  = next(
+        (k for k, v in WINE_TYPES.items() if v == st.session_state.get("loaded_slug")),
+        _wine_labels[0]
+    )
+    wine_label = st.selectbox(
+        "Type", _wine_labels,
+        index=_wine_labels.index(_loaded_lbl),
+        key="wine_type_selector",
+        label_visibility="collapsed",
+    )
+    slug       = WINE_TYPES[wine_label]
+
+    st.markdown('<div class="sb-section">🔄 Mise à jour</div>', unsafe_allow_html=True)
+
+    lc = load_leclerc_cache(slug)
+    vc = load_vivino_cache(slug)
+    # Couverture + progression : fragment live pendant un job
+    n_missing = _live_fragment(_sidebar_live_panel)(slug)
+
+    job = load_job_state()
+    _any_job_running = job.get("status") in {"running", "queued"}
+    _cross_slug_job  = _any_job_running and job.get("slug") != slug
+
+    # Initialisation — toutes les variables bouton à False
+    # (certaines ne sont définies que dans le bloc else / mode normal)
+    btn_stock = btn_vivino = btn_repair_prices = False
+    btn_fill  = btn_stale  = btn_resume        = False
+    btn_rematch = False
 
+    # ── MODE SCRAPING : carte de progression (panneau live), boutons masqués ──
+    if _any_job_running:
         # Bouton stop uniquement si même slug (sinon lecture seule)
         if not _cross_slug_job:
             if st.button("⏹ Arrêter le scraping", width='stretch'):
@@ -3913,6 +6575,13 @@ with st.sidebar:
                 width='stretch',
                 help=f"{n_stale_total} notes datent de plus de {VIVINO_CACHE_TTL_DAYS} jours.")
 
+        if _store_count("candidates", slug) and lc:
+            btn_rematch = st.button(
+                "🎯 Re-matcher hors ligne",
+                width='stretch',
+                help="Rejoue la sélection des candidats Vivino mémorisés avec le barème actuel "
+                     "(sans réseau, quelques secondes).")
+
         # Statut job terminé / erreur
         if job.get("status") == "done" and job.get("slug") == slug:
             done_key = f"_job_done_toasted_{job.get('finished_at',0)}"
@@ -3936,18 +6605,8 @@ with st.sidebar:
         unsafe_allow_html=True)
 
     # ── Statut persistance Gist ───────────────────────────────────────────
-    def _count_valid_local(path_fn, check):
-        n = 0
-        for s in WINE_TYPES.values():
-            p = path_fn(s)
-            if not p.exists(): continue
-            try:
-                d = json.loads(p.read_text("utf-8"))
-                if check(d): n += 1
-            except Exception: pass
-        return n
-    _n_viv_local = _count_valid_local(_viv_path, lambda d: isinstance(d, dict) and len(d) > 0)
-    _n_lec_local = _count_valid_local(_lec_path, lambda d: isinstance(d, dict) and len(d.get("wines",[])) > 0)
+    _n_viv_local = sum(1 for s in WINE_TYPES.values() if _store_count("vivino", s))
+    _n_lec_local = sum(1 for s in WINE_TYPES.values() if _store_count("leclerc", s))
     _cache_ok = _n_viv_local >= 1 or _n_lec_local >= 1
     _can_push    = _gist_is_configured()
     _can_restore = _gist_can_restore()
@@ -3961,17 +6620,13 @@ with st.sidebar:
             if _can_push:
                 if st.button("↑ Sauv.", key="btn_sync_gist", help="Sauvegarder local → Gist", width='stretch'):
                     with st.spinner("Sauvegarde…"):
-                        ok = 0
-                        for slug_s in WINE_TYPES.values():
-                            lc_p = _lec_path(slug_s)
-                            if lc_p.exists(): ok += gist_push(lc_p.name, lc_p.read_text("utf-8"))
-                        for slug_v in WINE_TYPES.values():
-                            viv_p = _viv_path(slug_v)
-                            if viv_p.exists(): ok += gist_push(viv_p.name, viv_p.read_text("utf-8"))
-                        ph_p = _price_hist_path()
-                        if ph_p.exists(): ok += gist_push(ph_p.name, ph_p.read_text("utf-8"))
-                        rej_p = REJECTION_LOG_PATH
-                        if rej_p.exists(): ok += gist_push(rej_p.name, rej_p.read_text("utf-8"))
+                        _files = {}
+                        for _fname in sorted(_GIST_FILES):
+                            _content = _store_export_json(_fname)
+                            if _content: _files[_fname] = _gist_encode(_content)
+                        ok = len(_files) if _gist_patch(_files) else 0
+                        for _fname, _enc in (_files.items() if ok else ()):
+                            _gist_mark_synced(_fname, _enc)
                     st.toast(f"☁️ {ok} fichiers sauvegardés", icon="✅")
             else:
                 st.caption("_(push désactivé)_")
@@ -4030,7 +6685,9 @@ gist_id      = ""
 
     # Max prix dynamique depuis les données réelles
     _all_wines  = st.session_state.get("wines") or []
-    _price_max  = max((w.get("price") or 0 for w in _all_wines), default=200)
+    _facets     = _all_wines.facets() if _is_wine_table(_all_wines) else None
+    _price_max  = (_facets.price_max if _facets is not None and _facets.n else
+                   max((w.get("price") or 0 for w in _all_wines), default=200))
     _price_ceil = max(200, int(math.ceil(_price_max / 10) * 10))
 
     # Deux number_input pour min/max — bien plus précis qu'un slider
@@ -4058,15 +6715,18 @@ gist_id      = ""
         format_func=lambda x: "Toutes" if x == 0 else f"≥ {x:.1f} ★")
 
     # Fix H : régions depuis wines enrichis (.region déjà calculé) si dispo
-    _region_source = _all_wines or (lc["wines"] if lc else [])
-    all_regions_cache = sorted({
-        _r for w in _region_source
-        if (_r := w.get("region") or extract_region(w["name"]))
-    })
+    if _facets is not None:
+        all_regions_cache = _facets.region_options
+    else:
+        _region_source = _all_wines or (lc["wines"] if lc else [])
+        all_regions_cache = sorted({
+            _r for w in _region_source
+            if (_r := w.get("region") or extract_region(w["name"]))
+        })
     regions_filter = st.multiselect("🗺️ Région", all_regions_cache, placeholder="Toutes les régions")
 
     # Filtre cépages
-    _all_grapes = sorted({
+    _all_grapes = _facets.grape_options if _facets is not None else sorted({
         g for w in (_all_wines or [])
         for g in (w.get("grapes") or []) if g
     })
@@ -4095,7 +6755,7 @@ if slug != st.session_state.loaded_slug:
     st.rerun()                   # re-exécuter le script avec le nouveau slug actif
 
 if not st.session_state.data_ready and not btn_stock and not btn_vivino \
-        and not btn_fill and not btn_resume and not btn_stale:
+        and not btn_fill and not btn_resume and not btn_stale and not btn_rematch:
     _update_wines_from_cache()
 
 if btn_stock:
@@ -4135,6 +6795,13 @@ if btn_stale:
     else:
         st.warning("Un job est déjà en cours.")
 
+if btn_rematch:
+    if start_background_job(slug, "rematch"):
+        st.session_state["console_open"] = True
+        st.success("Re-matching hors ligne lancé en arrière-plan.")
+    else:
+        st.warning("Un job est déjà en cours.")
+
 if btn_resume:
     if start_background_job(slug, "resume"):
         st.session_state["console_open"] = True
@@ -4199,15 +6866,11 @@ if _price_drops:
         )
 
 # ── FILTRE ────────────────────────────────────────────────────────────────
-filtered = [w for w in wines
-    if price_range[0] <= (w.get("price") or 0) <= price_range[1]
-    and (rating_min == 0 or (w.get("rating") and w["rating"] >= rating_min))
-    and (not search or _fuzzy_match(search, w["name"])
-         or _fuzzy_match(search, w.get("region") or ""))
-    and (not only_vintage or w.get("vintage_match") is True)
-    and (not only_dispo or w.get("available", True))
-    and (not regions_filter or w.get("region","") in regions_filter)
-    and (not grapes_filter or any(g in (w.get("grapes") or []) for g in grapes_filter))]
+# Facettes précalculées par version de catalogue : ET de masques, pas de boucle Python
+_filters = dict(search=search, price_range=price_range, rating_min=rating_min,
+                only_vintage=only_vintage, only_dispo=only_dispo,
+                regions=regions_filter, grapes=grapes_filter)
+filtered, _filter_mask = filter_wines(wines, **_filters)
 
 # ── COMPTEUR filtrés/total ─────────────────────────────────────────────────
 _n_f, _n_t = len(filtered), len(wines)
@@ -4236,7 +6899,98 @@ for col, (label, fn) in zip([_sc1, _sc2, _sc3, _sc4], SORTS.items()):
                      width='stretch', help=_SORT_HELP.get(label,"")):
             st.session_state.sort_key = label
             st.rerun()
-filtered.sort(key=SORTS.get(st.session_state.sort_key, SORTS["Q/P 💰"]))
+if _filter_mask is not None:
+    # Permutation précalculée par version, masquée par le filtre : pas de tri par rerun
+    filtered = wines.sorted_rows(st.session_state.sort_key, _filter_mask)
+else:
+    filtered.sort(key=SORTS.get(st.session_state.sort_key, SORTS["Q/P 💰"]))
+
+# ── CARTES DU CLASSEMENT ──────────────────────────────────────────────────
+def _render_rank_cards(page_wines: list, start: int, max_score: float,
+                       page: int, slug: str) -> None:
+    """Cartes d'une page du classement, avec bouton 🚫 et formulaire de rejet."""
+    for i, w in enumerate(page_wines):
+        _uid = f"{slug}_{w.get('ean') or i}_{page}"
+        _has_viv = bool(w.get("vivino_url"))
+        _reject_key = f"reject_mode_{_uid}"
+
+        # Carte HTML pure (pas de JS, pas de colonnes)
+        st.markdown(wine_card_html(w, start + i + 1, max_score),
+                    unsafe_allow_html=True)
+
+        # Bouton 🚫 natif Streamlit — CSS le remonte sur le coin bas-droit de la carte
+        if _has_viv:
+            if st.button("🚫", key=f"bad_viv_{_uid}",
+                         help=f"Vivino incorrect — {w['name'][:40]}"):
+                st.session_state[_reject_key] = True
+                st.rerun()
+
+        # Formulaire de rejet — sous la carte si bouton cliqué
+        if st.session_state.get(_reject_key):
+            with st.container():
+                st.markdown(
+                    f'<div style="background:#fff5f5;border:1px solid #fca5a5;'
+                    f'border-radius:8px;padding:.6rem .8rem;margin-bottom:.45rem;'
+                    f'font-size:.8rem;color:#7f1d1d">'
+                    f'<strong>🚫 Pourquoi ce lien Vivino est incorrect ?</strong><br>'
+                    f'<em>{w.get("vivino_url","")[:60]}…</em></div>',
+                    unsafe_allow_html=True)
+                _r_cols = st.columns([3, 1, 1])
+                with _r_cols[0]:
+                    _reason = st.selectbox(
+                        "Raison",
+                        list(REJECTION_REASONS.keys()),
+                        format_func=lambda k: REJECTION_REASONS[k],
+                        key=f"reason_{_uid}",
+                        label_visibility="collapsed")
+                with _r_cols[1]:
+                    if st.button("✅ Confirmer", key=f"confirm_rej_{_uid}",
+                                 width='stretch', type="primary"):
+                        _vc_live = load_vivino_cache(slug)
+                        _q = build_query(w["name"])
+                        _old = _vc_live.get(_q, {})
+                        _old_title = _old.get("vivino_name") or _old.get("vivino_url", "")
+                        save_vivino_rejection(
+                            wine_name=w["name"],
+                            query=_q,
+                            rejected_url=w.get("vivino_url", ""),
+                            rejected_title=_old_title,
+                            reason=_reason,
+                        )
+                        _vc_live[_q] = {
+                            "rating": None, "ratings_count": 0,
+                            "vivino_url": "", "vivino_year": None,
+                            "vintage_match": None, "match_confidence": None,
+                            "manual_override": True, "suppressed": True,
+                            "locked": True, "cached_at": time.time(),
+                        }
+                        save_vivino_cache(_vc_live, slug)
+                        _wines_fresh = load_wines_from_cache(slug)
+                        if _wines_fresh:
+                            st.session_state.wines = _wines_fresh
+                        st.session_state.pop(_reject_key, None)
+                        _rlab = REJECTION_REASONS[_reason]
+                        st.toast(f"✅ Rejet enregistré · {_rlab}", icon="🚫")
+                        st.rerun()
+                with _r_cols[2]:
+                    if st.button("Annuler", key=f"cancel_rej_{_uid}",
+                                 width='stretch'):
+                        st.session_state.pop(_reject_key, None)
+                        st.rerun()
+
+
+def _live_rank_page(slug: str, filters: dict, sort_key: str, page: int) -> None:
+    """Page courante recalculée depuis le catalogue à jour (fragment pendant un job)."""
+    wines = _live_wines(slug)
+    ranked, mask = filter_wines(wines, **filters)
+    if mask is not None:
+        ranked = wines.sorted_rows(sort_key, mask)
+    else:
+        ranked.sort(key=SORTS.get(sort_key, SORTS["Q/P 💰"]))
+    max_score = max((w.get("score") or 0 for w in ranked), default=1)
+    start = page * CARDS_PER_PAGE
+    _render_rank_cards(ranked[start:start + CARDS_PER_PAGE], start, max_score, page, slug)
+
 
 # ── ONGLETS ───────────────────────────────────────────────────────────────
 tab_rank, tab_deals, tab_stats, tab_data, tab_rej = st.tabs(
@@ -4329,75 +7083,10 @@ with tab_rank:
         end       = min(start + CARDS_PER_PAGE, n_total)
         page_wines = filtered[start:end]
 
-        for i, w in enumerate(page_wines):
-            _uid = f"{slug}_{w.get('ean') or i}_{page}"
-            _has_viv = bool(w.get("vivino_url"))
-            _reject_key = f"reject_mode_{_uid}"
-
-            # Carte HTML pure (pas de JS, pas de colonnes)
-            st.markdown(wine_card_html(w, start + i + 1, max_score),
-                        unsafe_allow_html=True)
-
-            # Bouton 🚫 natif Streamlit — CSS le remonte sur le coin bas-droit de la carte
-            if _has_viv:
-                if st.button("🚫", key=f"bad_viv_{_uid}",
-                             help=f"Vivino incorrect — {w['name'][:40]}"):
-                    st.session_state[_reject_key] = True
-                    st.rerun()
-
-            # Formulaire de rejet — sous la carte si bouton cliqué
-            if st.session_state.get(_reject_key):
-                with st.container():
-                    st.markdown(
-                        f'<div style="background:#fff5f5;border:1px solid #fca5a5;'
-                        f'border-radius:8px;padding:.6rem .8rem;margin-bottom:.45rem;'
-                        f'font-size:.8rem;color:#7f1d1d">'
-                        f'<strong>🚫 Pourquoi ce lien Vivino est incorrect ?</strong><br>'
-                        f'<em>{w.get("vivino_url","")[:60]}…</em></div>',
-                        unsafe_allow_html=True)
-                    _r_cols = st.columns([3, 1, 1])
-                    with _r_cols[0]:
-                        _reason = st.selectbox(
-                            "Raison",
-                            list(REJECTION_REASONS.keys()),
-                            format_func=lambda k: REJECTION_REASONS[k],
-                            key=f"reason_{_uid}",
-                            label_visibility="collapsed")
-                    with _r_cols[1]:
-                        if st.button("✅ Confirmer", key=f"confirm_rej_{_uid}",
-                                     width='stretch', type="primary"):
-                            _vc_live = load_vivino_cache(slug)
-                            _q = build_query(w["name"])
-                            _old = _vc_live.get(_q, {})
-                            _old_title = _old.get("vivino_name") or _old.get("vivino_url", "")
-                            save_vivino_rejection(
-                                wine_name=w["name"],
-                                query=_q,
-                                rejected_url=w.get("vivino_url", ""),
-                                rejected_title=_old_title,
-                                reason=_reason,
-                            )
-                            _vc_live[_q] = {
-                                "rating": None, "ratings_count": 0,
-                                "vivino_url": "", "vivino_year": None,
-                                "vintage_match": None, "match_confidence": None,
-                                "manual_override": True, "suppressed": True,
-                                "locked": True, "cached_at": time.time(),
-                            }
-                            save_vivino_cache(_vc_live, slug)
-                            _wines_fresh = load_wines_from_cache(slug)
-                            if _wines_fresh:
-                                st.session_state.wines = _wines_fresh
-                            st.session_state.pop(_reject_key, None)
-                            _rlab = REJECTION_REASONS[_reason]
-                            st.toast(f"✅ Rejet enregistré · {_rlab}", icon="🚫")
-                            st.rerun()
-                    with _r_cols[2]:
-                        if st.button("Annuler", key=f"cancel_rej_{_uid}",
-                                     width='stretch'):
-                            st.session_state.pop(_reject_key, None)
-                            st.rerun()
-
+        if _LIVE_JOB:   # seules les cartes suivent le job, sans rerun complet
+            _live_fragment(_live_rank_page)(slug, _filters, st.session_state.sort_key, page)
+        else:
+            _render_rank_cards(page_wines, start, max_score, page, slug)
 
         # Contrôles de pagination
         if n_pages > 1:
@@ -4470,35 +7159,7 @@ with tab_deals:
             unsafe_allow_html=True)
 
     for idx_d, w in enumerate(deals[:30]):
-        score   = w.get("score") or 0
-        trend   = w.get("price_trend", "")
-        trend_h = {"↑": '<span class="p-up">↑</span>',
-                   "↓": '<span class="p-down">↓</span>',
-                   "=": '<span class="p-eq">=</span>'}.get(trend, "")
-        safe_name = _html.escape(w["name"])
-        safe_url  = _html.escape(w.get("url") or "")
-        safe_viv  = _html.escape(w.get("vivino_url") or "")
-        safe_reg  = _html.escape(w.get("region") or "")
-        url_lec = f'<a href="{safe_url}" target="_blank" class="lnk lnk-lec">🛒 Leclerc</a>' if safe_url else ""
-        url_viv = f'<a href="{safe_viv}" target="_blank" class="lnk lnk-viv">🍷 Vivino</a>' if safe_viv else ""
-        rank_icon = {0:"🥇",1:"🥈",2:"🥉"}.get(idx_d, f"#{idx_d+1}")
-        top_cls = "d-top" if idx_d < 3 else ""
-        reg_txt = f"🗺️ {safe_reg} · " if safe_reg else ""
-        st.markdown(f"""
-<div class="deal-card {top_cls}">
-  <div style="text-align:center;min-width:56px">
-    <div style="font-size:1.4rem;line-height:1">{rank_icon}</div>
-    <div class="deal-score">{score:.2f}</div>
-    <div class="deal-label">score</div>
-  </div>
-  <div class="deal-body">
-    <div class="deal-name">{safe_name}</div>
-    <div class="deal-meta">{reg_txt}★ {w.get("rating",0):.1f}
-      · {fmt_count(w.get("ratings_count",0))} avis</div>
-    <div class="wine-links" style="margin-top:.3rem">{url_lec}{url_viv}</div>
-  </div>
-  <div class="deal-price"><strong>{(w.get("price") or 0):.2f} €</strong>{trend_h}</div>
-</div>""", unsafe_allow_html=True)
+        st.markdown(deal_card_html(w, idx_d), unsafe_allow_html=True)
 
     # Bouton copier la liste
     if deals:
@@ -4604,7 +7265,14 @@ with tab_stats:
         # Top régions
         with col_c:
             st.markdown('<div class="tab-subsection">Vins par région</div>', unsafe_allow_html=True)
-            reg_counts = df_s["Région"].value_counts().head(10)
+            if _filter_mask is not None:
+                # Comptes par facette sous le filtre courant (bincount sur l'index)
+                _rc: dict = {}
+                for _r, _c in wines.facets().region_counts(_filter_mask).items():
+                    _rc[_r or "Inconnue"] = _rc.get(_r or "Inconnue", 0) + _c
+                reg_counts = pd.Series(_rc, dtype="int64").sort_values(ascending=False, kind="stable").head(10)
+            else:
+                reg_counts = df_s["Région"].value_counts().head(10)
             top_reg = pd.DataFrame({"Région": reg_counts.index, "Nb": reg_counts.values})
             chart_reg = (alt.Chart(top_reg)
                 .mark_bar(color="#6B1A2A", cornerRadiusTopRight=4, cornerRadiusBottomRight=4)
@@ -4683,6 +7351,10 @@ with tab_data:
     n_av   = sum(1 for v in vc_now.values() if (v.get("ratings_count") or 0) > 0)
     n_url2 = sum(1 for v in vc_now.values() if v.get("vivino_url"))
     st.caption(f"{len(vc_now)} entrées · {n_ok} notes · {n_av} nb avis · {n_url2} URLs")
+    _rc_card, _rc_deal = _CARD_CACHE.stats(), _DEAL_CACHE.stats()
+    st.caption(f"🧩 Cache HTML · cartes {_rc_card['size']} ({_rc_card['hit_rate']:.0%} hits, "
+               f"{_rc_card['hits']}/{_rc_card['hits'] + _rc_card['misses']}) · "
+               f"affaires {_rc_deal['size']} ({_rc_deal['hit_rate']:.0%} hits)")
     def _vnum(v): return float(v) if v is not None and v != "" else None
     def _vyear(v):
         if v is None or v == "": return ""
@@ -4875,32 +7547,25 @@ with tab_data:
             f"vins_{slug}_complet_{today}.csv", "text/csv", width='stretch')
 
 # ── CONSOLE ───────────────────────────────────────────────────────────────
-st.divider()
-_has_log = JOB_LOG_PATH.exists() and JOB_LOG_PATH.stat().st_size > 0
-_console_visible = st.session_state.get("console_open", False)
-_job_running_now = job.get("status") in {"running", "queued"}
-
-_con_cols = st.columns([1, 6, 1])
-with _con_cols[0]:
-    _btn_lbl = "▼ Console" if not _console_visible else "▲ Console"
-    if st.button(_btn_lbl, key="toggle_console",
-                 type="primary" if _job_running_now else "secondary",
-                 help="Affiche les logs du scraping en temps réel"):
-        st.session_state["console_open"] = not _console_visible
-        st.rerun()
-with _con_cols[1]:
-    if _job_running_now:
+def _render_console_status() -> None:
+    """Badge LIVE + dernier message du job, ou date de fin (fragment live pendant un job)."""
+    job = load_job_state()
+    if job.get("status") in {"running", "queued"}:
         _live_badge = '<span style="color:#4caf50;font-weight:600;font-size:.75rem">'\
                       '🟢 LIVE</span>'
         st.markdown(
             f"{_live_badge} &nbsp; {job.get('message','')[:90]}",
             unsafe_allow_html=True)
-    elif _has_log:
+    elif JOB_LOG_PATH.exists() and JOB_LOG_PATH.stat().st_size > 0:
         _fin_at = job.get("finished_at")
         _fin_str = f" · terminé {fmt_age(_fin_at)}" if _fin_at else ""
         st.caption(f"🖥️ Logs du dernier job{_fin_str}")
 
-if _console_visible:
+
+def _render_console() -> None:
+    """Logs du dernier job, 500 lignes max (fragment live pendant un job)."""
+    _has_log = JOB_LOG_PATH.exists() and JOB_LOG_PATH.stat().st_size > 0
+    _job_running_now = load_job_state().get("status") in {"running", "queued"}
     try:
         _log_txt   = JOB_LOG_PATH.read_text("utf-8") if _has_log else ""
         _log_lines = _log_txt.strip().splitlines()
@@ -4916,8 +7581,7 @@ if _console_visible:
         st.caption(f"🖥️ Console · {_n_lines} lignes")
     with _ch2:
         if _job_running_now:
-            _is_cross = _job_running_now and job.get("slug") != slug
-            st.caption("⚡ mise à jour toutes les ~2 s")
+            st.caption(f"⚡ mise à jour toutes les ~{LIVE_REFRESH_S} s")
     with _ch3:
         if st.button("🗑️ Effacer", key="clear_console", width='stretch'):
             try: JOB_LOG_PATH.write_text("", "utf-8")
@@ -4944,6 +7608,25 @@ if _console_visible:
     )
     st.markdown(_console_html, unsafe_allow_html=True)
 
+
+st.divider()
+_console_visible = st.session_state.get("console_open", False)
+_job_running_now = job.get("status") in {"running", "queued"}
+
+_con_cols = st.columns([1, 6, 1])
+with _con_cols[0]:
+    _btn_lbl = "▼ Console" if not _console_visible else "▲ Console"
+    if st.button(_btn_lbl, key="toggle_console",
+                 type="primary" if _job_running_now else "secondary",
+                 help="Affiche les logs du scraping en temps réel"):
+        st.session_state["console_open"] = not _console_visible
+        st.rerun()
+with _con_cols[1]:
+    _live_fragment(_render_console_status)()
+
+if _console_visible:
+    _live_fragment(_render_console)()
+
 # ── REJETS VIVINO ─────────────────────────────────────────────────────────
 with tab_rej:
     _rejs = load_vivino_rejections()
@@ -4984,7 +7667,7 @@ with tab_rej:
         ra1, ra2 = st.columns([1, 3])
         with ra1:
             if st.button("🗑️ Effacer tous les rejets", width='stretch'):
-                try: REJECTION_LOG_PATH.unlink(missing_ok=True)
+                try: clear_vivino_rejections()
                 except Exception: pass
                 st.toast("Rejets effacés.", icon="🗑️")
                 st.rerun()
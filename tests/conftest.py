@@ -0,0 +1,36 @@
+"""Fixtures communes : streamlit_app importé hors Streamlit (mode « bare »)."""
+
+import importlib.util
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """
+    streamlit_app importé depuis une copie : le module crée .cache/ (SQLite) à
+    côté de lui et lit .streamlit/secrets.toml dans le répertoire courant.
+    """
+    sandbox = tmp_path_factory.mktemp("app")
+    for name in ("streamlit_app.py", "rate_governor.py"):
+        shutil.copy(ROOT / name, sandbox / name)
+    (sandbox / ".streamlit").mkdir()
+    (sandbox / ".streamlit" / "secrets.toml").write_text("")
+    cwd = os.getcwd()
+    os.chdir(sandbox)
+    sys.path.insert(0, str(sandbox))
+    try:
+        spec = importlib.util.spec_from_file_location("streamlit_app", sandbox / "streamlit_app.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        sys.path.remove(str(sandbox))
+        sys.modules.pop("rate_governor", None)
+        os.chdir(cwd)
@@ -0,0 +1,113 @@
+"""
+Client HTTP du catalogue Leclerc (fetch_leclerc_catalogue_http) : schéma de la
+réponse et garde-fous qui renvoient vers Selenium. La référence « navigateur »
+est le catalogue scrapé committé à la racine (index.html, JSON du cache Leclerc).
+
+La réponse réelle du front se capture avec capture_leclerc_api_sample() ;
+tant que tests/fixtures/leclerc_api_vins-rouges.json n'existe pas, le test
+qui la rejoue est sauté (et LECLERC_API_URL reste vide : client désactivé).
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT    = Path(__file__).resolve().parent.parent
+FIXTURE = Path(__file__).parent / "fixtures" / "leclerc_api_vins-rouges.json"
+REFERENCE = json.loads((ROOT / "index.html").read_text(encoding="utf-8"))["wines"]
+
+
+class _Resp:
+    def __init__(self, payload, status=200):
+        self.status_code, self._payload = status, payload
+
+    def json(self):
+        return self._payload
+
+
+def _product(w: dict, price_scale: float = 1.0) -> dict:
+    """Produit au format attendu par parse_api_products, construit depuis la référence."""
+    return {"label": w["name"], "price": {"price": round(w["price"] * price_scale, 2)},
+            "ean": w["ean"], "url": w["url"]}
+
+
+@pytest.fixture
+def catalogue(app, monkeypatch):
+    """Sert `payload` comme réponse de l'endpoint, catalogue navigateur = REFERENCE."""
+    served = {}
+    monkeypatch.setattr(app, "load_leclerc_cache",
+                        lambda slug: {"slug": slug, "wines": REFERENCE})
+    monkeypatch.setattr(app, "LECLERC_PAGE_SIZE", 1000)
+    monkeypatch.setattr(app, "LECLERC_API_URL", "https://www.e.leclerc/api/test")
+    monkeypatch.setattr(app._LECLERC_SESSION, "get",
+                        lambda url, params=None, **kw: _Resp(served["payload"]))
+
+    def _fetch(payload):
+        served["payload"] = payload
+        return app.fetch_leclerc_catalogue_http("vins-rouges")
+    return _fetch
+
+
+def _priced():
+    return [w for w in REFERENCE if w.get("price") and w.get("ean")]
+
+
+def test_consistent_response_is_used(catalogue):
+    wines = _priced()
+    cards = catalogue({"items": [_product(w) for w in wines], "total": len(wines)})
+    assert cards is not None and len(cards) == len(wines)
+    assert {c["ean"] for c in cards} == {w["ean"] for w in wines}
+
+
+def test_prices_in_cents_fall_back(catalogue):
+    wines = _priced()
+    assert catalogue({"items": [_product(w, 100) for w in wines], "total": len(wines)}) is None
+
+
+@pytest.mark.parametrize("payload", [
+    {"results": []},                                         # clé de liste inconnue
+    {"items": [{"label": "Vin sans prix", "ean": "3760093640305"}]},
+    {"items": [{"name": "Vin", "price": 9.5}]},              # ni EAN ni URL
+    ["pas", "des", "produits"],
+])
+def test_schema_mismatch_falls_back(catalogue, payload):
+    assert catalogue(payload) is None
+
+
+def test_unknown_products_fall_back(catalogue):
+    items = [{"label": f"Vin inconnu {i}", "price": 9.9, "ean": f"{4000000000000 + i}"}
+             for i in range(20)]
+    assert catalogue({"items": items, "total": len(items)}) is None
+
+
+def test_captured_front_response_parses(app, monkeypatch):
+    if not FIXTURE.exists():
+        pytest.skip("pas de capture : python -c \"import streamlit_app as s; "
+                    "s.capture_leclerc_api_sample()\"")
+    capture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    products = []
+    for sample in capture["samples"]:
+        data = sample["response"]
+        if isinstance(data, dict):
+            data = data.get("items") or data.get("products")
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            products.extend(data)
+    assert products, "aucune liste de produits dans la capture"
+    cards = app.parse_api_products(products)
+    assert len(cards) == len(products)
+    monkeypatch.setattr(app, "load_leclerc_cache",
+                        lambda slug: {"slug": slug, "wines": REFERENCE})
+    assert app._leclerc_api_mismatch(cards, capture["slug"]) == ""
+
+
+def test_disabled_until_captured(app):
+    if FIXTURE.exists():
+        pytest.skip("capture présente : l'endpoint peut être activé")
+    assert app.LECLERC_API_URL == ""
+    assert app.fetch_leclerc_catalogue_http("vins-rouges") is None
+
+
+def test_leclerc_session_never_sends_vivino_referer(app):
+    assert app._LECLERC_SESSION.headers["Referer"] == "https://www.e.leclerc/"
+    assert "vivino" not in " ".join(app._LECLERC_SESSION.headers.values())
@@ -0,0 +1,44 @@
+"""
+Pages Leclerc 2..N en parallèle (_scrape_all_leclerc_pages) avec des drivers
+factices : fusion dans l'ordre des pages, rattrapage séquentiel d'une page en
+échec, journal tenu uniquement par le thread appelant.
+"""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def pages(app, monkeypatch):
+    failed = set()
+    leased = itertools.count()
+
+    def _fetch(drv, slug, p):
+        if p == 3 and p not in failed:             # échec une fois, quel que soit le driver
+            failed.add(p)
+            raise TimeoutError("page trop lente")
+        time.sleep(0.02)                           # pages réparties entre les drivers
+        return p
+
+    monkeypatch.setattr(app, "_fetch_leclerc_page", _fetch)
+    monkeypatch.setattr(app, "parse_page", lambda p: (app.parse_cards(p), 6))
+    monkeypatch.setattr(app, "parse_cards",
+                        lambda p: [{"ean": f"{p}-{i}", "name": f"Vin {p}.{i}"} for i in range(3)])
+    monkeypatch.setattr(app, "_lease_driver",
+                        lambda store_cookie=False, timeout=None: {"driver": f"extra{next(leased)}"})
+    monkeypatch.setattr(app, "_release_driver", lambda entry, suspect=False: None)
+    monkeypatch.setattr(app, "LECLERC_PAGE_WORKERS", 3)
+    return failed
+
+
+def test_pages_merge_in_order_and_log_from_caller(app, pages):
+    logged = []
+    cards = app._scrape_all_leclerc_pages(
+        "main", "vins-rouges", log=lambda m: logged.append((threading.current_thread(), m)))
+    assert [c["ean"] for c in cards] == [f"{p}-{i}" for p in range(1, 7) for i in range(3)]
+    assert len(pages) == 1                               # une page en échec, relue ensuite
+    assert {t for t, _ in logged} == {threading.current_thread()}
+    assert any("reprise plus tard" in m for _, m in logged)
@@ -0,0 +1,28 @@
+"""
+Cache des cartes HTML : l'empreinte (_CARD_FIELDS / _DEAL_FIELDS) doit couvrir
+tous les champs que lit le rendu, sinon une carte périmée est resservie.
+"""
+
+import inspect
+import re
+
+import pytest
+
+_READ_RE = re.compile(r"""\b(?:wine|w)(?:\.get\(|\[)["'](\w+)["']""")
+
+
+@pytest.mark.parametrize("render, fields", [
+    ("_render_wine_card", "_CARD_FIELDS"),
+    ("_render_deal_card", "_DEAL_FIELDS"),
+])
+def test_fingerprint_covers_rendered_fields(app, render, fields):
+    read = set(_READ_RE.findall(inspect.getsource(getattr(app, render))))
+    assert read, "aucun champ relevé dans le rendu"
+    assert read <= set(getattr(app, fields))
+
+
+def test_vintage_match_change_rerenders(app):
+    wine = {"name": "Château Test", "price": 9.9, "vintage_match": None}
+    before = app.wine_card_html(wine, 5, 1.0)
+    after = app.wine_card_html({**wine, "vintage_match": False}, 5, 1.0)
+    assert "vintage-warn" not in before and "vintage-warn" in after
@@ -0,0 +1,91 @@
+"""
+Parité du scorer vectorisé (choose_best_vivino_candidates_batch) avec la
+version scalaire (choose_best_vivino_candidate) : même candidat retenu, même
+score, sur des lots tirés (graine fixe) des vins du catalogue scrapé committé
+à la racine (index.html, JSON du cache Leclerc).
+"""
+
+import json
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+REFERENCE = json.loads((ROOT / "index.html").read_text(encoding="utf-8"))["wines"]
+
+_REGIONS = ["Bordeaux", "Saint-Emilion", "Cotes du Rhone", "Languedoc", "Bourgogne",
+            "Costieres de Nimes", "Medoc", "Pays d'Oc", ""]
+_GRAPES  = ["Merlot", "Syrah", "Grenache", "Cabernet Sauvignon", "Pinot Noir", "Carignan"]
+_SLUGS   = ["vins-rouges", "vins-blancs", "vins-roses", "vins-mousseux-et-petillants"]
+
+
+def _title(rng: random.Random, app, name: str) -> str:
+    words = app.build_query(name).split()
+    pick = rng.random()
+    if pick < 0.3:
+        return " ".join(words)
+    if pick < 0.6:                                  # mots retirés / ajoutés
+        kept = [w for w in words if rng.random() > 0.3] or words[:1]
+        return " ".join(kept + rng.sample(["reserve", "grand", "vin", "cuvee", "prestige"], 1))
+    if pick < 0.8:
+        return re.split(r" - |,", name)[0]
+    return ""                                       # titre vide : candidat ignoré
+
+
+def _candidate(rng: random.Random, app, job_wine: dict) -> dict:
+    src = job_wine if rng.random() < 0.4 else rng.choice(REFERENCE)
+    title = _title(rng, app, src["name"])
+    seo = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "x"
+    c = {"title": title, "year": rng.choice([None, 2017, 2018, 2019, 2020, 2021, 2022, 2023])}
+    if rng.random() < 0.5:
+        c["record"] = {"vintage": {"wine": {
+            "seo_name": seo,
+            "type_id": rng.choice([None, 1, 2, 3, 4, 7]),
+            "region": {"name": rng.choice(_REGIONS)},
+            "style": {"grapes": [{"name": g} for g in rng.sample(_GRAPES, rng.randint(0, 3))]},
+        }}}
+        if rng.random() < 0.5:
+            c["url"] = f"https://www.vivino.com/wines/{seo}"
+    else:
+        c["url"] = f"https://www.vivino.com/w/{rng.randint(1, 10**6)}" if rng.random() < 0.8 else ""
+    return c
+
+
+def _jobs(app, n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(n):
+        w = rng.choice(REFERENCE)
+        cands = [_candidate(rng, app, w) for _ in range(rng.randint(0, app.VIVINO_CANDIDATES_MAX))]
+        urls = [c.get("url") for c in cands if c.get("url")]
+        ym = re.search(r"\b(20\d\d)\b", w["name"])
+        jobs.append({
+            "query":         app.build_query(w["name"]) if rng.random() < 0.9
+                             else rng.choice(["bordeaux", "bourgogne", "medoc"]),
+            "vintage":       int(ym.group(1)) if ym and rng.random() < 0.8 else rng.choice([None, 2020]),
+            "candidates":    cands,
+            "region":        app.extract_region(w["name"]) or rng.choice(_REGIONS),
+            "rejected_urls": set(rng.sample(urls, 1)) if urls and rng.random() < 0.2 else set(),
+            "grapes_hint":   (app.extract_grapes_from_name(w["name"])
+                              or rng.sample(_GRAPES, rng.randint(0, 2))),
+            "slug":          rng.choice(_SLUGS),
+        })
+    return jobs
+
+
+@pytest.mark.parametrize("seed", [7, 2024])
+def test_batch_scorer_matches_scalar(app, seed):
+    jobs = _jobs(app, 400, seed)
+    batch = app.choose_best_vivino_candidates_batch(jobs)
+    assert len(batch) == len(jobs)
+    picked = 0
+    for job, (best, score) in zip(jobs, batch):
+        ref_best, ref_score = app.choose_best_vivino_candidate(
+            job["query"], job["vintage"], job["candidates"], region=job["region"],
+            rejected_urls=job["rejected_urls"], grapes_hint=job["grapes_hint"], slug=job["slug"])
+        assert best is ref_best, job["query"]
+        assert score == ref_score, job["query"]
+        picked += ref_best is not None
+    assert picked > 50        # le tirage exerce bien les deux issues
@@ -0,0 +1,49 @@
+"""
+Store SQLite (_store_save / _store_load) : écritures incrémentales et
+instantanés communs à tout le process, y compris d'un rerun à l'autre.
+"""
+
+import importlib.util
+from pathlib import Path
+
+
+def _rows(n: int) -> dict:
+    return {f"k{i}": {"rating": 3.5 + i / 100, "ratings_count": i, "grapes": ["Merlot"]}
+            for i in range(n)}
+
+
+def test_save_touches_only_changed_rows(app):
+    rows = _rows(200)
+    assert app._store_save("test", "diff", rows) == 200
+    assert app._store_save("test", "diff", _rows(200)) == 0
+    rows = _rows(200)
+    rows["k7"] = {**rows["k7"], "rating": 4.2}
+    rows["k8"] = {**rows["k8"], "grapes": ("Merlot",)}     # même JSON qu'une liste
+    del rows["k9"]
+    assert app._store_save("test", "diff", rows) == 1 + 190 + 1   # k7, positions décalées, k9
+    assert app._store_save("test", "diff", rows) == 0
+    assert app._store_load("test", "diff")["k7"]["rating"] == 4.2
+    assert app._store_count("test", "diff") == 199
+
+
+def test_shared_view_is_replaced_not_mutated(app):
+    app._store_save("test", "view", _rows(3))
+    before = app._store_load("test", "view")
+    mine = dict(before)
+    mine["k1"] = {**mine["k1"], "rating": 1.0}
+    assert app._store_save("test", "view", mine) == 1
+    after = app._store_load("test", "view")
+    assert before["k1"]["rating"] != 1.0 and after["k1"]["rating"] == 1.0
+    assert after["k0"] is before["k0"]        # lignes inchangées partagées
+    mine["k1"]["rating"] = 2.0                # l'objet de l'appelant n'est pas retenu
+    assert app._store_save("test", "view", mine) == 1
+
+
+def test_state_survives_a_rerun(app):
+    app._store_save("test", "rerun", _rows(2))
+    spec = importlib.util.spec_from_file_location("streamlit_app", Path(app.__file__))
+    rerun = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(rerun)
+    assert rerun._store_snap is app._store_snap
+    assert rerun._store_lock is app._store_lock
+    assert rerun._store_load("test", "rerun") is app._store_load("test", "rerun")
@@ -0,0 +1,137 @@
+"""
+Client API Vivino asynchrone (run_vivino_api_pass) contre un serveur HTTP local
+qui imite /api/explore/explore : aucun accès réseau, aucun navigateur.
+
+    python -m pytest -q tests/
+"""
+
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+
+def _record(q: str) -> dict:
+    words = q.split()
+    return {"vintage": {
+        "name": "", "year": 2020,
+        "statistics": {"ratings_average": 3.9, "ratings_count": 120},
+        "wine": {"name": q, "seo_name": q.lower().replace(" ", "-"),
+                 "statistics": {"ratings_count": 500},
+                 "winery": {"name": words[0]},
+                 "region": {"name": "Bordeaux", "country": {"code": "fr"}},
+                 "style": {"grapes": [{"name": "Merlot"}]},
+                 "taste": {"structure": {"acidity": 3.1}}}}}
+
+
+class _Explore(BaseHTTPRequestHandler):
+    """Requête de plus de 2 mots → aucun record (force la cascade de repli)."""
+    hits: list = []
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def log_message(self, *a):
+        pass
+
+    def do_GET(self):
+        q = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)["q"][0]
+        cls = type(self)
+        with cls.lock:
+            cls.hits.append(q)
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(0.1)
+            recs = [] if len(q.split()) > 2 else [_record(q)]
+            body = json.dumps({"explore_vintage": {"records": recs}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+@pytest.fixture
+def explore(app, monkeypatch):
+    _Explore.hits, _Explore.in_flight, _Explore.peak = [], 0, 0
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Explore)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(app, "_VIVINO_EXPLORE_URL",
+                        f"http://127.0.0.1:{srv.server_address[1]}/api/explore/explore")
+    monkeypatch.setattr(app, "_VIVINO_GOV", app.RateGovernor(rate=50, burst=20, max_rate=50))
+    monkeypatch.setattr(app, "_search_memo_get", lambda key: None)
+    monkeypatch.setattr(app, "_search_memo_put", lambda key, value: None)
+    yield _Explore
+    srv.shutdown()
+    srv.server_close()
+
+
+def _wines(n: int) -> list[dict]:
+    return [{"name": f"Chateau Test{i} Reserve - Bordeaux AOP - Rouge - 75 cl", "vintage": 2020}
+            for i in range(n)]
+
+
+def test_api_pass_resolves_through_fallbacks(app, explore):
+    wines = _wines(6)
+    seen = []
+    res = app.run_vivino_api_pass("vins-rouges", wines, rejections={}, budget=20,
+                                  on_result=lambda i, vd: seen.append(i))
+    assert sorted(res) == sorted(seen) == list(range(len(wines)))
+    for vd in res.values():
+        assert vd["rating"] == 3.9
+        assert vd["vivino_url"].startswith("https://www.vivino.com/")
+
+
+def test_fallbacks_run_in_cascade_width_batches(app, explore, monkeypatch):
+    monkeypatch.setattr(app, "_VIVINO_API_WORKERS", 16)
+    monkeypatch.setattr(app, "VIVINO_CASCADE_WIDTH", 1)
+    app.run_vivino_api_pass("vins-rouges", _wines(1), rejections={}, budget=20)
+    assert len(explore.hits) >= 2          # requête principale + au moins un repli
+    assert explore.peak == 1               # jamais deux replis en vol pour un même vin
+
+
+def test_budget_stops_the_pass(app, explore):
+    t0 = time.time()
+    app.run_vivino_api_pass("vins-rouges", _wines(40), rejections={}, budget=0.3)
+    assert time.time() - t0 < 5
+
+
+def test_cancelled_acquire_returns_its_token(app, monkeypatch):
+    gov = app.RateGovernor(rate=2.0, burst=1)
+    monkeypatch.setattr(app, "_VIVINO_GOV", gov)
+    assert gov.acquire()                   # seau vide : le prochain jeton arrive dans 0.5 s
+
+    async def _cancel_while_waiting():
+        task = asyncio.ensure_future(app._vivino_acquire_async(5.0))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_cancel_while_waiting())
+    time.sleep(0.8)                        # le thread obtient son jeton puis le rend
+    assert gov.acquire(timeout=0.0)        # jeton rendu
+    assert not gov.acquire(timeout=0.0)    # un seul : le seau n'a pas été gonflé
+
+
+def test_api_candidates_feed_offline_rematch(app, explore, monkeypatch):
+    slug = "test-rematch"
+    wines = [{**w, "ean": f"376000000000{i}", "price": 9.9, "url": ""}
+             for i, w in enumerate(_wines(3))]
+    app.run_vivino_api_pass(slug, wines, rejections={}, budget=20)
+    store = app._store_load("candidates", slug)
+    for w in wines:
+        prios = sorted(a[2] for a in store[app.build_query(w["name"])]["attempts"])
+        assert prios[0] == 0 and len(prios) >= 2     # principale (vide) + replis
+    monkeypatch.setattr(app, "load_leclerc_cache", lambda s: {"slug": s, "wines": wines})
+    rematched = app.run_rematch_vivino(slug)
+    assert [w["rating"] for w in rematched] == [3.9] * len(wines)